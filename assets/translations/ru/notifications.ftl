@@ -21,6 +21,20 @@ ntf-event-error =
     { $error }
     </blockquote>
 
+ntf-event-error-digest =
+    #EventError
+
+    <b>🔅 Событие: Ошибка повторяется!</b>
+
+    <blockquote>
+    Повторений за последние { $window } мин.: <b>{ $count }</b>
+    </blockquote>
+
+    { hdr-error }
+    <blockquote>
+    { $error }
+    </blockquote>
+
 ntf-event-error-remnawave =
     #EventError
 
@@ -0,0 +1,222 @@
+"""
+Measures broadcast throughput against a fake Bot API server.
+
+The server answers sendMessage after a fixed latency, enforces a sliding one-second
+limit with 429 responses (retry_after=1) and answers 403 for every 100th chat, like a
+user who blocked the bot. Three senders are compared:
+
+- the sequential loop used before BroadcastSender (BATCH_SIZE messages, then BATCH_DELAY)
+- BroadcastSender alone
+- BroadcastSender behind OutboundRateLimitMiddleware with a fakeredis budget
+
+Usage: PYTHONPATH=. uv run python scripts/bench_broadcast.py [--messages N] [--limit N]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter, deque
+from typing import AsyncIterator, Final, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import Message
+from aiohttp import web
+from fakeredis import FakeAsyncRedis
+from loguru import logger
+
+# AppConfig is loaded on import of the services
+os.environ.setdefault("APP_DOMAIN", "example.com")
+os.environ.setdefault("APP_CRYPT_KEY", "eHh4eHh4eHh4eHh4eHh4eHh4eHh4eHh4eHh4eHh4eHg=")
+os.environ.setdefault("APP_LOCALES", "en,ru")
+os.environ.setdefault("BOT_TOKEN", "1:bench")
+os.environ.setdefault("BOT_SECRET_TOKEN", "secret")
+os.environ.setdefault("BOT_DEV_ID", "1")
+os.environ.setdefault("BOT_SUPPORT_USERNAME", "support_user")
+os.environ.setdefault("REMNAWAVE_TOKEN", "token")
+os.environ.setdefault("REMNAWAVE_WEBHOOK_SECRET", "secret")
+os.environ.setdefault("DATABASE_PASSWORD", "password")
+os.environ.setdefault("REDIS_PASSWORD", "password")
+
+from src.bot.session import BotSession, OutboundRateLimitMiddleware, bulk_sending  # noqa: E402
+from src.core.constants import BATCH_DELAY, BATCH_SIZE  # noqa: E402
+from src.services.broadcast import BroadcastSender  # noqa: E402
+
+HOST: Final[str] = "127.0.0.1"
+
+
+class FakeBotApi:
+    latency: float
+    limit: int
+    responses: Counter[str]
+    _window: deque[float]
+
+    def __init__(self, latency: float, limit: int) -> None:
+        self.latency = latency
+        self.limit = limit
+        self.responses = Counter()
+        self._window = deque()
+
+    def reset(self) -> None:
+        self.responses.clear()
+        self._window.clear()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+
+        if request.match_info["method"] != "sendMessage":
+            return web.json_response(
+                {"ok": False, "error_code": 404, "description": "Not Found"},
+                status=404,
+            )
+
+        chat_id = int((await request.post())["chat_id"])  # type: ignore[arg-type]
+        now = time.monotonic()
+
+        while self._window and self._window[0] < now - 1:
+            self._window.popleft()
+
+        if len(self._window) >= self.limit:
+            self.responses["429"] += 1
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": "Too Many Requests: retry after 1",
+                    "parameters": {"retry_after": 1},
+                },
+                status=429,
+            )
+
+        self._window.append(now)
+
+        if chat_id % 100 == 0:
+            self.responses["403"] += 1
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 403,
+                    "description": "Forbidden: bot was blocked by the user",
+                },
+                status=403,
+            )
+
+        self.responses["200"] += 1
+        return web.json_response(
+            {
+                "ok": True,
+                "result": {
+                    "message_id": chat_id,
+                    "date": 0,
+                    "chat": {"id": chat_id, "type": "private"},
+                    "text": "broadcast",
+                },
+            },
+        )
+
+
+def create_bot(port: int) -> Bot:
+    session = BotSession(
+        limit=256,
+        limit_per_host=0,
+        keepalive_timeout=30,
+        dns_cache_ttl=60,
+        timeout=10,
+        api_server=f"http://{HOST}:{port}",
+    )
+    return Bot(token="1:bench", session=session)
+
+
+def report(label: str, sent: int, elapsed: float, server: FakeBotApi, extra: str = "") -> None:
+    print(
+        f"{label:<28}{sent:>6} messages in {elapsed:6.1f}s = {sent / elapsed:6.1f} msg/s, "
+        f"server responses {dict(server.responses)}{extra}"
+    )
+
+
+async def run_sequential(port: int, messages: int, server: FakeBotApi) -> None:
+    bot = create_bot(port)
+    server.reset()
+    started_at = time.monotonic()
+
+    for chat_id in range(1, messages + 1):
+        try:
+            await bot.send_message(chat_id, "broadcast")
+        except TelegramAPIError:
+            pass
+
+        if chat_id % BATCH_SIZE == 0:
+            await asyncio.sleep(BATCH_DELAY)
+
+    report("sequential loop", messages, time.monotonic() - started_at, server)
+    await bot.session.close()
+
+
+async def run_sender(port: int, messages: int, server: FakeBotApi, limiter: bool) -> None:
+    bot = create_bot(port)
+    redis: Optional[FakeAsyncRedis] = None
+    server.reset()
+
+    if limiter:
+        redis = FakeAsyncRedis()
+        bot.session.middleware(OutboundRateLimitMiddleware(redis))
+
+    async def chat_ids() -> AsyncIterator[int]:
+        for chat_id in range(1, messages + 1):
+            yield chat_id
+
+    async def send(chat_id: int) -> Optional[Message]:
+        return await bot.send_message(chat_id, "broadcast")
+
+    sender = BroadcastSender(send=send)
+    started_at = time.monotonic()
+    handled = 0
+
+    with bulk_sending():
+        async for _ in sender.run(chat_ids()):
+            handled += 1
+
+    report(
+        "sender + redis limiter" if limiter else "sender",
+        handled,
+        time.monotonic() - started_at,
+        server,
+        f", stats {sender.stats.as_dict()}, final rate {sender.rate.rate:.1f}/s",
+    )
+    await bot.session.close()
+
+    if redis is not None:
+        await redis.aclose()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=1200)
+    parser.add_argument("--sequential-messages", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=20, help="server limit, messages/s")
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency, seconds")
+    parser.add_argument("--port", type=int, default=18081)
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="CRITICAL")
+
+    server = FakeBotApi(latency=args.latency, limit=args.limit)
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", server.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, HOST, args.port).start()
+
+    try:
+        await run_sequential(args.port, args.sequential_messages, server)
+        await run_sender(args.port, args.messages, server, limiter=False)
+        await run_sender(args.port, args.messages, server, limiter=True)
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,191 @@
+"""
+Compares cache codecs on the DTOs that are cached on hot paths.
+
+For each payload it measures the write path (dump + encode) and the read path
+(decode + load) of JsonCodec and MsgpackCodec. It also measures a "trusted" read that
+skips validation: the decoded msgpack is rebuilt into models with a loader compiled
+from the return type, as a model_construct-style fast path would do.
+
+Usage: PYTHONPATH=. uv run python scripts/bench_cache_codec.py [--iterations N]
+"""
+
+import argparse
+import enum
+import os
+import platform
+import time
+import types
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional, Union, get_args, get_origin
+from uuid import UUID, uuid4
+
+from pydantic import BaseModel, SecretStr, TypeAdapter
+
+# AppConfig is loaded on import of the DTO modules
+os.environ.setdefault("APP_DOMAIN", "example.com")
+os.environ.setdefault("APP_CRYPT_KEY", "eHh4eHh4eHh4eHh4eHh4eHh4eHh4eHh4eHh4eHh4eHg=")
+os.environ.setdefault("APP_LOCALES", "en,ru")
+os.environ.setdefault("BOT_TOKEN", "1:bench")
+os.environ.setdefault("BOT_SECRET_TOKEN", "secret")
+os.environ.setdefault("BOT_DEV_ID", "1")
+os.environ.setdefault("BOT_SUPPORT_USERNAME", "support_user")
+os.environ.setdefault("REMNAWAVE_TOKEN", "token")
+os.environ.setdefault("REMNAWAVE_WEBHOOK_SECRET", "secret")
+os.environ.setdefault("DATABASE_PASSWORD", "password")
+os.environ.setdefault("REDIS_PASSWORD", "password")
+
+from src.core.enums import PlanType, SubscriptionStatus, UserRole  # noqa: E402
+from src.infrastructure.database.models.dto import (  # noqa: E402
+    PlanSnapshotDto,
+    SettingsDto,
+    SubscriptionDto,
+    UserDto,
+)
+from src.infrastructure.redis.codecs import CacheCodec, JsonCodec, MsgpackCodec  # noqa: E402
+
+Loader = Callable[[Any], Any]
+
+# Types msgpack hands back as they were written
+PASSTHROUGH_TYPES = (str, int, float, bool, bytes, datetime, type(None))
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def build_trusted_loader(annotation: Any) -> Loader:
+    """Builds models without validation, converting only what msgpack can not carry."""
+    if annotation is Any or annotation in PASSTHROUGH_TYPES:
+        return _identity
+
+    if get_origin(annotation) is not None:
+        return _build_generic_loader(annotation)
+
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _build_model_loader(annotation)
+
+    if isinstance(annotation, type) and issubclass(annotation, (enum.Enum, UUID, SecretStr)):
+        return annotation
+
+    return TypeAdapter(annotation).validate_python
+
+
+def _build_generic_loader(annotation: Any) -> Loader:
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+
+    if origin in (Union, types.UnionType):
+        members = [arg for arg in args if arg is not type(None)]
+
+        if len(members) == 1:
+            inner = build_trusted_loader(members[0])
+            return lambda value: None if value is None else inner(value)
+
+    elif origin in (list, set, frozenset):
+        item_loader = build_trusted_loader(args[0] if args else Any)
+        return lambda value: origin(item_loader(item) for item in value)
+
+    elif origin is dict:
+        key_loader = build_trusted_loader(args[0] if args else Any)
+        value_loader = build_trusted_loader(args[1] if args else Any)
+        return lambda value: {key_loader(k): value_loader(v) for k, v in value.items()}
+
+    return TypeAdapter(annotation).validate_python
+
+
+def _build_model_loader(model: type[BaseModel]) -> Loader:
+    field_loaders = [
+        (name, build_trusted_loader(field.annotation)) for name, field in model.model_fields.items()
+    ]
+
+    def load(value: Any) -> Any:
+        return model.model_construct(
+            **{name: loader(value[name]) for name, loader in field_loaders if name in value}
+        )
+
+    return load
+
+
+def make_payloads() -> list[tuple[str, Any, Any]]:
+    now = datetime.now(timezone.utc)
+    plan = PlanSnapshotDto(
+        id=1,
+        name="Plan",
+        type=PlanType.BOTH,
+        traffic_limit=100,
+        device_limit=3,
+        duration=30,
+        internal_squads=[uuid4()],
+    )
+    subscription = SubscriptionDto(
+        user_remna_id=uuid4(),
+        status=SubscriptionStatus.ACTIVE,
+        is_trial=False,
+        traffic_limit=100,
+        device_limit=3,
+        internal_squads=[uuid4()],
+        external_squad=None,
+        expire_at=now + timedelta(days=3),
+        url="https://example.com/sub",
+        plan=plan,
+    )
+    user = UserDto(
+        id=5,
+        telegram_id=123456789,
+        name="User",
+        role=UserRole.USER,
+        created_at=now,
+        current_subscription=subscription,
+    )
+    return [
+        ("UserDto with subscription", Optional[UserDto], user),
+        ("SettingsDto", SettingsDto, SettingsDto()),
+        ("list[UserDto] x50", list[UserDto], [user] * 50),
+    ]
+
+
+def measure(function: Callable[[], Any], iterations: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - started_at) / iterations * 1e6
+
+
+def bench(name: str, annotation: Any, value: Any, iterations: int) -> None:
+    codecs: list[CacheCodec[Any]] = [JsonCodec(annotation), MsgpackCodec(annotation)]
+    trusted_loader = build_trusted_loader(annotation)
+    msgpack_codec = codecs[1]
+    msgpack_data = msgpack_codec.encode(msgpack_codec.dump(value))
+
+    # The trusted path is only worth anything if it rebuilds what validation does
+    validated = msgpack_codec.load(msgpack_codec.decode(msgpack_data))
+    assert trusted_loader(msgpack_codec.decode(msgpack_data)) == validated
+
+    print(f"\n{name}")
+
+    for codec in codecs:
+        data = codec.encode(codec.dump(value))
+        write = measure(lambda c=codec: c.encode(c.dump(value)), iterations)
+        read = measure(lambda c=codec, d=data: c.load(c.decode(d)), iterations)
+        print(f"  {codec.name:<16} {len(data):>7}B  write {write:8.1f}us  read {read:8.1f}us")
+
+    read = measure(lambda: trusted_loader(msgpack_codec.decode(msgpack_data)), iterations)
+    decode = measure(lambda: msgpack_codec.decode(msgpack_data), iterations)
+    print(f"  {'msgpack trusted':<16} {'':>8}  {'':>14}  read {read:8.1f}us")
+    print(f"  {'msgpack decode':<16} {'':>8}  {'':>14}  read {decode:8.1f}us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"Python {platform.python_version()}, {args.iterations} iterations (lists: 1/50)")
+
+    for name, annotation, value in make_payloads():
+        iterations = args.iterations // 50 if name.startswith("list") else args.iterations
+        bench(name, annotation, value, max(iterations, 1))
+
+
+if __name__ == "__main__":
+    main()
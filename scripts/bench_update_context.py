@@ -0,0 +1,333 @@
+"""
+Counts the lookups a single update costs on its way through the outer middlewares.
+
+Each update runs through the same chain as in production (context, access, user, rules,
+channel, throttling) with a fresh request container. UserService.get and
+SettingsService.get are replaced by counting stubs; each call also issues one Redis GET,
+the cache read it costs when the local cache is cold. Redis is a counting fakeredis
+client and the container counts top-level resolutions.
+
+The same updates are replayed through a baseline chain that repeats the lookups the
+middlewares made before UpdateContext: every middleware resolves its own services and
+fetches the user and settings again. The per-update averages of both chains are printed
+side by side. The channel membership cache only exists in the current chain; it never
+hits here because every update comes from a new user.
+
+Usage: PYTHONPATH=. uv run python scripts/bench_update_context.py [--updates N]
+"""
+
+import argparse
+import asyncio
+import inspect
+import os
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+from aiogram import Bot
+from aiogram.types import Chat, ChatMemberMember, Message, TelegramObject
+from aiogram.types import User as AiogramUser
+from fakeredis import FakeAsyncRedis
+from redis.asyncio import Redis
+
+# AppConfig is loaded on import of the services
+os.environ.setdefault("APP_DOMAIN", "example.com")
+os.environ.setdefault("APP_CRYPT_KEY", "eHh4eHh4eHh4eHh4eHh4eHh4eHh4eHh4eHh4eHh4eHg=")
+os.environ.setdefault("APP_LOCALES", "en,ru")
+os.environ.setdefault("BOT_TOKEN", "1:bench")
+os.environ.setdefault("BOT_SECRET_TOKEN", "secret")
+os.environ.setdefault("BOT_DEV_ID", "1")
+os.environ.setdefault("BOT_SUPPORT_USERNAME", "support_user")
+os.environ.setdefault("REMNAWAVE_TOKEN", "token")
+os.environ.setdefault("REMNAWAVE_WEBHOOK_SECRET", "secret")
+os.environ.setdefault("DATABASE_PASSWORD", "password")
+os.environ.setdefault("REDIS_PASSWORD", "password")
+
+from src.bot.middlewares import (  # noqa: E402
+    AccessMiddleware,
+    ChannelMiddleware,
+    ContextMiddleware,
+    RulesMiddleware,
+    ThrottlingMiddleware,
+    UserMiddleware,
+)
+from src.bot.middlewares.base import EventTypedMiddleware  # noqa: E402
+from src.core.config import AppConfig  # noqa: E402
+from src.core.constants import CONTAINER_KEY, IS_SUPER_DEV_KEY, USER_KEY  # noqa: E402
+from src.infrastructure.database.models.dto import SettingsDto, UserDto  # noqa: E402
+from src.infrastructure.redis import RedisRepository  # noqa: E402
+from src.services.access import CHANNEL_MEMBER_STATUSES, AccessService  # noqa: E402
+from src.services.notification import NotificationService  # noqa: E402
+from src.services.referral import ReferralService  # noqa: E402
+from src.services.settings import SettingsService  # noqa: E402
+from src.services.user import UserService  # noqa: E402
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+counts: Counter[str] = Counter()
+
+
+class CountingRedis(FakeAsyncRedis):
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        counts["redis_commands"] += 1
+        return await super().execute_command(*args, **options)
+
+
+class StubUserService(UserService):
+    def __init__(self, redis: Redis) -> None:
+        self.redis_client = redis
+
+    async def get(self, telegram_id: int) -> Optional[UserDto]:
+        counts["user_lookups"] += 1
+        await self.redis_client.get(f"bench:user:{telegram_id}")
+        return UserDto(telegram_id=telegram_id, name="user", is_rules_accepted=True)
+
+    async def compare_and_update(self, user: UserDto, aiogram_user: AiogramUser) -> None:
+        return None
+
+    async def update_recent_activity(self, telegram_id: int) -> None:
+        return None
+
+
+class StubSettingsService(SettingsService):
+    def __init__(self, redis: Redis) -> None:
+        self.redis_client = redis
+
+    async def get(self) -> SettingsDto:
+        counts["settings_lookups"] += 1
+        await self.redis_client.get("bench:settings")
+        return SettingsDto(rules_required=True, channel_required=True, channel_link="@channel")
+
+
+class StubBot:
+    async def get_chat_member(self, chat_id: Any, user_id: int) -> ChatMemberMember:
+        counts["bot_requests"] += 1
+        return ChatMemberMember(user=AiogramUser(id=user_id, is_bot=False, first_name="user"))
+
+
+class CountingContainer:
+    """A request-scoped stand-in for dishka: unknown dependencies resolve to None."""
+
+    _instances: dict[Any, Any]
+
+    def __init__(self, shared: dict[Any, Any]) -> None:
+        self._instances = dict(shared)
+        self._instances[UserService] = StubUserService(shared[Redis])
+        self._instances[SettingsService] = StubSettingsService(shared[Redis])
+
+    async def get(self, dependency: Any) -> Any:
+        counts["container_resolutions"] += 1
+        return await self._resolve(dependency)
+
+    async def _resolve(self, dependency: Any) -> Any:
+        if dependency in self._instances:
+            return self._instances[dependency]
+
+        kwargs: dict[str, Any] = {}
+
+        for name, parameter in inspect.signature(dependency.__init__).parameters.items():
+            if name in ("self", "args", "kwargs"):
+                continue
+            annotation = parameter.annotation
+            resolvable = annotation in self._instances or (
+                inspect.isclass(annotation) and annotation.__module__.startswith("src.services")
+            )
+            kwargs[name] = await self._resolve(annotation) if resolvable else None
+
+        self._instances[dependency] = dependency(**kwargs)
+        return self._instances[dependency]
+
+
+class BaselineAccessMiddleware(AccessMiddleware):
+    async def middleware_logic(
+        self, handler: Handler, event: TelegramObject, data: dict[str, Any]
+    ) -> Any:
+        aiogram_user = self._get_aiogram_user(event)
+        assert aiogram_user is not None
+        container: CountingContainer = data[CONTAINER_KEY]
+        access_service: AccessService = await container.get(AccessService)
+
+        # AccessService.is_access_allowed read both through the services
+        user = await access_service.user_service.get(aiogram_user.id)
+        await access_service.settings_service.get_access_mode()
+
+        if user is None or user.is_blocked:
+            return None
+
+        return await handler(event, data)
+
+
+class BaselineUserMiddleware(UserMiddleware):
+    async def middleware_logic(
+        self, handler: Handler, event: TelegramObject, data: dict[str, Any]
+    ) -> Any:
+        aiogram_user = self._get_aiogram_user(event)
+        assert aiogram_user is not None
+        container: CountingContainer = data[CONTAINER_KEY]
+        await container.get(NotificationService)
+        config: AppConfig = await container.get(AppConfig)
+        user_service: UserService = await container.get(UserService)
+        await container.get(ReferralService)
+        user = await user_service.get(telegram_id=aiogram_user.id)
+        assert user is not None
+
+        await user_service.compare_and_update(user, aiogram_user)
+        await user_service.update_recent_activity(telegram_id=user.telegram_id)
+        data[USER_KEY] = user
+        data[IS_SUPER_DEV_KEY] = user.telegram_id == config.bot.dev_id
+        return await handler(event, data)
+
+
+class BaselineRulesMiddleware(RulesMiddleware):
+    async def middleware_logic(
+        self, handler: Handler, event: TelegramObject, data: dict[str, Any]
+    ) -> Any:
+        container: CountingContainer = data[CONTAINER_KEY]
+        user: UserDto = data[USER_KEY]
+        settings_service: SettingsService = await container.get(SettingsService)
+
+        if not await settings_service.is_rules_required():
+            return await handler(event, data)
+
+        await container.get(UserService)
+        await container.get(NotificationService)
+        await settings_service.get()
+
+        if not user.is_rules_accepted:
+            return None
+
+        return await handler(event, data)
+
+
+class BaselineChannelMiddleware(ChannelMiddleware):
+    async def middleware_logic(
+        self, handler: Handler, event: TelegramObject, data: dict[str, Any]
+    ) -> Any:
+        container: CountingContainer = data[CONTAINER_KEY]
+        user: UserDto = data[USER_KEY]
+        settings_service: SettingsService = await container.get(SettingsService)
+
+        if not await settings_service.is_channel_required():
+            return await handler(event, data)
+
+        bot: StubBot = await container.get(Bot)
+        await container.get(NotificationService)
+        settings = await settings_service.get()
+        member = await bot.get_chat_member(
+            chat_id=settings.channel_link.get_secret_value(),
+            user_id=user.telegram_id,
+        )
+
+        if member.status not in CHANNEL_MEMBER_STATUSES:
+            return None
+
+        return await handler(event, data)
+
+
+class BaselineThrottlingMiddleware(ThrottlingMiddleware):
+    async def middleware_logic(
+        self, handler: Handler, event: TelegramObject, data: dict[str, Any]
+    ) -> Any:
+        container: CountingContainer = data[CONTAINER_KEY]
+        await container.get(NotificationService)
+        return await super().middleware_logic(handler, event, data)
+
+
+def build_chain(middlewares: list[EventTypedMiddleware]) -> Any:
+    async def handler(event: TelegramObject, data: dict[str, Any]) -> str:
+        return "handled"
+
+    chain = handler
+
+    for middleware in reversed(middlewares):
+
+        def bind(middleware: EventTypedMiddleware, next_handler: Any) -> Any:
+            async def call(event: TelegramObject, data: dict[str, Any]) -> Any:
+                return await middleware.middleware_logic(next_handler, event, data)
+
+            return call
+
+        chain = bind(middleware, chain)
+
+    return chain
+
+
+def build_current_chain() -> Any:
+    return build_chain(
+        [
+            ContextMiddleware(),
+            AccessMiddleware(),
+            UserMiddleware(),
+            RulesMiddleware(),
+            ChannelMiddleware(),
+            ThrottlingMiddleware(),
+        ]
+    )
+
+
+def build_baseline_chain() -> Any:
+    return build_chain(
+        [
+            BaselineAccessMiddleware(),
+            BaselineUserMiddleware(),
+            BaselineRulesMiddleware(),
+            BaselineChannelMiddleware(),
+            BaselineThrottlingMiddleware(),
+        ]
+    )
+
+
+async def measure(chain: Any, updates: int) -> tuple[Counter[str], float]:
+    config = AppConfig.get()
+    redis = CountingRedis()
+    shared: dict[Any, Any] = {
+        AppConfig: config,
+        Redis: redis,
+        RedisRepository: RedisRepository(config, redis),
+        Bot: StubBot(),
+        NotificationService: None,
+        ReferralService: None,
+    }
+    counts.clear()
+    started_at = time.perf_counter()
+
+    for index in range(updates):
+        telegram_id = 1000 + index
+        message = Message(
+            message_id=1,
+            date=datetime.now(timezone.utc),
+            chat=Chat(id=telegram_id, type="private"),
+            from_user=AiogramUser(id=telegram_id, is_bot=False, first_name="user"),
+            text="hi",
+        )
+        result = await chain(message, {CONTAINER_KEY: CountingContainer(shared)})
+        assert result == "handled", f"Update {index} was dropped by the chain"
+
+    elapsed = time.perf_counter() - started_at
+    await redis.aclose()
+    return Counter(counts), elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=1000)
+    args = parser.parse_args()
+
+    baseline, baseline_elapsed = await measure(build_baseline_chain(), args.updates)
+    current, current_elapsed = await measure(build_current_chain(), args.updates)
+
+    print(
+        f"{args.updates} updates, baseline {baseline_elapsed:.2f}s, "
+        f"update context {current_elapsed:.2f}s, per update:"
+    )
+    print(f"  {'':<24}{'before':>8}{'after':>8}")
+
+    for name in sorted(baseline | current):
+        print(
+            f"  {name:<24}{baseline[name] / args.updates:>8.2f}{current[name] / args.updates:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -22,6 +22,11 @@ def create_app(config: AppConfig, dispatcher: Dispatcher) -> FastAPI:
     telegram_webhook_endpoint = TelegramWebhookEndpoint(
         dispatcher=dispatcher,
         secret_token=config.bot.secret_token.get_secret_value(),
+        workers=config.bot.dispatch_workers,
+        queue_size=config.bot.dispatch_queue_size,
+        ingestion_mode=config.bot.ingestion_mode,
+        stream_shards=config.bot.stream_shards,
+        stream_max_length=config.bot.stream_max_length,
     )
     telegram_webhook_endpoint.register(app=app, path=config.bot.webhook_path)
     app.state.telegram_webhook_endpoint = telegram_webhook_endpoint
@@ -1,37 +1,185 @@
 import asyncio
 import secrets
-from typing import Annotated, Any
+import time
+from collections import deque
+from typing import Annotated
 
 from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
 from aiogram.methods import TelegramMethod
 from aiogram.types import Update
 from dishka.integrations.fastapi import FromDishka, inject
 from fastapi import Body, FastAPI, Header, HTTPException, Response, status
-from starlette.background import BackgroundTask
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 from starlette.responses import JSONResponse
 
+from src.core.constants import LOCAL_CACHE_MAXSIZE, TIME_10S, UPDATE_DEDUP_TTL
+from src.core.enums import UpdateIngestionMode
+from src.core.stats import stats_reporter
+from src.core.storage.keys import UpdateStreamKey, WebhookUpdateKey
+
+
+class DispatchStats:
+    enqueued: int
+    rejected: int
+    duplicates: int
+    processed: int
+    failed: int
+    wait_time_total: float
+    wait_time_max: float
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.enqueued = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self.processed = 0
+        self.failed = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record_wait(self, wait_time: float) -> None:
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def as_dict(self) -> dict[str, float]:
+        handled = self.processed + self.failed
+        return {
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "duplicates": self.duplicates,
+            "processed": self.processed,
+            "failed": self.failed,
+            "wait_time_avg": self.wait_time_total / handled if handled else 0.0,
+            "wait_time_max": self.wait_time_max,
+        }
+
+
+class UpdateIdWindow:
+    """Ring buffer of the most recently accepted update ids."""
+
+    size: int
+    _order: deque[int]
+    _ids: set[int]
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._order = deque()
+        self._ids = set()
+
+    def __contains__(self, update_id: int) -> bool:
+        return update_id in self._ids
+
+    def add(self, update_id: int) -> None:
+        if update_id in self._ids:
+            return
+
+        if len(self._order) >= self.size:
+            self._ids.discard(self._order.popleft())
+
+        self._order.append(update_id)
+        self._ids.add(update_id)
+
 
 class TelegramWebhookEndpoint:
+    """
+    Receives webhook updates and hands them to a fixed pool of workers.
+
+    Updates are sharded by chat (or user) id, so each chat is processed strictly in
+    order while the number of workers caps global concurrency. When a shard queue
+    is full the request is answered with 503 and Telegram redelivers it later.
+
+    Redelivered updates are dropped before dispatch: the id is checked against a local
+    window first and then claimed in Redis, so other workers skip it as well.
+
+    In STREAM ingestion mode updates are not handled here at all: they are appended to
+    one of the sharded Redis streams and consumed by src.bot.stream_worker.
+    """
+
     dispatcher: Dispatcher
     secret_token: str
-    _feed_update_tasks: set[asyncio.Task[Any]]
+    workers: int
+    queue_size: int
+    ingestion_mode: UpdateIngestionMode
+    stream_shards: int
+    stream_max_length: int
+    stats: DispatchStats
+    _seen_updates: UpdateIdWindow
+    _queues: list[asyncio.Queue[tuple[Bot, Update, float]]]
+    _worker_tasks: list[asyncio.Task[None]]
+    _accepting: bool
 
-    def __init__(self, dispatcher: Dispatcher, secret_token: str) -> None:
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        secret_token: str,
+        workers: int,
+        queue_size: int,
+        ingestion_mode: UpdateIngestionMode = UpdateIngestionMode.INPROCESS,
+        stream_shards: int = 1,
+        stream_max_length: int = 0,
+    ) -> None:
         self.dispatcher = dispatcher
         self.secret_token = secret_token
-        self._feed_update_tasks = set()
+        self.workers = workers
+        self.queue_size = queue_size
+        self.ingestion_mode = ingestion_mode
+        self.stream_shards = stream_shards
+        self.stream_max_length = stream_max_length
+        self.stats = DispatchStats()
+        self._seen_updates = UpdateIdWindow(size=LOCAL_CACHE_MAXSIZE)
+        shard_size = max(1, queue_size // workers)
+        self._queues = [asyncio.Queue(maxsize=shard_size) for _ in range(workers)]
+        self._worker_tasks = []
+        self._accepting = False
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    def get_stats(self) -> dict[str, float]:
+        return {**self.stats.as_dict(), "queue_depth": self.queue_depth}
 
     async def startup(self) -> None:
         await self.dispatcher.emit_startup(**self.dispatcher.workflow_data)
+        stats_reporter.register("webhook_dispatch", self.get_stats)
+        self._accepting = True
+
+        if self.ingestion_mode == UpdateIngestionMode.STREAM:
+            logger.info(f"Updates are published to '{self.stream_shards}' Redis streams")
+            return
+
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(queue), name=f"telegram-dispatch-{index}")
+            for index, queue in enumerate(self._queues)
+        ]
+        logger.info(
+            f"Update dispatcher started with '{self.workers}' workers "
+            f"and queue size '{self.queue_size}'"
+        )
 
     async def shutdown(self) -> None:
+        self._accepting = False
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._queues)),
+                timeout=TIME_10S,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping '{self.queue_depth}' queued updates on shutdown")
+
         await self.dispatcher.emit_shutdown(**self.dispatcher.workflow_data)
 
-        for task in list(self._feed_update_tasks):
-            if not task.done():
-                task.cancel()
+        for task in self._worker_tasks:
+            task.cancel()
 
-        await asyncio.gather(*self._feed_update_tasks, return_exceptions=True)
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        logger.info("Update dispatcher stopped")
 
     def register(self, app: FastAPI, path: str) -> None:
         app.add_api_route(path=path, endpoint=self._handle_request, methods=["POST"])
@@ -39,27 +187,121 @@ class TelegramWebhookEndpoint:
     def _verify_secret(self, telegram_secret_token: str) -> bool:
         return secrets.compare_digest(telegram_secret_token, self.secret_token)
 
+    def _get_shard(self, update: Update, shards: int) -> int:
+        context = UserContextMiddleware.resolve_event_context(event=update)
+
+        if context.chat is not None:
+            key = context.chat.id
+        elif context.user is not None:
+            key = context.user.id
+        else:
+            key = update.update_id
+
+        return key % shards
+
+    async def _is_duplicate(self, redis_client: Redis, update_id: int) -> bool:
+        if update_id in self._seen_updates:
+            return True
+
+        try:
+            claimed = await redis_client.set(
+                WebhookUpdateKey(update_id=update_id).pack(),
+                1,
+                nx=True,
+                ex=UPDATE_DEDUP_TTL,
+            )
+        except RedisError as exception:
+            logger.warning(f"Update '{update_id}' deduplication skipped: {exception}")
+            return False
+
+        return not claimed
+
+    async def _release(self, redis_client: Redis, update_id: int) -> None:
+        try:
+            await redis_client.delete(WebhookUpdateKey(update_id=update_id).pack())
+        except RedisError as exception:
+            logger.warning(f"Failed to release update '{update_id}': {exception}")
+
+    def _enqueue(self, bot: Bot, update: Update) -> bool:
+        if not self._accepting:
+            return False
+
+        try:
+            self._queues[self._get_shard(update, self.workers)].put_nowait(
+                (bot, update, time.monotonic())
+            )
+        except asyncio.QueueFull:
+            self.stats.rejected += 1
+            logger.warning(f"Update '{update.update_id}' rejected: dispatch queue is full")
+            return False
+
+        self.stats.enqueued += 1
+        return True
+
+    async def _publish(self, redis_client: Redis, update: Update) -> bool:
+        if not self._accepting:
+            return False
+
+        try:
+            await redis_client.xadd(
+                UpdateStreamKey(shard=self._get_shard(update, self.stream_shards)).pack(),
+                {"update": update.model_dump_json(exclude_none=True)},
+                maxlen=self.stream_max_length,
+                approximate=True,
+            )
+        except RedisError as exception:
+            self.stats.rejected += 1
+            logger.warning(f"Update '{update.update_id}' rejected: {exception}")
+            return False
+
+        self.stats.enqueued += 1
+        return True
+
     async def _feed_update(self, bot: Bot, update: Update) -> None:
         result = await self.dispatcher.feed_update(bot=bot, update=update)
         if isinstance(result, TelegramMethod):
             await self.dispatcher.silent_call_request(bot=bot, result=result)
 
+    async def _worker(self, queue: asyncio.Queue[tuple[Bot, Update, float]]) -> None:
+        while True:
+            bot, update, enqueued_at = await queue.get()
+            self.stats.record_wait(time.monotonic() - enqueued_at)
+
+            try:
+                await self._feed_update(bot=bot, update=update)
+                self.stats.processed += 1
+            except Exception as exception:
+                self.stats.failed += 1
+                logger.exception(f"Failed to process update '{update.update_id}': {exception}")
+            finally:
+                queue.task_done()
+
     @inject
     async def _handle_request(
         self,
         update: Annotated[Update, Body()],
         x_telegram_bot_api_secret_token: Annotated[str, Header()],
         bot: FromDishka[Bot],
+        redis_client: FromDishka[Redis],
     ) -> Response:
         if not self._verify_secret(x_telegram_bot_api_secret_token):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
 
-        async def run_feed_update_and_track() -> None:
-            task = asyncio.create_task(self._feed_update(bot=bot, update=update))
-            self._feed_update_tasks.add(task)
-            task.add_done_callback(self._feed_update_tasks.discard)
-            await task
+        if await self._is_duplicate(redis_client, update.update_id):
+            self.stats.duplicates += 1
+            logger.debug(f"Update '{update.update_id}' dropped as duplicate")
+            return JSONResponse({}, status_code=status.HTTP_200_OK)
+
+        if self.ingestion_mode == UpdateIngestionMode.STREAM:
+            accepted = await self._publish(redis_client, update)
+        else:
+            accepted = self._enqueue(bot=bot, update=update)
+
+        if not accepted:
+            # Let the redelivery through once there is room again
+            await self._release(redis_client, update.update_id)
+            return JSONResponse({}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
 
-        background_task = BackgroundTask(run_feed_update_and_track)
+        self._seen_updates.add(update.update_id)
 
-        return JSONResponse({}, background=background_task, status_code=status.HTTP_200_OK)
+        return JSONResponse({}, status_code=status.HTTP_200_OK)
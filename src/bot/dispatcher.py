@@ -1,9 +1,12 @@
+from typing import cast
+
 from aiogram import Dispatcher
 from aiogram.fsm.storage.base import DefaultKeyBuilder
 from aiogram.fsm.storage.redis import RedisStorage
 from aiogram_dialog import BgManagerFactory, setup_dialogs
 
 from src.bot.filters import setup_global_filters
+from src.bot.media import CachedMediaMessageManager, RedisMediaIdStorage
 from src.bot.middlewares import setup_middlewares
 from src.bot.routers import setup_error_handlers, setup_routers
 from src.core.config import AppConfig
@@ -28,7 +31,14 @@ def create_dispatcher(config: AppConfig) -> Dispatcher:
 
 
 def create_bg_manager_factory(dispatcher: Dispatcher) -> BgManagerFactory:
-    return setup_dialogs(router=dispatcher)
+    storage = cast(RedisStorage, dispatcher.storage)
+    media_id_storage = RedisMediaIdStorage(redis_client=storage.redis)
+
+    return setup_dialogs(
+        router=dispatcher,
+        media_id_storage=media_id_storage,
+        message_manager=CachedMediaMessageManager(media_id_storage=media_id_storage),
+    )
 
 
 def setup_dispatcher(dispatcher: Dispatcher) -> None:
@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Final, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import ContentType, Message
+from aiogram_dialog.api.entities import MediaAttachment, MediaId, NewMessage, OldMessage
+from aiogram_dialog.api.protocols import MediaIdStorageProtocol
+from aiogram_dialog.manager.message_manager import MessageManager
+from cachetools import TTLCache
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.core.constants import LOCAL_CACHE_MAXSIZE, MEDIA_FILE_ID_TTL, TIME_1M
+from src.core.storage.keys import MediaFileIdKey
+from src.core.utils import json_utils
+
+# Telegram answers with one of these when a cached file_id can no longer be used
+REJECTED_FILE_ID_ERRORS: Final[tuple[str, ...]] = (
+    "file identifier",
+    "file_id",
+    "type of file mismatch",
+)
+
+
+class RedisMediaIdStorage(MediaIdStorageProtocol):
+    """
+    Remembers the file_id Telegram assigned to an uploaded file, shared by all workers.
+
+    Files are identified by a hash of their content, so an id is reused for the same
+    banner in every locale that falls back to it and is forgotten as soon as the file
+    changes. The hash is recomputed only when the file mtime or size changes.
+    """
+
+    redis_client: Redis
+    _digests: dict[tuple[str, int, int], str]
+    _local: TTLCache[str, MediaId]
+
+    def __init__(self, redis_client: Redis, local_ttl: float = TIME_1M) -> None:
+        self.redis_client = redis_client
+        self._digests = {}
+        self._local = TTLCache(maxsize=LOCAL_CACHE_MAXSIZE, ttl=local_ttl)
+
+    async def get_media_id(
+        self,
+        path: Optional[str],
+        url: Optional[str],
+        type: ContentType,
+    ) -> Optional[MediaId]:
+        key = await self._get_key(path, url, type)
+
+        if key is None:
+            return None
+
+        media_id = self._local.get(key)
+
+        if media_id is not None:
+            return media_id
+
+        try:
+            raw = await self.redis_client.get(key)
+        except RedisError as exception:
+            logger.warning(f"Failed to get cached file_id for '{path or url}': {exception}")
+            return None
+
+        if raw is None:
+            return None
+
+        data = json_utils.decode(raw)
+        media_id = MediaId(file_id=data["file_id"], file_unique_id=data["file_unique_id"])
+        self._local[key] = media_id
+        return media_id
+
+    async def save_media_id(
+        self,
+        path: Optional[str],
+        url: Optional[str],
+        type: ContentType,
+        media_id: MediaId,
+    ) -> None:
+        key = await self._get_key(path, url, type)
+
+        if key is None or self._local.get(key) == media_id:
+            return
+
+        self._local[key] = media_id
+
+        try:
+            await self.redis_client.set(
+                key,
+                json_utils.encode(
+                    {"file_id": media_id.file_id, "file_unique_id": media_id.file_unique_id}
+                ),
+                ex=MEDIA_FILE_ID_TTL,
+            )
+        except RedisError as exception:
+            logger.warning(f"Failed to cache file_id for '{path or url}': {exception}")
+            return
+
+        logger.debug(f"Cached file_id for '{path or url}'")
+
+    async def forget_media_id(
+        self,
+        path: Optional[str],
+        url: Optional[str],
+        type: ContentType,
+    ) -> None:
+        key = await self._get_key(path, url, type)
+
+        if key is None:
+            return
+
+        self._local.pop(key, None)
+
+        try:
+            await self.redis_client.delete(key)
+        except RedisError as exception:
+            logger.warning(f"Failed to drop cached file_id for '{path or url}': {exception}")
+
+    async def _get_key(
+        self,
+        path: Optional[str],
+        url: Optional[str],
+        type: ContentType,
+    ) -> Optional[str]:
+        if path:
+            digest = await self._get_file_digest(str(path))
+        elif url:
+            digest = hashlib.sha256(url.encode()).hexdigest()
+        else:
+            return None
+
+        if digest is None:
+            return None
+
+        return MediaFileIdKey(content_type=type, digest=digest).pack()
+
+    async def _get_file_digest(self, path: str) -> Optional[str]:
+        try:
+            stat = Path(path).stat()
+        except OSError:
+            return None
+
+        version = (path, stat.st_mtime_ns, stat.st_size)
+        digest = self._digests.get(version)
+
+        if digest is None:
+            digest = await asyncio.to_thread(self._hash_file, path)
+            self._digests = {
+                cached: value for cached, value in self._digests.items() if cached[0] != path
+            }
+            self._digests[version] = digest
+
+        return digest
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        with Path(path).open("rb") as file:
+            return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+class CachedMediaMessageManager(MessageManager):
+    """Uploads the file again when Telegram rejects a cached file_id."""
+
+    media_id_storage: RedisMediaIdStorage
+
+    def __init__(self, media_id_storage: RedisMediaIdStorage) -> None:
+        self.media_id_storage = media_id_storage
+
+    async def send_media(self, bot: Bot, new_message: NewMessage) -> Message:
+        try:
+            return await super().send_media(bot, new_message)
+        except TelegramBadRequest as exception:
+            if not await self._drop_rejected_file_id(new_message.media, exception):
+                raise
+
+        return await super().send_media(bot, new_message)
+
+    async def edit_media(
+        self,
+        bot: Bot,
+        new_message: NewMessage,
+        old_message: OldMessage,
+    ) -> Message:
+        try:
+            return await super().edit_media(bot, new_message, old_message)
+        except TelegramBadRequest as exception:
+            if not await self._drop_rejected_file_id(new_message.media, exception):
+                raise
+
+        return await super().edit_media(bot, new_message, old_message)
+
+    async def _drop_rejected_file_id(
+        self,
+        media: Optional[MediaAttachment],
+        exception: TelegramBadRequest,
+    ) -> bool:
+        if media is None or media.file_id is None or not (media.path or media.url):
+            return False
+
+        if not any(error in exception.message for error in REJECTED_FILE_ID_ERRORS):
+            return False
+
+        logger.warning(f"Cached file_id for '{media.path or media.url}' rejected, uploading again")
+        await self.media_id_storage.forget_media_id(
+            path=str(media.path) if media.path else None,
+            url=media.url,
+            type=media.type,
+        )
+        media.file_id = None
+        return True
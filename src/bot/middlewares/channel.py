@@ -9,22 +9,17 @@ from dishka import AsyncContainer
 from loguru import logger
 
 from src.bot.keyboards import CALLBACK_CHANNEL_CONFIRM, get_channel_keyboard, get_user_keyboard
-from src.core.constants import CONTAINER_KEY, USER_KEY
+from src.core.constants import CONTAINER_KEY, UPDATE_CONTEXT_KEY, USER_KEY
 from src.core.enums import MiddlewareEventType
 from src.core.utils.message_payload import MessagePayload
 from src.infrastructure.database.models.dto import UserDto
 from src.infrastructure.taskiq.tasks.notifications import send_error_notification_task
+from src.services.access import CHANNEL_MEMBER_STATUSES, AccessService
 from src.services.notification import NotificationService
-from src.services.settings import SettingsService
+from src.services.update_context import UpdateContext
 
 from .base import EventTypedMiddleware
 
-ALLOWED_STATUSES = (
-    ChatMemberStatus.CREATOR,
-    ChatMemberStatus.ADMINISTRATOR,
-    ChatMemberStatus.MEMBER,
-)
-
 
 class ChannelMiddleware(EventTypedMiddleware):
     __event_types__ = [MiddlewareEventType.MESSAGE, MiddlewareEventType.CALLBACK_QUERY]
@@ -36,20 +31,27 @@ class ChannelMiddleware(EventTypedMiddleware):
         data: dict[str, Any],
     ) -> Any:
         container: AsyncContainer = data[CONTAINER_KEY]
+        context: UpdateContext = data[UPDATE_CONTEXT_KEY]
         user: UserDto = data[USER_KEY]
-        settings_service: SettingsService = await container.get(SettingsService)
 
-        if not await settings_service.is_channel_required():
+        if not await context.is_channel_required():
             return await handler(event, data)
 
         if user.is_privileged:
             logger.debug(f"User '{user.telegram_id}' skipped channel check (privileged)")
             return await handler(event, data)
 
-        bot: Bot = await container.get(Bot)
-        notification_service: NotificationService = await container.get(NotificationService)
+        access_service: AccessService = await container.get(AccessService)
 
-        settings = await settings_service.get()
+        # The confirm button always asks Telegram, so a fresh join is picked up immediately
+        if not self._is_click_confirm(event) and await access_service.is_channel_member(
+            user.telegram_id
+        ):
+            logger.debug(f"User '{user.telegram_id}' passed channel check (cached)")
+            return await handler(event, data)
+
+        bot: Bot = await container.get(Bot)
+        settings = await context.get_settings()
 
         chat_id: Union[str, int, None] = None
         channel_link = settings.channel_link.get_secret_value()
@@ -92,7 +94,9 @@ class ChannelMiddleware(EventTypedMiddleware):
             )
             return await handler(event, data)
 
-        if member.status in ALLOWED_STATUSES:
+        if member.status in CHANNEL_MEMBER_STATUSES:
+            await access_service.set_channel_member(user.telegram_id)
+
             if self._is_click_confirm(event):
                 await self._delete_channel_message(event)
 
@@ -100,6 +104,9 @@ class ChannelMiddleware(EventTypedMiddleware):
             # TODO: Auto confirming
             return await handler(event, data)
 
+        await access_service.remove_channel_member(user.telegram_id)
+        notification_service: NotificationService = await container.get(NotificationService)
+
         if self._is_click_confirm(event):
             await self._delete_channel_message(event)
             await notification_service.notify_user(
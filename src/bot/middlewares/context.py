@@ -0,0 +1,31 @@
+from typing import Any, Awaitable, Callable
+
+from aiogram.types import TelegramObject
+from dishka import AsyncContainer
+
+from src.core.constants import CONTAINER_KEY, UPDATE_CONTEXT_KEY
+from src.core.enums import MiddlewareEventType
+from src.services.update_context import UpdateContext
+
+from .base import EventTypedMiddleware
+
+
+class ContextMiddleware(EventTypedMiddleware):
+    __event_types__ = [
+        MiddlewareEventType.MESSAGE,
+        MiddlewareEventType.CALLBACK_QUERY,
+        MiddlewareEventType.ERROR,
+        MiddlewareEventType.AIOGD_UPDATE,
+        MiddlewareEventType.MY_CHAT_MEMBER,
+        MiddlewareEventType.PRE_CHECKOUT_QUERY,
+    ]
+
+    async def middleware_logic(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        container: AsyncContainer = data[CONTAINER_KEY]
+        data[UPDATE_CONTEXT_KEY] = await container.get(UpdateContext)
+        return await handler(event, data)
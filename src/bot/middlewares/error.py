@@ -14,7 +14,7 @@ from src.core.utils.message_payload import MessagePayload
 from src.infrastructure.database.models.dto import UserDto
 from src.infrastructure.taskiq.tasks.notifications import send_error_notification_task
 from src.infrastructure.taskiq.tasks.redirects import redirect_to_main_menu_task
-from src.services.user import UserService
+from src.services.update_context import UpdateContext
 
 from .base import EventTypedMiddleware
 
@@ -51,8 +51,8 @@ class ErrorMiddleware(EventTypedMiddleware):
         if aiogram_user:
             reply_markup = get_user_keyboard(aiogram_user.id)
             container: AsyncContainer = data[CONTAINER_KEY]
-            user_service: UserService = await container.get(UserService)
-            user: Optional[UserDto] = await user_service.get(telegram_id=aiogram_user.id)
+            context: UpdateContext = await container.get(UpdateContext)
+            user: Optional[UserDto] = await context.get_user(aiogram_user.id)
 
             if user and not user.is_dev and not isinstance(error, MenuRenderingError):
                 await redirect_to_main_menu_task.kiq(aiogram_user.id)
@@ -1,24 +1,41 @@
-from typing import Any, Awaitable, Callable
+from typing import Any, Awaitable, Callable, Final, Optional
 
-from aiogram.types import TelegramObject
-from cachetools import TTLCache
+from aiogram.types import CallbackQuery, TelegramObject
 from dishka import AsyncContainer
 from loguru import logger
+from redis.asyncio import Redis
 
-from src.core.constants import CONTAINER_KEY, USER_KEY
-from src.core.enums import MiddlewareEventType
+from src.core.constants import CONTAINER_KEY, THROTTLING_NOTICE_INTERVAL, USER_KEY
+from src.core.enums import MiddlewareEventType, UserRole
+from src.core.storage.keys import ThrottlingKey, ThrottlingNoticeKey
 from src.core.utils.message_payload import MessagePayload
 from src.infrastructure.database.models.dto import UserDto
+from src.infrastructure.redis.rate_limit import TokenBucket, TokenBucketLimit
 from src.services.notification import NotificationService
 
 from .base import EventTypedMiddleware
 
+THROTTLING_LIMITS: Final[dict[MiddlewareEventType, dict[UserRole, TokenBucketLimit]]] = {
+    MiddlewareEventType.MESSAGE: {
+        UserRole.USER: TokenBucketLimit(rate=1, capacity=5),
+        UserRole.ADMIN: TokenBucketLimit(rate=5, capacity=20),
+        UserRole.DEV: TokenBucketLimit(rate=5, capacity=20),
+    },
+    MiddlewareEventType.CALLBACK_QUERY: {
+        UserRole.USER: TokenBucketLimit(rate=2, capacity=8),
+        UserRole.ADMIN: TokenBucketLimit(rate=10, capacity=30),
+        UserRole.DEV: TokenBucketLimit(rate=10, capacity=30),
+    },
+}
+
 
 class ThrottlingMiddleware(EventTypedMiddleware):
     __event_types__ = [MiddlewareEventType.MESSAGE, MiddlewareEventType.CALLBACK_QUERY]
 
-    def __init__(self, ttl: float = 0.5) -> None:
-        self.cache: TTLCache[int, Any] = TTLCache(maxsize=10_000, ttl=ttl)
+    bucket: Optional[TokenBucket]
+
+    def __init__(self) -> None:
+        self.bucket = None
 
     async def middleware_logic(
         self,
@@ -29,15 +46,29 @@ class ThrottlingMiddleware(EventTypedMiddleware):
         container: AsyncContainer = data[CONTAINER_KEY]
         user: UserDto = data[USER_KEY]
 
-        notification_service: NotificationService = await container.get(NotificationService)
+        if self.bucket is None:
+            self.bucket = TokenBucket(await container.get(Redis))
+
+        if isinstance(event, CallbackQuery):
+            event_type = MiddlewareEventType.CALLBACK_QUERY
+        else:
+            event_type = MiddlewareEventType.MESSAGE
+
+        allowed, notify = await self.bucket.acquire(
+            key=ThrottlingKey(telegram_id=user.telegram_id, event_type=event_type).pack(),
+            limit=THROTTLING_LIMITS[event_type][user.role],
+            notice_key=ThrottlingNoticeKey(telegram_id=user.telegram_id).pack(),
+            notice_ttl=THROTTLING_NOTICE_INTERVAL,
+        )
 
-        if user.telegram_id in self.cache:
+        if allowed:
+            return await handler(event, data)
+
+        logger.warning(f"User '{user.telegram_id}' throttled ({event_type})")
+
+        if notify:
+            notification_service: NotificationService = await container.get(NotificationService)
             await notification_service.notify_user(
                 user=user,
                 payload=MessagePayload(i18n_key="ntf-throttling-many-requests"),
             )
-            logger.warning(f"User '{user.telegram_id}' throttled")
-            return
-
-        self.cache[user.telegram_id] = None
-        return await handler(event, data)
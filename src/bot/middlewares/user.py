@@ -7,14 +7,13 @@ from dishka import AsyncContainer
 from loguru import logger
 
 from src.bot.keyboards import get_user_keyboard
-from src.core.config import AppConfig
-from src.core.constants import CONTAINER_KEY, IS_SUPER_DEV_KEY, USER_KEY
+from src.core.constants import CONTAINER_KEY, IS_SUPER_DEV_KEY, UPDATE_CONTEXT_KEY, USER_KEY
 from src.core.enums import MiddlewareEventType, SystemNotificationType
 from src.core.utils.message_payload import MessagePayload
 from src.infrastructure.database.models.dto import UserDto
 from src.services.notification import NotificationService
 from src.services.referral import ReferralService
-from src.services.user import UserService
+from src.services.update_context import UpdateContext
 
 from .base import EventTypedMiddleware
 
@@ -42,14 +41,16 @@ class UserMiddleware(EventTypedMiddleware):
             return
 
         container: AsyncContainer = data[CONTAINER_KEY]
-        notification_service: NotificationService = await container.get(NotificationService)
-        config: AppConfig = await container.get(AppConfig)
-        user_service: UserService = await container.get(UserService)
-        referral_service: ReferralService = await container.get(ReferralService)
-        user: Optional[UserDto] = await user_service.get(telegram_id=aiogram_user.id)
+        context: UpdateContext = data[UPDATE_CONTEXT_KEY]
+        user_service = context.user_service
+        user: Optional[UserDto] = await context.get_user(aiogram_user.id)
 
         if user is None:
+            notification_service: NotificationService = await container.get(NotificationService)
+            referral_service: ReferralService = await container.get(ReferralService)
+
             user = await user_service.create(aiogram_user)
+            context.set_user(user)
             referrer = await referral_service.get_referrer_by_event(event, user.telegram_id)
 
             base_i18n_kwargs = {
@@ -87,6 +88,6 @@ class UserMiddleware(EventTypedMiddleware):
 
         await user_service.update_recent_activity(telegram_id=user.telegram_id)
         data[USER_KEY] = user
-        data[IS_SUPER_DEV_KEY] = user.telegram_id == config.bot.dev_id
+        data[IS_SUPER_DEV_KEY] = context.is_super_dev(user)
 
         return await handler(event, data)
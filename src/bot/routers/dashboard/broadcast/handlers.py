@@ -288,13 +288,13 @@ async def on_send(
         raise ValueError("BroadcastAudience not found in dialog data")
 
     if is_double_click(dialog_manager, key="broadcast_confirm", cooldown=10):
-        users = await broadcast_service.get_audience_users(audience, plan_id=plan_id)
+        total_count = await broadcast_service.get_audience_count(audience, plan_id=plan_id)
 
         task_id = uuid.uuid4()
         broadcast = BroadcastDto(
             task_id=task_id,
             status=BroadcastStatus.PROCESSING,
-            total_count=len(users),
+            total_count=total_count,
             audience=audience,
             payload=payload,
         )
@@ -303,7 +303,7 @@ async def on_send(
         task = (
             await send_broadcast_task.kicker()
             .with_task_id(str(task_id))
-            .kiq(broadcast, users, payload)
+            .kiq(broadcast, audience, plan_id, payload)
         )
 
         dialog_manager.dialog_data["task_id"] = task.task_id
@@ -332,15 +332,18 @@ async def on_cancel(
     if not broadcast:
         raise ValueError(f"Broadcast '{task_id}' not found")
 
-    if broadcast.status != BroadcastStatus.PROCESSING:
+    # Stored first, so the broadcast ends up CANCELED even if the task is not running
+    if broadcast.status != BroadcastStatus.PROCESSING or not await broadcast_service.finish(
+        broadcast.task_id,
+        BroadcastStatus.CANCELED,
+    ):
         await notification_service.notify_user(
             user=user,
             payload=MessagePayload(i18n_key="ntf-broadcast-not-cancelable"),
         )
         return
 
-    broadcast.status = BroadcastStatus.CANCELED
-    await broadcast_service.update(broadcast)
+    await broadcast_service.request_cancel(broadcast.task_id)
 
     await notification_service.notify_user(
         user=user,
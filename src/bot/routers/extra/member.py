@@ -1,4 +1,5 @@
-from aiogram import Router
+from aiogram import F, Router
+from aiogram.enums import ChatType
 from aiogram.filters import JOIN_TRANSITION, LEAVE_TRANSITION, ChatMemberUpdatedFilter
 from aiogram.types import ChatMemberUpdated
 from dishka import FromDishka
@@ -6,12 +7,47 @@ from loguru import logger
 
 from src.core.utils.formatters import format_user_log as log
 from src.infrastructure.database.models.dto import UserDto
+from src.services.access import CHANNEL_MEMBER_STATUSES, AccessService
+from src.services.settings import SettingsService
 from src.services.user import UserService
 
 # For only ChatType.PRIVATE (app/bot/filters/private.py)
 router = Router(name=__name__)
 
 
+@router.chat_member()
+async def on_channel_member_updated(
+    member: ChatMemberUpdated,
+    settings_service: FromDishka[SettingsService],
+    access_service: FromDishka[AccessService],
+) -> None:
+    settings = await settings_service.get()
+
+    if not access_service.is_required_channel(member.chat, settings):
+        return
+
+    telegram_id = member.new_chat_member.user.id
+
+    if member.new_chat_member.status in CHANNEL_MEMBER_STATUSES:
+        await access_service.set_channel_member(telegram_id)
+    else:
+        await access_service.remove_channel_member(telegram_id)
+
+
+@router.my_chat_member(F.chat.type != ChatType.PRIVATE)
+async def on_channel_bot_status_changed(
+    member: ChatMemberUpdated,
+    settings_service: FromDishka[SettingsService],
+    access_service: FromDishka[AccessService],
+) -> None:
+    settings = await settings_service.get()
+
+    # Without admin rights the bot stops receiving chat_member updates for the channel
+    if access_service.is_required_channel(member.chat, settings):
+        logger.info(f"Bot status in channel changed to '{member.new_chat_member.status}'")
+        await access_service.clear_channel_members()
+
+
 @router.my_chat_member(ChatMemberUpdatedFilter(JOIN_TRANSITION))
 async def on_unblocked(
     member: ChatMemberUpdated,
@@ -19,6 +19,7 @@ from src.services.referral import ReferralService
 from src.services.remnawave import RemnawaveService
 from src.services.settings import SettingsService
 from src.services.subscription import SubscriptionService
+from src.services.update_context import UpdateContext
 
 
 @inject
@@ -29,8 +30,8 @@ async def menu_getter(
     i18n: FromDishka[TranslatorRunner],
     plan_service: FromDishka[PlanService],
     subscription_service: FromDishka[SubscriptionService],
-    settings_service: FromDishka[SettingsService],
     referral_service: FromDishka[ReferralService],
+    update_context: FromDishka[UpdateContext],
     **kwargs: Any,
 ) -> dict[str, Any]:
     try:
@@ -48,7 +49,7 @@ async def menu_getter(
             "invite": i18n.get("referral-invite-message", url=ref_link),
             "has_subscription": user.has_subscription,
             "is_app": config.bot.is_mini_app,
-            "is_referral_enable": await settings_service.is_referral_enable(),
+            "is_referral_enable": await update_context.is_referral_enable(),
         }
 
         subscription = user.current_subscription
@@ -21,7 +21,7 @@ from src.services.notification import NotificationService
 from src.services.plan import PlanService
 from src.services.referral import ReferralService
 from src.services.remnawave import RemnawaveService
-from src.services.settings import SettingsService
+from src.services.update_context import UpdateContext
 
 router = Router(name=__name__)
 
@@ -175,9 +175,9 @@ async def on_invite(
     callback: CallbackQuery,
     widget: Button,
     dialog_manager: DialogManager,
-    settings_service: FromDishka[SettingsService],
+    update_context: FromDishka[UpdateContext],
 ) -> None:
-    if await settings_service.is_referral_enable():
+    if await update_context.is_referral_enable():
         await dialog_manager.switch_to(state=MainMenu.INVITE)
     else:
         return
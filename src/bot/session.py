@@ -0,0 +1,149 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Final, Iterator, Optional, Sequence, Union
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+from aiogram.methods import Response, SendChatAction, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiohttp import TCPConnector
+from loguru import logger
+from redis.asyncio import Redis
+
+from src.core.enums import OutboundPriority
+from src.core.storage.keys import OutboundChatRateKey, OutboundGlobalRateKey
+from src.infrastructure.redis.rate_limit import TokenBucket, TokenBucketLimit
+
+# Telegram limits: ~30 messages/s overall, ~1 message/s per chat, 20 messages/min per group
+GLOBAL_LIMIT: Final[TokenBucketLimit] = TokenBucketLimit(rate=30, capacity=30)
+PRIVATE_CHAT_LIMIT: Final[TokenBucketLimit] = TokenBucketLimit(rate=1, capacity=3)
+GROUP_CHAT_LIMIT: Final[TokenBucketLimit] = TokenBucketLimit(rate=20 / 60, capacity=3)
+
+# Global tokens bulk sends must leave untouched for interactive replies
+BULK_RESERVE: Final[float] = 10
+
+RATE_LIMITED_METHOD_PREFIXES: Final[tuple[str, ...]] = ("send", "copy", "forward")
+
+outbound_priority: ContextVar[OutboundPriority] = ContextVar(
+    "outbound_priority",
+    default=OutboundPriority.INTERACTIVE,
+)
+
+
+@contextmanager
+def bulk_sending() -> Iterator[None]:
+    token = outbound_priority.set(OutboundPriority.BULK)
+    try:
+        yield
+    finally:
+        outbound_priority.reset(token)
+
+
+class BotSession(AiohttpSession):
+    """
+    aiohttp session with a configurable connection pool, optionally pointed at a local
+    Bot API server. One instance is shared by everything the process sends.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        limit_per_host: int,
+        keepalive_timeout: float,
+        dns_cache_ttl: int,
+        timeout: float,
+        api_server: Optional[str] = None,
+        api_local_mode: bool = False,
+    ) -> None:
+        api = (
+            TelegramAPIServer.from_base(api_server, is_local=api_local_mode)
+            if api_server
+            else PRODUCTION
+        )
+        super().__init__(api=api, limit=limit, timeout=timeout)
+        self._connector_init.update(
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            ttl_dns_cache=dns_cache_ttl,
+        )
+
+    def get_pool_stats(self) -> dict[str, Any]:
+        connector = self._session.connector if self._session is not None else None
+
+        limit: int = self._connector_init["limit"]
+        in_use = idle = waiting = 0
+
+        # aiohttp has no public accessors for pool occupancy
+        if isinstance(connector, TCPConnector) and not connector.closed:
+            in_use = len(connector._acquired)
+            idle = sum(len(connections) for connections in connector._conns.values())
+            waiting = sum(len(waiters) for waiters in connector._waiters.values())
+
+        return {
+            "limit": limit,
+            "limit_per_host": self._connector_init["limit_per_host"],
+            "in_use": in_use,
+            "idle": idle,
+            "waiting": waiting,
+            "utilization": in_use / limit if limit else 0.0,
+        }
+
+
+class OutboundRateLimitMiddleware(BaseRequestMiddleware):
+    """
+    Delays outgoing messages so that every process sharing the bot token stays within
+    Telegram limits. Budgets live in Redis; bulk sends keep a reserve of the global
+    budget free, so interactive replies go first.
+    """
+
+    bucket: TokenBucket
+
+    def __init__(self, redis_client: Redis) -> None:
+        self.bucket = TokenBucket(redis_client)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id: Union[int, str, None] = getattr(method, "chat_id", None)
+
+        if chat_id is not None and self._is_rate_limited(method):
+            await self._wait_for_slot(bot.id, chat_id)
+
+        return await make_request(bot, method)
+
+    def _is_rate_limited(self, method: TelegramMethod[Any]) -> bool:
+        if isinstance(method, SendChatAction):
+            return False
+
+        return method.__api_method__.startswith(RATE_LIMITED_METHOD_PREFIXES)
+
+    async def _wait_for_slot(self, bot_id: int, chat_id: Union[int, str]) -> None:
+        priority = outbound_priority.get()
+        is_group = not isinstance(chat_id, int) or chat_id < 0
+
+        buckets: Sequence[tuple[str, TokenBucketLimit, float]] = (
+            (
+                OutboundGlobalRateKey(bot_id=bot_id).pack(),
+                GLOBAL_LIMIT,
+                BULK_RESERVE if priority == OutboundPriority.BULK else 0,
+            ),
+            (
+                OutboundChatRateKey(bot_id=bot_id, chat_id=str(chat_id)).pack(),
+                GROUP_CHAT_LIMIT if is_group else PRIVATE_CHAT_LIMIT,
+                0,
+            ),
+        )
+
+        waited = 0.0
+        while wait := await self.bucket.acquire_all(buckets):
+            waited += wait
+            await asyncio.sleep(wait)
+
+        if waited:
+            logger.debug(f"Outbound message to '{chat_id}' delayed {waited:.2f}s ({priority})")
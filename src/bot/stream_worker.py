@@ -0,0 +1,232 @@
+import asyncio
+import multiprocessing
+import signal
+import time
+from contextlib import suppress
+from typing import Any, Final
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+from dishka.integrations.aiogram import setup_dishka as setup_aiogram_dishka
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, ResponseError
+
+from src.bot.dispatcher import create_bg_manager_factory, create_dispatcher, setup_dispatcher
+from src.core.config import AppConfig
+from src.core.constants import UPDATE_STREAM_BLOCK_MS, UPDATE_STREAM_GROUP
+from src.core.logger import setup_logger
+from src.core.stats import stats_reporter
+from src.core.storage.keys import UpdateStreamKey
+from src.infrastructure.di import create_container
+from src.services.user import profile_sync_buffer
+
+STREAM_READ_COUNT: Final[int] = 100
+STREAM_RETRY_DELAY: Final[int] = 1
+
+
+class UpdateStreamConsumer:
+    """
+    Handles the update streams owned by one worker process.
+
+    Shard N belongs to the process with index N % workers and is read by a single loop,
+    so updates from one chat are handled in order. Entries are acknowledged once handled;
+    on startup the process claims whatever a previous owner left unacknowledged.
+    """
+
+    dispatcher: Dispatcher
+    bot: Bot
+    redis_client: Redis
+    consumer: str
+    shards: list[int]
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        redis_client: Redis,
+        index: int,
+        workers: int,
+        shards: int,
+    ) -> None:
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.redis_client = redis_client
+        self.consumer = f"worker-{index}"
+        self.shards = [shard for shard in range(shards) if shard % workers == index]
+
+    async def run(self) -> None:
+        logger.info(f"Stream consumer '{self.consumer}' started for shards {self.shards}")
+        await asyncio.gather(*(self._consume(shard) for shard in self.shards))
+
+    async def _consume(self, shard: int) -> None:
+        stream = UpdateStreamKey(shard=shard).pack()
+        last_id = "0"  # Own pending entries first, then new ones
+        prepared = False
+
+        while True:
+            try:
+                # Once on start and after each failure, not on every read of the backlog
+                if not prepared:
+                    await self._prepare(stream)
+                    prepared = True
+
+                response = await self.redis_client.xreadgroup(
+                    groupname=UPDATE_STREAM_GROUP,
+                    consumername=self.consumer,
+                    streams={stream: last_id},
+                    count=STREAM_READ_COUNT,
+                    block=UPDATE_STREAM_BLOCK_MS if last_id == ">" else None,
+                )
+            except RedisError as exception:
+                logger.warning(f"Failed to read stream '{stream}': {exception}")
+                last_id, prepared = "0", False
+                await asyncio.sleep(STREAM_RETRY_DELAY)
+                continue
+
+            entries = response[0][1] if response else []
+
+            if not entries and last_id == "0":
+                last_id = ">"
+                continue
+
+            for entry_id, fields in entries:
+                await self._handle(stream, entry_id, fields)
+
+    async def _prepare(self, stream: str) -> None:
+        try:
+            await self.redis_client.xgroup_create(
+                name=stream,
+                groupname=UPDATE_STREAM_GROUP,
+                id="0",
+                mkstream=True,
+            )
+        except ResponseError as exception:
+            if "BUSYGROUP" not in str(exception):
+                raise
+
+        # Shards are owned exclusively, so everything pending here is ours to finish
+        start_id: Any = "0-0"
+        while True:
+            response = await self.redis_client.xautoclaim(
+                name=stream,
+                groupname=UPDATE_STREAM_GROUP,
+                consumername=self.consumer,
+                min_idle_time=0,
+                start_id=start_id,
+                count=STREAM_READ_COUNT,
+            )
+            start_id, claimed = (response[0], response[1]) if response else ("0-0", [])
+
+            if claimed:
+                logger.info(f"Claimed '{len(claimed)}' pending updates from '{stream}'")
+
+            if start_id in (b"0-0", "0-0"):
+                break
+
+    async def _handle(self, stream: str, entry_id: bytes, fields: dict[bytes, bytes]) -> None:
+        try:
+            if fields and b"update" in fields:
+                update = Update.model_validate_json(fields[b"update"], context={"bot": self.bot})
+                result = await self.dispatcher.feed_update(bot=self.bot, update=update)
+
+                if isinstance(result, TelegramMethod):
+                    await self.dispatcher.silent_call_request(bot=self.bot, result=result)
+        except Exception as exception:
+            logger.exception(f"Failed to process stream entry '{entry_id!r}': {exception}")
+        finally:
+            await self.redis_client.xack(stream, UPDATE_STREAM_GROUP, entry_id)
+
+
+async def run_worker(index: int, workers: int) -> None:
+    setup_logger()
+
+    config = AppConfig.get()
+    dispatcher = create_dispatcher(config=config)
+    bg_manager_factory = create_bg_manager_factory(dispatcher=dispatcher)
+    setup_dispatcher(dispatcher)
+    container = create_container(config=config, bg_manager_factory=bg_manager_factory)
+    setup_aiogram_dishka(container=container, router=dispatcher, auto_inject=True)
+
+    consumer = UpdateStreamConsumer(
+        dispatcher=dispatcher,
+        bot=await container.get(Bot),
+        redis_client=await container.get(Redis),
+        index=index,
+        workers=workers,
+        shards=config.bot.stream_shards,
+    )
+
+    await dispatcher.emit_startup(**dispatcher.workflow_data)
+    stats_reporter.start()
+
+    # The supervisor stops workers with SIGTERM: unwind through the shutdown below
+    consumer_task = asyncio.create_task(consumer.run())
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, consumer_task.cancel)
+
+    try:
+        with suppress(asyncio.CancelledError):
+            await consumer_task
+    finally:
+        await profile_sync_buffer.close()
+        await stats_reporter.stop()
+        await dispatcher.emit_shutdown(**dispatcher.workflow_data)
+        await container.close()
+
+
+def start_worker(index: int, workers: int) -> None:
+    # Ctrl-C reaches the whole process group; the supervisor forwards it as SIGTERM,
+    # so the worker shuts down through the same path instead of a KeyboardInterrupt
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(run_worker(index, workers))
+
+
+def main() -> None:
+    setup_logger()
+
+    config = AppConfig.get()
+    workers = max(1, min(config.bot.stream_workers, config.bot.stream_shards))
+    context = multiprocessing.get_context("spawn")
+    processes: dict[int, multiprocessing.process.BaseProcess] = {}
+    stopping = False
+
+    def stop(signum: int, frame: Any) -> None:
+        nonlocal stopping
+        stopping = True
+
+        for process in processes.values():
+            process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info(f"Starting '{workers}' stream workers for '{config.bot.stream_shards}' shards")
+
+    while not stopping:
+        for index in range(workers):
+            if stopping:
+                break
+
+            process = processes.get(index)
+
+            if process is not None and process.is_alive():
+                continue
+
+            if process is not None:
+                logger.warning(f"Stream worker '{index}' exited ({process.exitcode}), restarting")
+
+            processes[index] = context.Process(
+                target=start_worker,
+                args=(index, workers),
+                name=f"stream-worker-{index}",
+            )
+            processes[index].start()
+
+        time.sleep(STREAM_RETRY_DELAY)
+
+    for process in processes.values():
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
-from typing import Union
+from typing import Optional, Union
 
 from pydantic import SecretStr, field_validator
 from pydantic_core.core_schema import FieldValidationInfo
 
-from src.core.constants import API_V1, BOT_WEBHOOK_PATH, URL_PATTERN
+from src.core.constants import API_V1, BOT_WEBHOOK_PATH, TIME_10M, URL_PATTERN
+from src.core.enums import UpdateIngestionMode
 
 from .base import BaseConfig
 from .validators import validate_not_change_me, validate_username
@@ -20,6 +21,21 @@ class BotConfig(BaseConfig, env_prefix="BOT_"):
     drop_pending_updates: bool = False
     setup_commands: bool = True
     use_banners: bool = True
+    channel_member_ttl: int = TIME_10M
+    dispatch_workers: int = 32
+    dispatch_queue_size: int = 2048
+    ingestion_mode: UpdateIngestionMode = UpdateIngestionMode.INPROCESS
+    stream_shards: int = 16
+    stream_workers: int = 4
+    stream_max_length: int = 100_000
+
+    api_server: Optional[str] = None
+    api_local_mode: bool = False
+    session_limit: int = 256
+    session_limit_per_host: int = 0
+    session_keepalive: float = 30
+    session_dns_cache_ttl: int = 3600
+    session_timeout: float = 60
 
     @property
     def webhook_path(self) -> str:
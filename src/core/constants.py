@@ -33,14 +33,61 @@ MIDDLEWARE_DATA_KEY: Final[str] = "middleware_data"
 CONTAINER_KEY: Final[str] = "dishka_container"
 CONFIG_KEY: Final[str] = "config"
 USER_KEY: Final[str] = "user"
+UPDATE_CONTEXT_KEY: Final[str] = "update_context"
 IS_SUPER_DEV_KEY: Final[str] = "is_super_dev"
 
+TIME_5S: Final[int] = 5
+TIME_10S: Final[int] = 10
 TIME_1M: Final[int] = 60
 TIME_5M: Final[int] = TIME_1M * 5
 TIME_10M: Final[int] = TIME_1M * 10
+TIME_1D: Final[int] = TIME_1M * 60 * 24
+
+LOCAL_CACHE_MAXSIZE: Final[int] = 10_000
+STATS_REPORT_INTERVAL: Final[int] = TIME_5M
+
+USER_CACHE_TAG: Final[str] = "user:{telegram_id}"
+USERS_LIST_CACHE_TAG: Final[str] = "users:list"
+USERS_ROLE_CACHE_TAG: Final[str] = "users:role:{role}"
+USERS_BLOCKED_CACHE_TAG: Final[str] = "users:blocked"
 
 RECENT_REGISTERED_MAX_COUNT: Final[int] = 25
 RECENT_ACTIVITY_MAX_COUNT: Final[int] = 25
+RECENT_ACTIVITY_UPDATE_INTERVAL: Final[int] = TIME_5S
+PROFILE_SYNC_INTERVAL: Final[int] = TIME_5S
+PROFILE_FINGERPRINT_TTL: Final[int] = TIME_10M
+THROTTLING_NOTICE_INTERVAL: Final[int] = TIME_5S
+UPDATE_DEDUP_TTL: Final[int] = TIME_10M
+UPDATE_STREAM_GROUP: Final[str] = "dispatchers"
+UPDATE_STREAM_BLOCK_MS: Final[int] = TIME_5S * 1000
+
+NOTIFICATION_MAX_REQUEUES: Final[int] = 3
+NOTIFICATION_NETWORK_RETRIES: Final[int] = 3
+NOTIFICATION_BACKOFF_BASE: Final[float] = 0.5
+NOTIFICATION_BACKOFF_MAX: Final[float] = TIME_5S
+
+MESSAGE_DELETION_INTERVAL: Final[int] = 1
+MESSAGE_DELETION_BATCH: Final[int] = 1000
+DELETE_MESSAGES_LIMIT: Final[int] = 100
+
+ERROR_DIGEST_WINDOW: Final[int] = TIME_5M
+ERROR_DIGEST_BATCH: Final[int] = 100
+ERROR_FINGERPRINT_FRAMES: Final[int] = 3
+
+MEDIA_FILE_ID_TTL: Final[int] = TIME_1D * 30
+
+BROADCAST_WORKERS: Final[int] = 32
+BROADCAST_MAX_RATE: Final[float] = 28
+BROADCAST_MIN_RATE: Final[float] = 1
+BROADCAST_RATE_STEP: Final[float] = 0.5
+BROADCAST_RATE_BACKOFF: Final[float] = 0.7
+BROADCAST_MAX_ATTEMPTS: Final[int] = 3
+BROADCAST_MAX_FLOOD_WAITS: Final[int] = 5
+BROADCAST_FLUSH_SIZE: Final[int] = 500
+BROADCAST_FLUSH_INTERVAL: Final[int] = TIME_5S
+BROADCAST_CANCEL_CHECK_INTERVAL: Final[float] = 0.3
+BROADCAST_CANCEL_DB_CHECK_INTERVAL: Final[int] = TIME_10S
+BROADCAST_AUDIENCE_CHUNK: Final[int] = 1000
 
 BATCH_SIZE: Final[int] = 20
 BATCH_DELAY: Final[int] = 1
@@ -270,6 +270,16 @@ class AccessMode(UpperStrEnum):
     RESTRICTED = auto()  # All actions are completely forbidden
 
 
+class UpdateIngestionMode(UpperStrEnum):
+    INPROCESS = auto()  # Webhook process dispatches updates itself
+    STREAM = auto()  # Webhook process only publishes updates to Redis Streams
+
+
+class OutboundPriority(UpperStrEnum):
+    INTERACTIVE = auto()  # Replies to users, may use the whole global limit
+    BULK = auto()  # Broadcasts and mass notifications, leave room for interactive sends
+
+
 class Command(Enum):
     START = BotCommand(command="start", description="cmd-start")
     PAYSUPPORT = BotCommand(command="paysupport", description="cmd-paysupport")
@@ -0,0 +1,58 @@
+import asyncio
+from typing import Any, Callable, Final, Optional
+
+from loguru import logger
+
+from src.core.constants import STATS_REPORT_INTERVAL
+
+StatsGetter = Callable[[], dict[str, Any]]
+
+
+class StatsReporter:
+    """
+    Periodically logs the counters of registered components.
+
+    Counters are kept in memory of each process, so every process that serves traffic
+    runs its own reporter. A final report is logged when the reporter stops.
+    """
+
+    _sources: dict[str, StatsGetter]
+    _task: Optional[asyncio.Task[None]]
+
+    def __init__(self) -> None:
+        self._sources = {}
+        self._task = None
+
+    def register(self, name: str, getter: StatsGetter) -> None:
+        self._sources[name] = getter
+
+    def start(self, interval: float = STATS_REPORT_INTERVAL) -> None:
+        if self._task is not None and not self._task.done():
+            return
+
+        self._task = asyncio.create_task(self._run(interval))
+        logger.debug(f"Stats reporter started for {list(self._sources)}")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self.report()
+
+    def report(self) -> None:
+        for name, getter in self._sources.items():
+            try:
+                logger.info(f"Stats '{name}': {getter()}")
+            except Exception as exception:
+                logger.warning(f"Failed to collect stats '{name}': {exception}")
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.report()
+
+
+stats_reporter: Final[StatsReporter] = StatsReporter()
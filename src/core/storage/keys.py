@@ -15,4 +15,66 @@ class AccessWaitListKey(StorageKey, prefix="access_wait_list"): ...
 class RecentRegisteredUsersKey(StorageKey, prefix="recent_registered_users"): ...
 
 
-class RecentActivityUsersKey(StorageKey, prefix="recent_activity_users"): ...
+class RecentActivityUsersKey(StorageKey, prefix="recent_activity"): ...
+
+
+class ChannelMembersKey(StorageKey, prefix="channel_members"): ...
+
+
+class ThrottlingKey(StorageKey, prefix="throttling"):
+    telegram_id: int
+    event_type: str
+
+
+class ThrottlingNoticeKey(StorageKey, prefix="throttling_notice"):
+    telegram_id: int
+
+
+class WebhookUpdateKey(StorageKey, prefix="webhook_update"):
+    update_id: int
+
+
+class UpdateStreamKey(StorageKey, prefix="updates"):
+    shard: int
+
+
+class OutboundGlobalRateKey(StorageKey, prefix="outbound_global"):
+    bot_id: int
+
+
+class OutboundChatRateKey(StorageKey, prefix="outbound_chat"):
+    bot_id: int
+    chat_id: str
+
+
+class DeferredNotificationsKey(StorageKey, prefix="deferred_notifications"): ...
+
+
+class DeferredNotificationsLockKey(StorageKey, prefix="deferred_notifications_lock"): ...
+
+
+class MessageDeletionQueueKey(StorageKey, prefix="message_deletion_queue"): ...
+
+
+class ErrorWindowKey(StorageKey, prefix="error_window"):
+    fingerprint: str
+
+
+class ErrorDigestKey(StorageKey, prefix="error_digest"):
+    fingerprint: str
+
+
+class ErrorDigestQueueKey(StorageKey, prefix="error_digest_queue"): ...
+
+
+class MediaFileIdKey(StorageKey, prefix="media_file_id"):
+    content_type: str
+    digest: str
+
+
+class BroadcastCancelKey(StorageKey, prefix="broadcast_cancel"):
+    task_id: str
+
+
+class ProfileFingerprintKey(StorageKey, prefix="profile_fingerprint"):
+    telegram_id: int
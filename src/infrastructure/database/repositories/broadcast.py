@@ -1,6 +1,9 @@
 from typing import Any, Optional
 from uuid import UUID
 
+from sqlalchemy import BigInteger, Integer, column, insert, select, update, values
+
+from src.core.enums import BroadcastStatus
 from src.infrastructure.database.models.sql import Broadcast, BroadcastMessage
 
 from .base import BaseRepository
@@ -10,8 +13,16 @@ class BroadcastRepository(BaseRepository):
     async def create(self, broadcast: Broadcast) -> Broadcast:
         return await self.create_instance(broadcast)
 
-    async def create_messages(self, messages: list[BroadcastMessage]) -> list[BroadcastMessage]:
-        return await self.create_instances(messages)
+    async def create_messages(self, messages: list[dict[str, Any]]) -> list[BroadcastMessage]:
+        if not messages:
+            return []
+
+        # Bulk INSERT ... RETURNING, sent in pages of up to 1000 rows
+        result = await self.session.scalars(
+            insert(BroadcastMessage).returning(BroadcastMessage, sort_by_parameter_order=True),
+            messages,
+        )
+        return list(result.all())
 
     async def get(self, task_id: UUID) -> Optional[Broadcast]:
         return await self._get_one(Broadcast, Broadcast.task_id == task_id)
@@ -31,6 +42,26 @@ class BroadcastRepository(BaseRepository):
     async def update(self, task_id: UUID, **data: Any) -> Optional[Broadcast]:
         return await self._update(Broadcast, Broadcast.task_id == task_id, **data)
 
+    async def get_status(self, task_id: UUID) -> Optional[BroadcastStatus]:
+        # Only the column: loading the broadcast would also load all of its messages
+        query = select(Broadcast.status).where(Broadcast.task_id == task_id)
+        status: Optional[BroadcastStatus] = await self.session.scalar(query)
+        return status
+
+    async def update_status(
+        self,
+        task_id: UUID,
+        status: BroadcastStatus,
+        expected: tuple[BroadcastStatus, ...],
+    ) -> bool:
+        query = (
+            update(Broadcast)
+            .where(Broadcast.task_id == task_id, Broadcast.status.in_(expected))
+            .values(status=status)
+        )
+        result = await self.session.execute(query)
+        return bool(result.rowcount)  # type: ignore[attr-defined]
+
     async def update_message(
         self, broadcast_id: int, user_id: int, **data: Any
     ) -> Optional[BroadcastMessage]:
@@ -40,3 +71,34 @@ class BroadcastRepository(BaseRepository):
             BroadcastMessage.user_id == user_id,
             **data,
         )
+
+    async def update_messages(self, messages: list[dict[str, Any]]) -> int:
+        if not messages:
+            return 0
+
+        rows = values(
+            column("id", Integer),
+            column("message_id", BigInteger),
+            column("status", BroadcastMessage.__table__.c.status.type),
+            name="results",
+        ).data([(m["id"], m["message_id"], m["status"]) for m in messages])
+
+        query = (
+            update(BroadcastMessage)
+            .where(BroadcastMessage.id == rows.c.id)
+            .values(message_id=rows.c.message_id, status=rows.c.status)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(query)
+        return result.rowcount  # type: ignore[attr-defined, no-any-return]
+
+    async def increment_counters(self, broadcast_id: int, success: int, failed: int) -> None:
+        query = (
+            update(Broadcast)
+            .where(Broadcast.id == broadcast_id)
+            .values(
+                success_count=Broadcast.success_count + success,
+                failed_count=Broadcast.failed_count + failed,
+            )
+        )
+        await self.session.execute(query)
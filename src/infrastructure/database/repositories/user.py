@@ -1,8 +1,18 @@
 from typing import Any, Optional
 
-from sqlalchemy import func, or_
+from sqlalchemy import (
+    BigInteger,
+    ColumnExpressionArgument,
+    String,
+    column,
+    func,
+    or_,
+    select,
+    update,
+    values,
+)
 
-from src.core.enums import UserRole
+from src.core.enums import Locale, UserRole
 from src.infrastructure.database.models.sql import User
 
 from .base import BaseRepository
@@ -18,6 +28,20 @@ class UserRepository(BaseRepository):
     async def get_by_ids(self, telegram_ids: list[int]) -> list[User]:
         return await self._get_many(User, User.telegram_id.in_(telegram_ids))
 
+    async def get_recipients(
+        self,
+        *conditions: ColumnExpressionArgument[bool],
+        after_telegram_id: Optional[int],
+        limit: int,
+    ) -> list[tuple[int, Locale]]:
+        query = select(User.telegram_id, User.language).where(*conditions)
+
+        if after_telegram_id is not None:
+            query = query.where(User.telegram_id > after_telegram_id)
+
+        result = await self.session.execute(query.order_by(User.telegram_id).limit(limit))
+        return [(telegram_id, language) for telegram_id, language in result]
+
     async def get_by_partial_name(self, query: str) -> list[User]:
         search_pattern = f"%{query.lower()}%"
         conditions = [
@@ -35,6 +59,26 @@ class UserRepository(BaseRepository):
     async def update(self, telegram_id: int, **data: Any) -> Optional[User]:
         return await self._update(User, User.telegram_id == telegram_id, **data)
 
+    async def update_profiles(self, profiles: list[dict[str, Any]]) -> int:
+        if not profiles:
+            return 0
+
+        rows = values(
+            column("telegram_id", BigInteger),
+            column("username", String),
+            column("name", String),
+            column("language", User.__table__.c.language.type),
+            name="profiles",
+        ).data([(p["telegram_id"], p["username"], p["name"], p["language"]) for p in profiles])
+
+        query = (
+            update(User)
+            .where(User.telegram_id == rows.c.telegram_id)
+            .values(username=rows.c.username, name=rows.c.name, language=rows.c.language)
+        )
+        result = await self.session.execute(query)
+        return result.rowcount  # type: ignore[attr-defined, no-any-return]
+
     async def delete(self, telegram_id: int) -> bool:
         return bool(await self._delete(User, User.telegram_id == telegram_id))
 
@@ -6,8 +6,11 @@ from aiogram.enums import ParseMode
 from aiogram_dialog import BgManagerFactory
 from dishka import Provider, Scope, from_context, provide
 from loguru import logger
+from redis.asyncio import Redis
 
+from src.bot.session import BotSession, OutboundRateLimitMiddleware
 from src.core.config import AppConfig
+from src.core.stats import stats_reporter
 
 
 class BotProvider(Provider):
@@ -16,13 +19,26 @@ class BotProvider(Provider):
     bg_manager_factory = from_context(provides=BgManagerFactory)
 
     @provide
-    async def get_bot(self, config: AppConfig) -> AsyncIterable[Bot]:
+    async def get_bot(self, config: AppConfig, redis_client: Redis) -> AsyncIterable[Bot]:
         logger.debug("Initializing Bot instance")
 
+        session = BotSession(
+            limit=config.bot.session_limit,
+            limit_per_host=config.bot.session_limit_per_host,
+            keepalive_timeout=config.bot.session_keepalive,
+            dns_cache_ttl=config.bot.session_dns_cache_ttl,
+            timeout=config.bot.session_timeout,
+            api_server=config.bot.api_server,
+            api_local_mode=config.bot.api_local_mode,
+        )
+        stats_reporter.register("bot_session", session.get_pool_stats)
+
         async with Bot(
             token=config.bot.token.get_secret_value(),
+            session=session,
             default=DefaultBotProperties(parse_mode=ParseMode.HTML),
         ) as bot:
+            bot.session.middleware(OutboundRateLimitMiddleware(redis_client))
             yield bot
 
         logger.debug("Closing Bot session")
@@ -14,6 +14,7 @@ from src.services.remnawave import RemnawaveService
 from src.services.settings import SettingsService
 from src.services.subscription import SubscriptionService
 from src.services.transaction import TransactionService
+from src.services.update_context import UpdateContext
 from src.services.user import UserService
 from src.services.webhook import WebhookService
 
@@ -37,3 +38,4 @@ class ServicesProvider(Provider):
     pricing_service = provide(source=PricingService)
     importer_service = provide(source=ImporterService)
     referral_service = provide(source=ReferralService, scope=Scope.REQUEST)
+    update_context = provide(source=UpdateContext, scope=Scope.REQUEST)
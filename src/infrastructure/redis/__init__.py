@@ -1,7 +1,26 @@
-from .cache import redis_cache
+from .cache import (
+    build_cache_key,
+    get_cache_stats,
+    get_cached_many,
+    invalidate_cache,
+    invalidate_tags,
+    redis_cache,
+)
+from .codecs import CacheCodec, JsonCodec, MsgpackCodec
+from .rate_limit import TokenBucket, TokenBucketLimit
 from .repository import RedisRepository
 
 __all__ = [
+    "build_cache_key",
+    "get_cache_stats",
+    "get_cached_many",
+    "invalidate_cache",
+    "invalidate_tags",
     "redis_cache",
+    "CacheCodec",
+    "JsonCodec",
+    "MsgpackCodec",
     "RedisRepository",
+    "TokenBucket",
+    "TokenBucketLimit",
 ]
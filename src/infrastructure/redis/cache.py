@@ -1,69 +1,673 @@
+import asyncio
+import copy
+import inspect
+import math
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import timedelta
 from functools import wraps
-from typing import Any, Awaitable, Callable, Optional, ParamSpec, TypeVar, get_type_hints
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Final,
+    Iterable,
+    Optional,
+    ParamSpec,
+    Sequence,
+    TypeVar,
+    get_type_hints,
+)
 
 from loguru import logger
-from pydantic import SecretStr, TypeAdapter
 from redis.asyncio import Redis
 from redis.typing import ExpiryT
 
-from src.core.constants import TIME_1M
-from src.core.utils import json_utils
+from src.core.constants import LOCAL_CACHE_MAXSIZE, TIME_1M
+from src.core.stats import stats_reporter
+from src.core.storage.key_builder import build_key
+
+from .codecs import CacheCodec, MsgpackCodec
+from .local_cache import MISSING, CacheStats, LocalCache
 
 T = TypeVar("T", bound=Any)
 P = ParamSpec("P")
 
+CACHE_INVALIDATION_CHANNEL: Final[str] = "cache:invalidate"
+CACHE_LOCK_POLL_INTERVAL: Final[float] = 0.05
+# Stored instead of an encoded value when a function returns None and negative_ttl is set
+NEGATIVE_CACHE_VALUE: Final[bytes] = b"\x00none"
 
-def prepare_for_cache(obj: Any) -> Any:
-    if isinstance(obj, SecretStr):
-        return obj.get_secret_value()
-    elif isinstance(obj, dict):
-        return {k: prepare_for_cache(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [prepare_for_cache(v) for v in obj]
-    return obj
+local_cache: Final[LocalCache] = LocalCache(maxsize=LOCAL_CACHE_MAXSIZE)
+cache_stats: Final[CacheStats] = CacheStats()
 
+_codecs: dict[str, CacheCodec[Any]] = {}
+_bulk_readers: dict[str, Callable[[Redis, Sequence[str]], Awaitable[dict[str, Any]]]] = {}
+_inflight: dict[str, asyncio.Future[Any]] = {}
+_background_tasks: set[asyncio.Task[None]] = set()
 
-def redis_cache(
-    prefix: Optional[str] = None,
-    ttl: ExpiryT = TIME_1M,
-) -> Callable[[Callable[P, Awaitable[T]]], Callable[P, Awaitable[T]]]:
-    def decorator(func: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
-        return_type: Any = get_type_hints(func)["return"]
-        type_adapter: TypeAdapter[T] = TypeAdapter(return_type)
 
-        @wraps(func)
-        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
-            self: Any = args[0]
-            redis: Redis = self.redis_client
-
-            # Build cache key
-            key_parts = [
-                "cache",
-                prefix or func.__name__,
-                *map(str, args[1:]),
-                *map(str, kwargs.values()),
-            ]
-            key: str = ":".join(key_parts)
+def build_cache_key(prefix: str, /, *parts: Any, **kw_parts: Any) -> str:
+    # The schema hash keeps entries written by an incompatible deploy out of reach
+    codec = _codecs.get(prefix)
+    schema_hash = codec.schema_hash if codec else "-"
+    return build_key("cache", prefix, schema_hash, *parts, **kw_parts)
+
+
+def build_tag_key(tag: str) -> str:
+    return build_key("cache", "tag", tag)
+
+
+def get_cache_stats() -> dict[str, Any]:
+    return {**cache_stats.as_dict(), "local_size": len(local_cache)}
+
+
+stats_reporter.register("cache", get_cache_stats)
+
+
+async def invalidate_cache(redis: Redis, *keys: str) -> None:
+    if not keys:
+        return
+
+    local_cache.delete(*keys)
+    cache_stats.invalidations += len(keys)
+
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.delete(*keys)
+        pipe.publish(CACHE_INVALIDATION_CHANNEL, "\n".join(keys))
+        await pipe.execute()
+
+    logger.debug(f"Cache invalidated: {list(keys)}")
 
+
+async def invalidate_tags(redis: Redis, *tags: str) -> None:
+    if not tags:
+        return
+
+    tag_keys = [build_tag_key(tag) for tag in tags]
+
+    # Reading and dropping the index atomically keeps concurrent writes from being lost
+    async with redis.pipeline(transaction=True) as pipe:
+        for tag_key in tag_keys:
+            pipe.smembers(tag_key)
+        pipe.delete(*tag_keys)
+        results = await pipe.execute()
+
+    keys: set[str] = set()
+
+    for members in results[:-1]:
+        keys.update(member.decode() for member in members)
+
+    await invalidate_cache(redis, *keys)
+    logger.debug(f"Cache tags invalidated: {list(tags)}")
+
+
+class CacheInvalidationListener:
+    _task: Optional[asyncio.Task[None]]
+
+    def __init__(self) -> None:
+        self._task = None
+
+    def start(self, redis: Redis) -> None:
+        if self._task is not None and not self._task.done():
+            return
+
+        self._task = asyncio.create_task(self._listen(redis))
+        logger.debug(f"Listening for cache invalidations on '{CACHE_INVALIDATION_CHANNEL}'")
+
+    async def _listen(self, redis: Redis) -> None:
+        while True:
             try:
-                cached_value: Optional[bytes] = await redis.get(key)
-                if cached_value is not None:
-                    logger.debug(f"Cache hit: '{key}'")
-                    parsed = json_utils.decode(cached_value.decode())
-                    return type_adapter.validate_python(parsed)
+                async with redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                    # Anything published while we were not subscribed is lost
+                    local_cache.clear()
+
+                    async for message in pubsub.listen():
+                        data: bytes = message["data"]
+                        local_cache.delete(*data.decode().split("\n"))
+            except asyncio.CancelledError:
+                raise
             except Exception as exception:
-                logger.warning(f"Cache read failed for key '{key}': {exception}")
+                logger.warning(f"Cache invalidation listener failed: {exception}")
+                local_cache.clear()
+                await asyncio.sleep(1)
+
+
+invalidation_listener: Final[CacheInvalidationListener] = CacheInvalidationListener()
+
+
+async def get_cached_many(redis: Redis, prefix: str, keys: Sequence[str]) -> dict[str, Any]:
+    # Only fresh entries are returned, misses and stale entries are left to the caller
+    reader = _bulk_readers.get(prefix)
+
+    if reader is None:
+        raise ValueError(f"Unknown cache prefix '{prefix}'")
+
+    if not keys:
+        return {}
+
+    return await reader(redis, keys)
+
+
+def _decode(key: str, data: Optional[bytes], codec: CacheCodec[Any]) -> Any:
+    if data is None:
+        return MISSING
+
+    if data == NEGATIVE_CACHE_VALUE:
+        cache_stats.negative_hits += 1
+        return None
+
+    try:
+        return codec.decode(data)
+    except Exception as exception:
+        logger.warning(f"Cache read failed for key '{key}': {exception}")
+        return MISSING
+
+
+async def _read(redis: Redis, key: str, codec: CacheCodec[Any]) -> Any:
+    try:
+        cached_value: Optional[bytes] = await redis.get(key)
+    except Exception as exception:
+        logger.warning(f"Cache read failed for key '{key}': {exception}")
+        return MISSING
+
+    return _decode(key, cached_value, codec)
+
+
+async def _wait_for_leader(
+    key: str,
+    read: Callable[[], Awaitable[Any]],
+    timeout: float,
+) -> Any:
+    stale_value = local_cache.get_stale(key)
+
+    if stale_value is not MISSING:
+        cache_stats.stale_served += 1
+        logger.debug(f"Cache '{key}' is being recomputed elsewhere. Serving stale value")
+        return stale_value
+
+    deadline = asyncio.get_running_loop().time() + timeout
+
+    while True:
+        entry = await read()
+
+        if entry is not MISSING:
+            logger.debug(f"Cache '{key}' filled by another process")
+            return entry[0]
+
+        if asyncio.get_running_loop().time() >= deadline:
+            break
+
+        await asyncio.sleep(CACHE_LOCK_POLL_INTERVAL)
+
+    logger.warning(f"Timed out waiting for cache '{key}' to be recomputed")
+    return MISSING
+
+
+async def _store(redis: Redis, key: str, value: bytes, ttl: int, tags: Iterable[str]) -> None:
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.set(key, value, ex=ttl)
+
+        for tag in tags:
+            tag_key = build_tag_key(tag)
+            pipe.sadd(tag_key, key)
+            # The index has to outlive every entry registered under it
+            pipe.expire(tag_key, ttl, nx=True)
+            pipe.expire(tag_key, ttl, gt=True)
+
+        await pipe.execute()
+
+
+def _to_seconds(value: ExpiryT) -> int:
+    if isinstance(value, timedelta):
+        return int(value.total_seconds())
+    return int(value)
+
+
+def _should_refresh_early(expires_at: float, delta: float, beta: float) -> bool:
+    # XFetch: the closer to expiry and the slower the recompute, the likelier an early refresh
+    return time.time() - delta * beta * math.log(1.0 - random.random()) >= expires_at
+
+
+@asynccontextmanager
+async def _detached(service: Any) -> AsyncIterator[Any]:
+    # Background refreshes outlive the request, so they must not share its DB session
+    uow = getattr(service, "uow", None)
+
+    if uow is None:
+        yield service
+        return
+
+    detached_service = copy.copy(service)
+
+    async with type(uow)(uow.session_pool) as detached_uow:
+        detached_service.uow = detached_uow
+        yield detached_service
+
+
+class CachedFunction:
+    """
+    Cache state and read paths of one function decorated with redis_cache.
+
+    A call is served from the local tier, then from Redis. On a miss only one caller
+    per process computes the value (and, with lock_ttl, one per cluster); the others
+    wait for its result. Stale and nearly expired entries are served while a
+    background task recomputes them.
+    """
+
+    func: Callable[..., Awaitable[Any]]
+    signature: inspect.Signature
+    prefix: str
+    codec: CacheCodec[Any]
+    ttl: ExpiryT
+    stale_ttl: Optional[ExpiryT]
+    fresh_ttl: int
+    redis_ttl: int
+    local_ttl: Optional[float]
+    lock_ttl: Optional[float]
+    refresh_ahead: Optional[float]
+    negative_ttl: Optional[int]
+    tags: Sequence[str]
+    result_tags: Optional[Callable[[Any], Iterable[str]]]
+    use_envelope: bool
+
+    def __init__(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        prefix: str,
+        codec: CacheCodec[Any],
+        ttl: ExpiryT,
+        local_ttl: Optional[float],
+        lock_ttl: Optional[float],
+        stale_ttl: Optional[ExpiryT],
+        refresh_ahead: Optional[float],
+        negative_ttl: Optional[ExpiryT],
+        tags: Sequence[str],
+        result_tags: Optional[Callable[[Any], Iterable[str]]],
+    ) -> None:
+        self.func = func
+        self.signature = inspect.signature(func)
+        self.prefix = prefix
+        self.codec = codec
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.fresh_ttl = _to_seconds(ttl)
+        self.redis_ttl = self.fresh_ttl + (_to_seconds(stale_ttl) if stale_ttl is not None else 0)
+        self.local_ttl = local_ttl
+        self.lock_ttl = lock_ttl
+        self.refresh_ahead = refresh_ahead
+        self.negative_ttl = _to_seconds(negative_ttl) if negative_ttl is not None else None
+        self.tags = tags
+        self.result_tags = result_tags
+        # Entries carry their logical expiry and recompute time only when they can go stale
+        self.use_envelope = stale_ttl is not None or refresh_ahead is not None
 
-            logger.debug(f"Cache miss: '{key}'. Executing function")
-            result: T = await func(*args, **kwargs)
+    async def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        redis: Redis = args[0].redis_client
+        key = build_cache_key(self.prefix, *args[1:], **kwargs)
 
+        local_value = self._get_local(redis, key)
+
+        if local_value is not MISSING:
+            return self.codec.load(local_value)
+
+        entry = await self.read(redis, key)
+
+        if entry is not MISSING:
+            cache_stats.redis_hits += 1
+            self._schedule_refresh(redis, key, entry, args, kwargs)
+            return self.codec.load(entry[0])
+
+        cache_stats.redis_misses += 1
+        inflight = _inflight.get(key)
+
+        if inflight is not None:
+            return await self._wait_for_inflight(inflight, redis, key, args, kwargs)
+
+        return await self._compute_as_leader(redis, key, args, kwargs)
+
+    def _get_local(self, redis: Redis, key: str) -> Any:
+        if self.local_ttl is None:
+            return MISSING
+
+        invalidation_listener.start(redis)
+        local_value = local_cache.get(key)
+
+        if local_value is MISSING:
+            cache_stats.local_misses += 1
+            return MISSING
+
+        cache_stats.local_hits += 1
+        logger.debug(f"Local cache hit: '{key}'")
+        return local_value
+
+    def _set_local(self, key: str, plain: Any) -> None:
+        if self.local_ttl is None:
+            return
+
+        if plain is None and self.negative_ttl is not None:
+            local_cache.set(key, plain, min(self.local_ttl, self.negative_ttl))
+        else:
+            local_cache.set(key, plain, self.local_ttl)
+
+    def _entry_tags(self, args: tuple[Any, ...], kwargs: dict[str, Any], result: Any) -> list[str]:
+        arguments = self.signature.bind(*args, **kwargs)
+        arguments.apply_defaults()
+
+        formatted = [tag.format(**arguments.arguments) for tag in self.tags]
+
+        if self.result_tags is not None and result is not None:
+            formatted.extend(self.result_tags(result))
+
+        return formatted
+
+    def _unpack(self, key: str, cached_value: Any) -> Any:
+        """Returns (value, expires_at, delta) or MISSING."""
+        if cached_value is MISSING:
+            return MISSING
+
+        # Negative entries are never stale, Redis expires them on its own
+        if not self.use_envelope or cached_value is None:
+            return cached_value, math.inf, 0.0
+
+        try:
+            return cached_value["v"], cached_value["x"], cached_value["d"]
+        except (KeyError, TypeError):
+            logger.warning(f"Cache entry '{key}' has unexpected format, ignoring it")
+            return MISSING
+
+    async def read(self, redis: Redis, key: str) -> Any:
+        return self._unpack(key, await _read(redis, key, self.codec))
+
+    async def read_many(self, redis: Redis, keys: Sequence[str]) -> dict[str, Any]:
+        found: dict[str, Any] = {}
+        remote_keys: list[str] = []
+
+        for key in keys:
+            local_value = local_cache.get(key) if self.local_ttl is not None else MISSING
+
+            if local_value is MISSING:
+                remote_keys.append(key)
+            else:
+                cache_stats.local_hits += 1
+                found[key] = self.codec.load(local_value)
+
+        if not remote_keys:
+            return found
+
+        if self.local_ttl is not None:
+            invalidation_listener.start(redis)
+            cache_stats.local_misses += len(remote_keys)
+
+        try:
+            values: list[Optional[bytes]] = await redis.mget(remote_keys)
+        except Exception as exception:
+            logger.warning(f"Cache read failed for {len(remote_keys)} keys: {exception}")
+            return found
+
+        now = time.time()
+
+        for key, data in zip(remote_keys, values):
+            entry = self._unpack(key, _decode(key, data, self.codec))
+
+            if entry is MISSING or now >= entry[1]:
+                cache_stats.redis_misses += 1
+                continue
+
+            cache_stats.redis_hits += 1
+            self._set_local(key, entry[0])
+            found[key] = self.codec.load(entry[0])
+
+        logger.debug(f"Bulk cache read: {len(found)}/{len(keys)} hits for '{self.prefix}'")
+        return found
+
+    def _schedule_refresh(
+        self,
+        redis: Redis,
+        key: str,
+        entry: tuple[Any, float, float],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> None:
+        cached_value, expires_at, delta = entry
+
+        if time.time() >= expires_at:
+            cache_stats.stale_served += 1
+            logger.debug(f"Stale cache hit: '{key}'. Refreshing in background")
+            self._refresh_in_background(redis, key, args, kwargs)
+            return
+
+        logger.debug(f"Cache hit: '{key}'")
+
+        if self.refresh_ahead is not None and _should_refresh_early(
+            expires_at, delta, self.refresh_ahead
+        ):
+            logger.debug(f"Cache '{key}' is close to expiry. Refreshing early")
+            self._refresh_in_background(redis, key, args, kwargs)
+
+        self._set_local(key, cached_value)
+
+    async def _wait_for_inflight(
+        self,
+        inflight: asyncio.Future[Any],
+        redis: Redis,
+        key: str,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> Any:
+        logger.debug(f"Cache miss: '{key}'. Waiting for in-flight call")
+        cache_stats.coalesced += 1
+
+        try:
+            return self.codec.load(await asyncio.shield(inflight))
+        except asyncio.CancelledError:
+            if not inflight.cancelled():
+                raise
+            # The leader failed, so compute it ourselves
+
+        result, _ = await self._compute(redis, key, args, kwargs)
+        return result
+
+    async def _compute_as_leader(
+        self,
+        redis: Redis,
+        key: str,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> Any:
+        logger.debug(f"Cache miss: '{key}'. Executing function")
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        _inflight[key] = future
+
+        try:
+            result, safe_result = await self._compute_locked(redis, key, args, kwargs)
+
+            if safe_result is not MISSING:
+                future.set_result(safe_result)
+
+            return result
+        finally:
+            if not future.done():
+                future.cancel()
+            _inflight.pop(key, None)
+
+    async def _compute(
+        self,
+        redis: Redis,
+        key: str,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> tuple[Any, Any]:
+        """Returns the result and its cacheable form (MISSING if it could not be cached)."""
+        started_at = time.perf_counter()
+        result = await self.func(*args, **kwargs)
+        delta = time.perf_counter() - started_at
+
+        if result is None and self.negative_ttl is not None:
+            await self._store_negative(
+                redis,
+                key,
+                self.negative_ttl,
+                self._entry_tags(args, kwargs, result),
+            )
+            return result, None
+
+        safe_result = await self._store_result(
+            redis,
+            key,
+            result,
+            delta,
+            self._entry_tags(args, kwargs, result),
+        )
+        return result, safe_result
+
+    async def _store_negative(self, redis: Redis, key: str, ttl: int, tags: list[str]) -> None:
+        try:
+            await _store(redis, key, NEGATIVE_CACHE_VALUE, ttl, tags)
+        except Exception as exception:
+            logger.warning(f"Cache write failed for key '{key}': {exception}")
+            return
+
+        logger.debug(f"Negative result cached: '{key}' (ttl={ttl})")
+        self._set_local(key, None)
+
+    async def _store_result(
+        self,
+        redis: Redis,
+        key: str,
+        result: Any,
+        delta: float,
+        tags: list[str],
+    ) -> Any:
+        try:
+            safe_result = self.codec.dump(result)
+            stored_value = (
+                {"v": safe_result, "x": time.time() + self.fresh_ttl, "d": delta}
+                if self.use_envelope
+                else safe_result
+            )
+            await _store(redis, key, self.codec.encode(stored_value), self.redis_ttl, tags)
+        except Exception as exception:
+            logger.warning(f"Cache write failed for key '{key}': {exception}")
+            return MISSING
+
+        logger.debug(f"Result cached: '{key}' (ttl={self.ttl}, stale_ttl={self.stale_ttl})")
+        self._set_local(key, safe_result)
+        return safe_result
+
+    async def _compute_locked(
+        self,
+        redis: Redis,
+        key: str,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> tuple[Any, Any]:
+        if self.lock_ttl is None:
+            return await self._compute(redis, key, args, kwargs)
+
+        lock = redis.lock(f"lock:{key}", timeout=self.lock_ttl)
+
+        try:
+            acquired = await lock.acquire(blocking=False)
+        except Exception as exception:
+            logger.warning(f"Cache lock failed for key '{key}': {exception}")
+            return await self._compute(redis, key, args, kwargs)
+
+        if not acquired:
+            cached_value = await _wait_for_leader(key, lambda: self.read(redis, key), self.lock_ttl)
+            if cached_value is not MISSING:
+                return self.codec.load(cached_value), cached_value
+            return await self._compute(redis, key, args, kwargs)
+
+        try:
+            return await self._compute(redis, key, args, kwargs)
+        finally:
             try:
-                safe_result = prepare_for_cache(type_adapter.dump_python(result))
-                await redis.setex(key, ttl, json_utils.encode(safe_result))
-                logger.debug(f"Result cached: '{key}' (ttl={ttl})")
+                await lock.release()
             except Exception as exception:
-                logger.warning(f"Cache write failed for key '{key}': {exception}")
+                logger.warning(f"Cache lock release failed for key '{key}': {exception}")
+
+    async def _refresh(
+        self,
+        future: asyncio.Future[Any],
+        redis: Redis,
+        key: str,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> None:
+        try:
+            async with _detached(args[0]) as service:
+                _, safe_result = await self._compute_locked(
+                    redis, key, (service, *args[1:]), kwargs
+                )
+
+            if safe_result is not MISSING:
+                future.set_result(safe_result)
+        except Exception as exception:
+            logger.warning(f"Background refresh failed for key '{key}': {exception}")
+        finally:
+            if not future.done():
+                future.cancel()
+            _inflight.pop(key, None)
+
+    def _refresh_in_background(
+        self,
+        redis: Redis,
+        key: str,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> None:
+        if key in _inflight:
+            return
+
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        _inflight[key] = future
+
+        task = asyncio.create_task(self._refresh(future, redis, key, args, kwargs))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+def redis_cache(
+    prefix: Optional[str] = None,
+    ttl: ExpiryT = TIME_1M,
+    local_ttl: Optional[float] = None,
+    lock_ttl: Optional[float] = None,
+    stale_ttl: Optional[ExpiryT] = None,
+    refresh_ahead: Optional[float] = None,
+    negative_ttl: Optional[ExpiryT] = None,
+    tags: Sequence[str] = (),
+    result_tags: Optional[Callable[[Any], Iterable[str]]] = None,
+    codec: type[CacheCodec[Any]] = MsgpackCodec,
+) -> Callable[[Callable[P, Awaitable[T]]], Callable[P, Awaitable[T]]]:
+    def decorator(func: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
+        cache_prefix = prefix or func.__name__
 
+        if cache_prefix in _codecs:
+            raise ValueError(f"Cache prefix '{cache_prefix}' is already in use")
+
+        cached = CachedFunction(
+            func=func,
+            prefix=cache_prefix,
+            codec=codec(get_type_hints(func)["return"]),
+            ttl=ttl,
+            local_ttl=local_ttl,
+            lock_ttl=lock_ttl,
+            stale_ttl=stale_ttl,
+            refresh_ahead=refresh_ahead,
+            negative_ttl=negative_ttl,
+            tags=tags,
+            result_tags=result_tags,
+        )
+        _codecs[cache_prefix] = cached.codec
+        _bulk_readers[cache_prefix] = cached.read_many
+
+        @wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            result: T = await cached(*args, **kwargs)
             return result
 
         return wrapper
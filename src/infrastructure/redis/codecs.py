@@ -0,0 +1,102 @@
+import hashlib
+from abc import ABC, abstractmethod
+from functools import cached_property
+from typing import Any, Final, Generic, TypeVar
+
+import msgspec
+from pydantic import SecretStr, TypeAdapter
+
+from src.core.utils import json_utils
+
+T = TypeVar("T", bound=Any)
+
+SCHEMA_HASH_LENGTH: Final[int] = 8
+
+
+def prepare_for_cache(obj: Any) -> Any:
+    if isinstance(obj, SecretStr):
+        return obj.get_secret_value()
+    elif isinstance(obj, dict):
+        return {k: prepare_for_cache(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [prepare_for_cache(v) for v in obj]
+    return obj
+
+
+class CacheCodec(ABC, Generic[T]):
+    """
+    Converts cached values between three forms:
+    value (T) <-> plain (kept in the local tier) <-> bytes (stored in Redis).
+    """
+
+    name: str
+    return_type: Any
+    type_adapter: TypeAdapter[T]
+
+    def __init__(self, return_type: Any) -> None:
+        self.return_type = return_type
+        self.type_adapter = TypeAdapter(return_type)
+
+    @cached_property
+    def schema_hash(self) -> str:
+        try:
+            schema = json_utils.encode(self.type_adapter.json_schema())
+        except Exception:
+            schema = repr(self.return_type)
+
+        digest = hashlib.sha1(f"{self.name}:{schema}".encode()).hexdigest()
+        return digest[:SCHEMA_HASH_LENGTH]
+
+    @abstractmethod
+    def dump(self, value: T) -> Any: ...
+
+    @abstractmethod
+    def load(self, plain: Any) -> T: ...
+
+    @abstractmethod
+    def encode(self, plain: Any) -> bytes: ...
+
+    @abstractmethod
+    def decode(self, data: bytes) -> Any: ...
+
+
+class JsonCodec(CacheCodec[T]):
+    name = "json"
+
+    def dump(self, value: T) -> Any:
+        return prepare_for_cache(self.type_adapter.dump_python(value))
+
+    def load(self, plain: Any) -> T:
+        return self.type_adapter.validate_python(plain)
+
+    def encode(self, plain: Any) -> bytes:
+        return json_utils.bytes_encode(plain)
+
+    def decode(self, data: bytes) -> Any:
+        return json_utils.decode(data)
+
+
+def _enc_hook(obj: Any) -> Any:
+    if isinstance(obj, SecretStr):
+        return obj.get_secret_value()
+    raise NotImplementedError(f"Objects of type '{type(obj).__name__}' are not supported")
+
+
+_msgpack_encoder: Final[msgspec.msgpack.Encoder] = msgspec.msgpack.Encoder(enc_hook=_enc_hook)
+_msgpack_decoder: Final[msgspec.msgpack.Decoder[Any]] = msgspec.msgpack.Decoder()
+
+
+class MsgpackCodec(CacheCodec[T]):
+    name = "msgpack"
+
+    def dump(self, value: T) -> Any:
+        return self.type_adapter.dump_python(value)
+
+    def load(self, plain: Any) -> T:
+        return self.type_adapter.validate_python(plain)
+
+    def encode(self, plain: Any) -> bytes:
+        return _msgpack_encoder.encode(plain)
+
+    def decode(self, data: bytes) -> Any:
+        return _msgpack_decoder.decode(data)
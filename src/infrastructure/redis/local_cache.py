@@ -0,0 +1,98 @@
+import time
+from collections import OrderedDict
+from typing import Any, Final, Optional
+
+MISSING: Final[Any] = object()
+
+
+class LocalCache:
+    maxsize: int
+    _data: OrderedDict[str, tuple[float, Any]]
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any:
+        entry: Optional[tuple[float, Any]] = self._data.get(key)
+
+        if entry is None:
+            return MISSING
+
+        expires_at, value = entry
+
+        if expires_at <= time.monotonic():
+            # Expired entries stay until evicted so they can be served as stale
+            return MISSING
+
+        self._data.move_to_end(key)
+        return value
+
+    def get_stale(self, key: str) -> Any:
+        entry: Optional[tuple[float, Any]] = self._data.get(key)
+        return MISSING if entry is None else entry[1]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class CacheStats:
+    local_hits: int
+    local_misses: int
+    redis_hits: int
+    redis_misses: int
+    coalesced: int
+    stale_served: int
+    negative_hits: int
+    invalidations: int
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.local_hits = 0
+        self.local_misses = 0
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.coalesced = 0
+        self.stale_served = 0
+        self.negative_hits = 0
+        self.invalidations = 0
+
+    @property
+    def local_hit_ratio(self) -> float:
+        total = self.local_hits + self.local_misses
+        return self.local_hits / total if total else 0.0
+
+    @property
+    def redis_hit_ratio(self) -> float:
+        total = self.redis_hits + self.redis_misses
+        return self.redis_hits / total if total else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "local_hits": self.local_hits,
+            "local_misses": self.local_misses,
+            "local_hit_ratio": round(self.local_hit_ratio, 4),
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+            "redis_hit_ratio": round(self.redis_hit_ratio, 4),
+            "coalesced": self.coalesced,
+            "stale_served": self.stale_served,
+            "negative_hits": self.negative_hits,
+            "invalidations": self.invalidations,
+        }
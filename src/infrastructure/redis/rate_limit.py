@@ -0,0 +1,180 @@
+import time
+from typing import Final, Optional, Sequence
+
+from cachetools import TTLCache
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.core.constants import LOCAL_CACHE_MAXSIZE, TIME_10S
+
+# Share of the bucket that must stay untouched for an event to be admitted locally
+LOCAL_RESERVE_RATIO: Final[float] = 0.5
+
+# KEYS[1] - bucket, KEYS[2] - optional notice key set once per denial window
+# ARGV: rate (tokens/s), capacity, cost, debt (tokens spent locally), notice ttl (s)
+TOKEN_BUCKET_SCRIPT: Final[str] = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local debt = tonumber(ARGV[4])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - debt
+tokens = math.max(tokens, -capacity)
+
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+
+local notify = 0
+if allowed == 0 and KEYS[2] then
+    if redis.call('SET', KEYS[2], 1, 'NX', 'EX', tonumber(ARGV[5])) then
+        notify = 1
+    end
+end
+
+return {allowed, tostring(tokens), notify}
+"""
+
+
+# Takes one token from every bucket or from none of them
+# KEYS - buckets; ARGV - rate, capacity and reserve (tokens left for others) per bucket
+# Returns the number of seconds to wait before retrying, '0' when the tokens were taken
+MULTI_TOKEN_BUCKET_SCRIPT: Final[str] = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local levels = {}
+local wait = 0
+
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 3 - 2])
+    local capacity = tonumber(ARGV[i * 3 - 1])
+    local reserve = tonumber(ARGV[i * 3])
+
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+
+    local missing = 1 + reserve - tokens
+    if missing > 0 then
+        wait = math.max(wait, missing / rate)
+    end
+end
+
+if wait > 0 then
+    return tostring(wait)
+end
+
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 3 - 2])
+    local capacity = tonumber(ARGV[i * 3 - 1])
+    local tokens = levels[i] - 1
+
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil((capacity - tokens) / rate * 1000) + 1000)
+end
+
+return '0'
+"""
+
+
+class TokenBucketLimit:
+    rate: float
+    capacity: int
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+
+    def __repr__(self) -> str:
+        return f"TokenBucketLimit(rate={self.rate}, capacity={self.capacity})"
+
+
+class TokenBucket:
+    """
+    Token bucket shared by all processes through a single Lua call.
+
+    Every Redis answer is mirrored locally. While the mirrored bucket holds more than
+    LOCAL_RESERVE_RATIO of its capacity the event is admitted without a round trip,
+    and the tokens spent that way are charged to Redis on the next call.
+    """
+
+    redis_client: Redis
+    _local: TTLCache[str, list[float]]
+
+    def __init__(self, redis_client: Redis, local_ttl: float = TIME_10S) -> None:
+        self.redis_client = redis_client
+        self._script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+        self._multi_script = redis_client.register_script(MULTI_TOKEN_BUCKET_SCRIPT)
+        self._local = TTLCache(maxsize=LOCAL_CACHE_MAXSIZE, ttl=local_ttl)
+
+    async def acquire(
+        self,
+        key: str,
+        limit: TokenBucketLimit,
+        notice_key: Optional[str] = None,
+        notice_ttl: int = 0,
+    ) -> tuple[bool, bool]:
+        """Returns whether the event is allowed and whether a denial should be reported."""
+        now = time.monotonic()
+        state = self._local.get(key)
+        debt = 0.0
+
+        if state is not None:
+            tokens = min(limit.capacity, state[0] + (now - state[1]) * limit.rate)
+
+            if tokens - 1 >= limit.capacity * LOCAL_RESERVE_RATIO:
+                state[0], state[1], state[2] = tokens - 1, now, state[2] + 1
+                return True, False
+
+            debt = state[2]
+
+        keys = [key] if notice_key is None else [key, notice_key]
+
+        try:
+            allowed, tokens_left, notify = await self._script(
+                keys=keys,
+                args=[limit.rate, limit.capacity, 1, debt, notice_ttl],
+            )
+        except RedisError as exception:
+            logger.warning(f"Rate limit check for '{key}' skipped: {exception}")
+            return True, False
+
+        self._local[key] = [float(tokens_left), now, 0.0]
+        return bool(allowed), bool(notify)
+
+    async def acquire_all(self, buckets: Sequence[tuple[str, TokenBucketLimit, float]]) -> float:
+        """
+        Takes a token from each (key, limit, reserve) bucket atomically, always in Redis.
+
+        Returns 0 on success, otherwise the number of seconds until all buckets can serve
+        the request while keeping their reserve.
+        """
+        args: list[float] = []
+        for _, limit, reserve in buckets:
+            args.extend((limit.rate, limit.capacity, reserve))
+
+        try:
+            wait = await self._multi_script(keys=[key for key, _, _ in buckets], args=args)
+        except RedisError as exception:
+            logger.warning(
+                f"Rate limit check for {[key for key, _, _ in buckets]} skipped: {exception}"
+            )
+            return 0.0
+
+        return float(wait)
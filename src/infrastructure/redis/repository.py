@@ -12,6 +12,24 @@ T = TypeVar("T", bound=Any)
 
 TX_QUEUE_KEY: Final[str] = "tx_queue"
 
+# Removes and returns up to ARGV[2] members scored at most ARGV[1], so each is taken once
+POP_BY_SCORE_SCRIPT: Final[str] = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #items > 0 then
+    redis.call('ZREM', KEYS[1], unpack(items))
+end
+return items
+"""
+
+# Deletes KEYS[1] only while it still holds ARGV[1], so an expired lock taken over
+# by someone else is left alone
+DELETE_IF_EQUAL_SCRIPT: Final[str] = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
 
 class RedisRepository:
     config: AppConfig
@@ -20,6 +38,8 @@ class RedisRepository:
     def __init__(self, config: AppConfig, client: Redis) -> None:
         self.config = config
         self.client = client
+        self._pop_by_score = client.register_script(POP_BY_SCORE_SCRIPT)
+        self._delete_if_equal = client.register_script(DELETE_IF_EQUAL_SCRIPT)
 
     async def get(
         self,
@@ -44,6 +64,9 @@ class RedisRepository:
     async def delete(self, key: StorageKey) -> None:
         await self.client.delete(key.pack())
 
+    async def delete_if_equal(self, key: StorageKey, value: str) -> bool:
+        return bool(await self._delete_if_equal(keys=[key.pack()], args=[value]))
+
     async def close(self) -> None:
         await self.client.aclose(close_connection_pool=True)
 
@@ -86,6 +109,20 @@ class RedisRepository:
         str_mapping = {str(k): v for k, v in mapping.items()}
         return await cast(Awaitable[int], self.client.zadd(key.pack(), str_mapping))
 
+    async def sorted_collection_add_capped(
+        self,
+        key: StorageKey,
+        mapping: dict[Any, float],
+        max_count: int,
+    ) -> None:
+        str_mapping = {str(k): v for k, v in mapping.items()}
+
+        # Keeps only the highest scored members, in a single round trip
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.zadd(key.pack(), str_mapping)
+            pipe.zremrangebyrank(key.pack(), 0, -(max_count + 1))
+            await pipe.execute()
+
     async def sorted_collection_revrange(self, key: StorageKey, start: int, end: int) -> list[str]:
         items_bytes = await cast(
             Awaitable[list[bytes]], self.client.zrevrange(key.pack(), start, end)
@@ -95,3 +132,32 @@ class RedisRepository:
     async def sorted_collection_remove(self, key: StorageKey, *values: Any) -> int:
         str_values = [str(v) for v in values]
         return await cast(Awaitable[int], self.client.zrem(key.pack(), *str_values))
+
+    async def sorted_collection_score(self, key: StorageKey, value: Any) -> Optional[float]:
+        return await cast(Awaitable[Optional[float]], self.client.zscore(key.pack(), str(value)))
+
+    async def sorted_collection_min_score(self, key: StorageKey) -> Optional[float]:
+        items = await cast(
+            Awaitable[list[tuple[bytes, float]]],
+            self.client.zrange(key.pack(), 0, 0, withscores=True),
+        )
+        return items[0][1] if items else None
+
+    async def sorted_collection_pop_by_score(
+        self,
+        key: StorageKey,
+        max_score: float,
+        count: int,
+    ) -> list[str]:
+        items_bytes = await self._pop_by_score(keys=[key.pack()], args=[max_score, count])
+        return [item.decode() for item in items_bytes]
+
+    async def sorted_collection_remove_by_score(
+        self,
+        key: StorageKey,
+        min_score: float,
+        max_score: float,
+    ) -> int:
+        return await cast(
+            Awaitable[int], self.client.zremrangebyscore(key.pack(), min_score, max_score)
+        )
@@ -1,130 +1,233 @@
 import asyncio
-from typing import cast
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, Optional, cast
+from uuid import UUID
 
 from aiogram import Bot
+from aiogram.types import Message
 from dishka.integrations.taskiq import FromDishka, inject
 from loguru import logger
 
-from src.core.constants import BATCH_DELAY, BATCH_SIZE
-from src.core.enums import BroadcastMessageStatus, BroadcastStatus
-from src.core.utils.iterables import chunked
+from src.bot.session import bulk_sending
+from src.core.constants import BROADCAST_FLUSH_INTERVAL, BROADCAST_FLUSH_SIZE
+from src.core.enums import BroadcastAudience, BroadcastMessageStatus, BroadcastStatus, Locale
 from src.core.utils.message_payload import MessagePayload
 from src.infrastructure.database.models.dto import BroadcastDto, BroadcastMessageDto, UserDto
 from src.infrastructure.taskiq.broker import broker
-from src.services.broadcast import BroadcastService
+from src.services.broadcast import BroadcastSender, BroadcastService
 from src.services.notification import NotificationService
 
 
+def _record_result(message: BroadcastMessageDto, tg_message: Optional[Message]) -> None:
+    if tg_message:
+        message.message_id = tg_message.message_id
+        message.status = BroadcastMessageStatus.SENT
+    else:
+        message.status = BroadcastMessageStatus.FAILED
+        logger.debug(f"Msg FAILED for user '{message.user_id}'")
+
+
+class BroadcastResultBuffer:
+    """Delivery outcomes written in batches together with the broadcast counters."""
+
+    broadcast_id: int
+    broadcast_service: BroadcastService
+    db_lock: asyncio.Lock
+    messages: list[BroadcastMessageDto]
+    flushed_at: float
+
+    def __init__(
+        self,
+        broadcast_id: int,
+        broadcast_service: BroadcastService,
+        db_lock: asyncio.Lock,
+    ) -> None:
+        self.broadcast_id = broadcast_id
+        self.broadcast_service = broadcast_service
+        self.db_lock = db_lock
+        self.messages = []
+        self.flushed_at = time.monotonic()
+
+    def add(self, message: BroadcastMessageDto, tg_message: Optional[Message]) -> bool:
+        """Returns whether the buffer is due to be flushed."""
+        _record_result(message, tg_message)
+        self.messages.append(message)
+        return (
+            len(self.messages) >= BROADCAST_FLUSH_SIZE
+            or time.monotonic() - self.flushed_at >= BROADCAST_FLUSH_INTERVAL
+        )
+
+    async def flush(self) -> None:
+        self.flushed_at = time.monotonic()
+
+        if not self.messages:
+            return
+
+        async with self.db_lock:
+            await self.broadcast_service.save_results(self.broadcast_id, self.messages)
+
+        self.messages.clear()
+
+
+async def _create_pending_messages(
+    broadcast_service: BroadcastService,
+    broadcast_id: int,
+    recipients: list[tuple[int, Locale]],
+) -> list[tuple[UserDto, BroadcastMessageDto]]:
+    messages = await broadcast_service.create_messages(
+        broadcast_id,
+        [
+            BroadcastMessageDto(user_id=telegram_id, status=BroadcastMessageStatus.PENDING)
+            for telegram_id, _ in recipients
+        ],
+    )
+
+    # Only the chat id and locale are needed to render and send the message
+    return [
+        (UserDto(telegram_id=telegram_id, name="", language=language), message)
+        for (telegram_id, language), message in zip(recipients, messages)
+    ]
+
+
+async def _read_chunk(
+    broadcast_service: BroadcastService,
+    broadcast_id: int,
+    chunks: AsyncIterator[list[tuple[int, Locale]]],
+    db_lock: asyncio.Lock,
+) -> Optional[list[tuple[UserDto, BroadcastMessageDto]]]:
+    async with db_lock:
+        recipients = await anext(chunks, None)
+
+        if recipients is None:
+            return None
+
+        return await _create_pending_messages(broadcast_service, broadcast_id, recipients)
+
+
+async def _iter_messages(
+    broadcast_service: BroadcastService,
+    broadcast_id: int,
+    audience: BroadcastAudience,
+    plan_id: Optional[int],
+    db_lock: asyncio.Lock,
+) -> AsyncIterator[tuple[UserDto, BroadcastMessageDto]]:
+    """Streams the audience in chunks, creating the pending message rows chunk by chunk."""
+    async with aclosing(broadcast_service.iter_audience(audience, plan_id)) as chunks:
+        while True:
+            read = asyncio.create_task(
+                _read_chunk(broadcast_service, broadcast_id, chunks, db_lock)
+            )
+
+            try:
+                items = await asyncio.shield(read)
+            except asyncio.CancelledError:
+                # Closing the sender cancels the producer. A query cut off midway would
+                # leave the shared session unusable for the final flush: finish the chunk
+                await asyncio.wait([read])
+                raise
+
+            if items is None:
+                return
+
+            for item in items:
+                yield item
+
+
+def _restart_cancel_watcher(
+    watcher: asyncio.Task[None],
+    broadcast_service: BroadcastService,
+    task_id: UUID,
+) -> asyncio.Task[None]:
+    error = "canceled" if watcher.cancelled() else repr(watcher.exception())
+    logger.error(f"Cancellation watcher of broadcast '{task_id}' failed ({error}), restarting")
+    return asyncio.create_task(broadcast_service.wait_for_cancel(task_id))
+
+
 @broker.task
 @inject
 async def send_broadcast_task(
     broadcast: BroadcastDto,
-    users: list[UserDto],
+    audience: BroadcastAudience,
+    plan_id: Optional[int],
     payload: MessagePayload,
     notification_service: FromDishka[NotificationService],
     broadcast_service: FromDishka[BroadcastService],
 ) -> None:
     broadcast_id = cast(int, broadcast.id)
-    total_users = len(users)
+    total_users = broadcast.total_count
 
     logger.info(f"Started sending broadcast '{broadcast_id}', total users: '{total_users}'")
 
-    try:
-        broadcast_messages = await broadcast_service.create_messages(
-            broadcast_id,
-            [
-                BroadcastMessageDto(user_id=user.telegram_id, status=BroadcastMessageStatus.PENDING)
-                for user in users
-            ],
-        )
-        logger.debug(
-            f"Created '{len(broadcast_messages)}' message DTOs for broadcast '{broadcast_id}'"
-        )
-    except Exception:
-        logger.error(
-            f"Failed to create message DTOs for broadcast '{broadcast_id}'",
-            exc_info=True,
-        )
-        broadcast.status = BroadcastStatus.ERROR
-        await broadcast_service.update(broadcast)
-        return
+    # Audience chunks are read while results are written, both through one DB session
+    db_lock = asyncio.Lock()
+    messages = _iter_messages(broadcast_service, broadcast_id, audience, plan_id, db_lock)
 
-    user_message_pairs = zip(users, broadcast_messages)
+    async def send(item: tuple[UserDto, BroadcastMessageDto]) -> Optional[Message]:
+        return await notification_service.deliver(user=item[0], payload=payload)
 
-    try:
-        total_batches = (total_users + BATCH_SIZE - 1) // BATCH_SIZE
+    sender = BroadcastSender(send=send)
+    results_buffer = BroadcastResultBuffer(broadcast_id, broadcast_service, db_lock)
+    handled = 0
+    canceled = False
 
-        for batch_index, batch in enumerate(chunked(user_message_pairs, BATCH_SIZE)):
-            batch_number = batch_index + 1
-            batch_size = len(batch)
+    # Watches for cancellation in the background, so checking it per result is free
+    cancel_watcher = asyncio.create_task(broadcast_service.wait_for_cancel(broadcast.task_id))
 
-            logger.info(
-                f"Processing broadcast '{broadcast_id}' batch "
-                f"{batch_number}/{total_batches}, size: '{batch_size}'"
-            )
-
-            for user, message in batch:
-                user_id = user.telegram_id
-
-                status = await broadcast_service.get_status(broadcast.task_id)
-
-                if status == BroadcastStatus.CANCELED:
-                    logger.warning(f"Broadcast '{broadcast_id}' canceled, terminating task")
-                    broadcast.status = BroadcastStatus.CANCELED
-                    await broadcast_service.update(broadcast)
-                    return
-
-                try:
-                    tg_message = await notification_service.notify_user(user=user, payload=payload)
-
-                    if tg_message:
-                        message.message_id = tg_message.message_id
-                        message.status = BroadcastMessageStatus.SENT
-                        broadcast.success_count += 1
-                        logger.debug(
-                            f"Msg SENT to user '{user_id}' "
-                            f"(ID: '{tg_message.message_id}') for broadcast '{broadcast_id}'"
-                        )
-                    else:
-                        message.status = BroadcastMessageStatus.FAILED
-                        broadcast.failed_count += 1
-                        logger.debug(
-                            f"Msg FAILED for user '{user_id}' on broadcast '{broadcast_id}'"
+    try:
+        with bulk_sending():
+            try:
+                async with aclosing(sender.run(messages)) as results:
+                    async for (_, message), tg_message in results:
+                        handled += 1
+                        flush_due = results_buffer.add(message, tg_message)
+
+                        if cancel_watcher.done():
+                            # Only a clean return means the broadcast was canceled
+                            if cancel_watcher.cancelled() or cancel_watcher.exception() is not None:
+                                cancel_watcher = _restart_cancel_watcher(
+                                    cancel_watcher,
+                                    broadcast_service,
+                                    broadcast.task_id,
+                                )
+                            else:
+                                canceled = True
+                                break
+
+                        if not flush_due:
+                            continue
+
+                        await results_buffer.flush()
+                        logger.info(
+                            f"Broadcast '{broadcast_id}' progress: {handled}/{total_users}, "
+                            f"rate '{sender.rate.rate:.1f}' msg/s"
                         )
-                except Exception:
-                    message.status = BroadcastMessageStatus.FAILED
-                    broadcast.failed_count += 1
-                    logger.error(
-                        f"Exception notifying user '{user_id}' for broadcast '{broadcast_id}'",
-                        exc_info=True,
-                    )
-
-                try:
-                    await broadcast_service.update_message(broadcast_id, message)
-                except Exception:
-                    logger.error(
-                        f"Failed to update message status for user '{user_id}', "
-                        f"broadcast '{broadcast_id}'",
-                        exc_info=True,
-                    )
-
-            await asyncio.sleep(BATCH_DELAY)
-            await broadcast_service.update(broadcast)
-
-        broadcast.status = BroadcastStatus.COMPLETED
-        await broadcast_service.update(broadcast)
+            except asyncio.CancelledError:
+                # The producer never stops mid-query, so outcomes already known are not lost
+                await asyncio.shield(results_buffer.flush())
+                raise
+            finally:
+                cancel_watcher.cancel()
+
+        await results_buffer.flush()
+        status = BroadcastStatus.CANCELED if canceled else BroadcastStatus.COMPLETED
+        # Stored right away when canceled from the dashboard, writing it again is a no-op
+        await broadcast_service.finish(broadcast.task_id, status)
         logger.info(
-            f"Broadcast '{broadcast_id}' COMPLETED. "
-            f"Success: '{broadcast.success_count}', Failed: ''{broadcast.failed_count}"
+            f"Broadcast '{broadcast_id}' {status.value}. "
+            f"Success: '{sender.stats.sent}', Failed: '{sender.stats.failed}', "
+            f"stats: {sender.stats.as_dict()}"
         )
 
     except Exception:
         logger.error(
-            f"Unhandled exception during broadcast '{broadcast_id}' execution",
+            f"Unhandled exception during broadcast '{broadcast_id}' execution. "
+            f"Discarding '{len(results_buffer.messages)}' unsaved results",
             exc_info=True,
         )
-        broadcast.status = BroadcastStatus.ERROR
-        await broadcast_service.update(broadcast)
+        # The session may be broken: drop its transaction and store the status separately
+        await broadcast_service.uow.rollback()
+        await broadcast_service.finish(broadcast.task_id, BroadcastStatus.ERROR)
 
 
 @broker.task
@@ -1,12 +1,13 @@
 import asyncio
-from typing import Any, Union, cast
+import time
+from typing import Any, Optional, Union, cast
 
-from aiogram.types import BufferedInputFile
 from dishka.integrations.taskiq import FromDishka, inject
 
 from src.bot.keyboards import get_buy_keyboard, get_renew_keyboard
-from src.core.constants import BATCH_DELAY, BATCH_SIZE
-from src.core.enums import MediaType, SystemNotificationType, UserNotificationType
+from src.bot.session import bulk_sending
+from src.core.constants import BATCH_DELAY, BATCH_SIZE, TIME_1M
+from src.core.enums import SystemNotificationType, UserNotificationType
 from src.core.utils.iterables import chunked
 from src.core.utils.message_payload import MessagePayload
 from src.core.utils.types import RemnaUserDto
@@ -53,13 +54,19 @@ async def send_error_notification_task(
     payload: MessagePayload,
     notification_service: FromDishka[NotificationService],
 ) -> None:
-    file_data = BufferedInputFile(
-        file=traceback_str.encode(),
-        filename=f"error_{error_id}.txt",
+    await notification_service.notify_error(
+        error_id=error_id,
+        traceback_str=traceback_str,
+        payload=payload,
     )
-    payload.media = file_data
-    payload.media_type = MediaType.DOCUMENT
-    await notification_service.notify_super_dev(payload=payload)
+
+
+@broker.task(schedule=[{"cron": "* * * * *"}])
+@inject
+async def send_error_digests_task(
+    notification_service: FromDishka[NotificationService],
+) -> None:
+    await notification_service.send_error_digests()
 
 
 @broker.task
@@ -82,18 +89,47 @@ async def send_access_opened_notifications_task(
     user_service: FromDishka[UserService],
     notification_service: FromDishka[NotificationService],
 ) -> None:
-    for batch in chunked(waiting_user_ids, BATCH_SIZE):
-        for user_telegram_id in batch:
-            user = await user_service.get(user_telegram_id)
-            await notification_service.notify_user(
-                user=user,
-                payload=MessagePayload(
-                    i18n_key="ntf-access-allowed",
-                    auto_delete_after=None,
-                    add_close_button=True,
-                ),
-            )
-        await asyncio.sleep(BATCH_DELAY)
+    with bulk_sending():
+        for batch in chunked(waiting_user_ids, BATCH_SIZE):
+            for user_telegram_id in batch:
+                user = await user_service.get(user_telegram_id)
+                await notification_service.notify_user(
+                    user=user,
+                    payload=MessagePayload(
+                        i18n_key="ntf-access-allowed",
+                        auto_delete_after=None,
+                        add_close_button=True,
+                    ),
+                )
+            await asyncio.sleep(BATCH_DELAY)
+
+
+@broker.task(schedule=[{"cron": "* * * * *"}])
+@inject
+async def resend_deferred_notifications_task(
+    notification_service: FromDishka[NotificationService],
+    lock_token: Optional[str] = None,
+) -> None:
+    # Kicked off with the lock already taken, scheduled runs have to take it themselves
+    if lock_token is None:
+        lock_token = await notification_service.acquire_deferred_lock()
+
+        if lock_token is None:
+            return
+
+    # Keeps draining while the next deferred message is due within a minute,
+    # later ones are picked up by the next scheduled run
+    try:
+        while True:
+            await notification_service.resend_deferred()
+            next_at = await notification_service.get_next_deferred_at()
+
+            if next_at is None or next_at - time.time() > TIME_1M:
+                break
+
+            await asyncio.sleep(max(0.0, next_at - time.time()))
+    finally:
+        await notification_service.release_deferred_lock(lock_token)
 
 
 @broker.task
@@ -135,17 +171,18 @@ async def send_subscription_expire_notification_task(
     i18n_kwargs_extra.update({"is_trial": user.current_subscription.is_trial})
     keyboard = get_buy_keyboard() if user.current_subscription.is_trial else get_renew_keyboard()
 
-    await notification_service.notify_user(
-        user=user,
-        payload=MessagePayload(
-            i18n_key=i18n_key,
-            i18n_kwargs={**i18n_kwargs, **i18n_kwargs_extra},
-            reply_markup=keyboard,
-            auto_delete_after=None,
-            add_close_button=True,
-        ),
-        ntf_type=ntf_type,
-    )
+    with bulk_sending():
+        await notification_service.notify_user(
+            user=user,
+            payload=MessagePayload(
+                i18n_key=i18n_key,
+                i18n_kwargs={**i18n_kwargs, **i18n_kwargs_extra},
+                reply_markup=keyboard,
+                auto_delete_after=None,
+                add_close_button=True,
+            ),
+            ntf_type=ntf_type,
+        )
 
 
 @broker.task
@@ -1,10 +1,12 @@
 from dishka.integrations.aiogram import setup_dishka as setup_aiogram_dishka
 from dishka.integrations.taskiq import setup_dishka as setup_taskiq_dishka
+from taskiq import TaskiqEvents, TaskiqState
 from taskiq_redis import RedisStreamBroker
 
 from src.bot.dispatcher import create_bg_manager_factory, create_dispatcher, setup_dispatcher
 from src.core.config import AppConfig
 from src.core.logger import setup_logger
+from src.core.stats import stats_reporter
 from src.infrastructure.di import create_container
 
 from .broker import broker
@@ -22,4 +24,15 @@ def worker() -> RedisStreamBroker:
     setup_taskiq_dishka(container=container, broker=broker)
     setup_aiogram_dishka(container=container, router=dispatcher, auto_inject=True)
 
+    broker.add_event_handler(TaskiqEvents.WORKER_STARTUP, _start_stats_reporter)
+    broker.add_event_handler(TaskiqEvents.WORKER_SHUTDOWN, _stop_stats_reporter)
+
     return broker
+
+
+async def _start_stats_reporter(state: TaskiqState) -> None:
+    stats_reporter.start()
+
+
+async def _stop_stats_reporter(state: TaskiqState) -> None:
+    await stats_reporter.stop()
@@ -14,7 +14,9 @@ from loguru import logger
 from src.__version__ import __version__
 from src.api.endpoints import TelegramWebhookEndpoint
 from src.core.enums import SystemNotificationType
+from src.core.stats import stats_reporter
 from src.core.utils.message_payload import MessagePayload
+from src.infrastructure.redis import RedisRepository
 from src.infrastructure.taskiq.tasks.notifications import (
     send_error_notification_task,
     send_remnashop_notification_task,
@@ -22,9 +24,11 @@ from src.infrastructure.taskiq.tasks.notifications import (
 )
 from src.infrastructure.taskiq.tasks.updates import check_bot_update
 from src.services.command import CommandService
+from src.services.notification import message_deletion_sweeper
 from src.services.payment_gateway import PaymentGatewayService
 from src.services.remnawave import RemnawaveService
 from src.services.settings import SettingsService
+from src.services.user import profile_sync_buffer
 from src.services.webhook import WebhookService
 
 
@@ -63,6 +67,8 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     await telegram_webhook_endpoint.startup()
 
     bot: Bot = await container.get(Bot)
+    message_deletion_sweeper.start(bot, await container.get(RedisRepository))
+    stats_reporter.start()
     bot_info = await bot.get_me()
     states: dict[Optional[bool], str] = {True: "Enabled", False: "Disabled", None: "Unknown"}
 
@@ -123,6 +129,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     )
 
     await telegram_webhook_endpoint.shutdown()
+    await profile_sync_buffer.close()
+    await message_deletion_sweeper.stop()
+    await stats_reporter.stop()
     await command_service.delete()
     await webhook_service.delete()
 
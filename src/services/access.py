@@ -1,5 +1,9 @@
+import time
+from typing import Final
+
 from aiogram import Bot
-from aiogram.types import CallbackQuery, TelegramObject
+from aiogram.enums import ChatMemberStatus
+from aiogram.types import CallbackQuery, Chat, TelegramObject
 from aiogram.types import User as AiogramUser
 from aiogram_dialog.utils import remove_intent_id
 from fluentogram import TranslatorHub
@@ -9,8 +13,8 @@ from redis.asyncio import Redis
 from src.core.config import AppConfig
 from src.core.constants import PURCHASE_PREFIX
 from src.core.enums import AccessMode
-from src.core.storage.keys import AccessWaitListKey
-from src.infrastructure.database.models.dto import UserDto
+from src.core.storage.keys import AccessWaitListKey, ChannelMembersKey
+from src.infrastructure.database.models.dto import SettingsDto, UserDto
 from src.infrastructure.redis.repository import RedisRepository
 from src.infrastructure.taskiq.tasks.notifications import (
     send_access_denied_notification_task,
@@ -19,15 +23,23 @@ from src.infrastructure.taskiq.tasks.notifications import (
 from src.infrastructure.taskiq.tasks.redirects import redirect_to_main_menu_task
 from src.services.referral import ReferralService
 from src.services.settings import SettingsService
+from src.services.update_context import UpdateContext
 from src.services.user import UserService
 
 from .base import BaseService
 
+CHANNEL_MEMBER_STATUSES: Final[tuple[ChatMemberStatus, ...]] = (
+    ChatMemberStatus.CREATOR,
+    ChatMemberStatus.ADMINISTRATOR,
+    ChatMemberStatus.MEMBER,
+)
+
 
 class AccessService(BaseService):
     settings_service: SettingsService
     user_service: UserService
     referral_service: ReferralService
+    update_context: UpdateContext
 
     def __init__(
         self,
@@ -40,15 +52,17 @@ class AccessService(BaseService):
         settings_service: SettingsService,
         user_service: UserService,
         referral_service: ReferralService,
+        update_context: UpdateContext,
     ) -> None:
         super().__init__(config, bot, redis_client, redis_repository, translator_hub)
         self.settings_service = settings_service
         self.user_service = user_service
         self.referral_service = referral_service
+        self.update_context = update_context
 
     async def is_access_allowed(self, aiogram_user: AiogramUser, event: TelegramObject) -> bool:  # noqa: C901
-        user = await self.user_service.get(aiogram_user.id)
-        mode = await self.settings_service.get_access_mode()
+        user = await self.update_context.get_user(aiogram_user.id)
+        mode = await self.update_context.get_access_mode()
 
         if not user:
             if mode == AccessMode.INVITED and await self.referral_service.is_referral_event(
@@ -179,6 +193,42 @@ class AccessService(BaseService):
         await self.redis_repository.delete(key=AccessWaitListKey())
         logger.info("Access waitlist completely cleared")
 
+    async def is_channel_member(self, telegram_id: int) -> bool:
+        expires_at = await self.redis_repository.sorted_collection_score(
+            key=ChannelMembersKey(),
+            value=telegram_id,
+        )
+        return expires_at is not None and expires_at > time.time()
+
+    async def set_channel_member(self, telegram_id: int) -> None:
+        now = time.time()
+        key = ChannelMembersKey()
+
+        await self.redis_repository.sorted_collection_add(
+            key,
+            {telegram_id: now + self.config.bot.channel_member_ttl},
+        )
+        await self.redis_repository.sorted_collection_remove_by_score(key, 0, now)
+        logger.debug(f"User '{telegram_id}' channel membership cached")
+
+    async def remove_channel_member(self, telegram_id: int) -> None:
+        await self.redis_repository.sorted_collection_remove(ChannelMembersKey(), telegram_id)
+        logger.debug(f"User '{telegram_id}' channel membership reset")
+
+    async def clear_channel_members(self) -> None:
+        await self.redis_repository.delete(key=ChannelMembersKey())
+        logger.info("Channel membership cache cleared")
+
+    def is_required_channel(self, chat: Chat, settings: SettingsDto) -> bool:
+        if settings.channel_id and chat.id == settings.channel_id:
+            return True
+
+        if settings.channel_has_username and chat.username:
+            username = settings.channel_link.get_secret_value().removeprefix("@")
+            return chat.username.lower() == username.lower()
+
+        return False
+
     async def _can_add_to_waitlist(self, telegram_id: int) -> bool:
         is_member = await self.redis_repository.collection_is_member(
             key=AccessWaitListKey(),
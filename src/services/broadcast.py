@@ -1,27 +1,267 @@
-from typing import Optional
+import asyncio
+import time
+from typing import AsyncGenerator, AsyncIterable, Awaitable, Callable, Generic, Optional, TypeVar
 from uuid import UUID
 
 from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.types import Message
 from fluentogram import TranslatorHub
 from loguru import logger
 from redis.asyncio import Redis
-from sqlalchemy import and_
+from redis.exceptions import RedisError
+from sqlalchemy import ColumnElement, and_, select
+from sqlalchemy.exc import SQLAlchemyError
 
 from src.core.config import AppConfig
+from src.core.constants import (
+    BROADCAST_AUDIENCE_CHUNK,
+    BROADCAST_CANCEL_CHECK_INTERVAL,
+    BROADCAST_CANCEL_DB_CHECK_INTERVAL,
+    BROADCAST_MAX_ATTEMPTS,
+    BROADCAST_MAX_FLOOD_WAITS,
+    BROADCAST_MAX_RATE,
+    BROADCAST_MIN_RATE,
+    BROADCAST_RATE_BACKOFF,
+    BROADCAST_RATE_STEP,
+    BROADCAST_WORKERS,
+    NOTIFICATION_BACKOFF_BASE,
+    TIME_1D,
+)
 from src.core.enums import (
     BroadcastAudience,
+    BroadcastMessageStatus,
     BroadcastStatus,
+    Locale,
     PlanAvailability,
     SubscriptionStatus,
 )
+from src.core.storage.keys import BroadcastCancelKey
 from src.infrastructure.database import UnitOfWork
-from src.infrastructure.database.models.dto import BroadcastDto, BroadcastMessageDto, UserDto
-from src.infrastructure.database.models.sql import Broadcast, BroadcastMessage, Subscription, User
+from src.infrastructure.database.models.dto import BroadcastDto, BroadcastMessageDto
+from src.infrastructure.database.models.sql import Broadcast, Subscription, User
 from src.infrastructure.database.models.sql.plan import Plan
 from src.infrastructure.redis import RedisRepository
 
 from .base import BaseService
 
+T = TypeVar("T")
+
+
+class BroadcastStats:
+    sent: int
+    failed: int
+    blocked: int
+    rate_limited: int
+    retries: int
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.sent = 0
+        self.failed = 0
+        self.blocked = 0
+        self.rate_limited = 0
+        self.retries = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "blocked": self.blocked,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+        }
+
+
+class AdaptiveRate:
+    """
+    Paces message starts and adjusts the pace from flood control feedback.
+
+    The rate grows by rate_step messages/s for every second of successful sending and
+    is cut by backoff on a 429, when all senders also pause for the retry_after period.
+    """
+
+    rate: float
+    min_rate: float
+    max_rate: float
+    rate_step: float
+    backoff: float
+    _next_at: float
+    _paused_until: float
+
+    def __init__(
+        self,
+        rate: float = BROADCAST_MAX_RATE,
+        min_rate: float = BROADCAST_MIN_RATE,
+        max_rate: float = BROADCAST_MAX_RATE,
+        rate_step: float = BROADCAST_RATE_STEP,
+        backoff: float = BROADCAST_RATE_BACKOFF,
+    ) -> None:
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate_step = rate_step
+        self.backoff = backoff
+        self._next_at = 0.0
+        self._paused_until = 0.0
+
+    async def wait(self) -> None:
+        now = time.monotonic()
+        start_at = max(now, self._next_at, self._paused_until)
+        self._next_at = start_at + 1 / self.rate
+
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+    def on_success(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.rate_step / self.rate)
+
+    def on_retry_after(self, retry_after: float) -> None:
+        now = time.monotonic()
+
+        # Requests already in flight report the same flood wait, count it once
+        if now >= self._paused_until:
+            self.rate = max(self.min_rate, self.rate * self.backoff)
+            logger.warning(
+                f"Broadcast flood control: pausing for '{retry_after}' seconds, "
+                f"rate lowered to '{self.rate:.1f}' msg/s"
+            )
+
+        self._paused_until = max(self._paused_until, now + retry_after)
+
+
+class BroadcastSender(Generic[T]):
+    """
+    Sends a broadcast through a bounded pool of concurrent workers.
+
+    Items are pulled lazily from the source and results are yielded as they complete,
+    so both sides stay bounded by a few times the number of workers. Sends are paced by
+    AdaptiveRate. Flood-controlled sends are retried by the same worker after the pause
+    up to BROADCAST_MAX_FLOOD_WAITS times, network and server errors up to
+    BROADCAST_MAX_ATTEMPTS times.
+    """
+
+    send: Callable[[T], Awaitable[Optional[Message]]]
+    workers: int
+    rate: AdaptiveRate
+    stats: BroadcastStats
+
+    def __init__(
+        self,
+        send: Callable[[T], Awaitable[Optional[Message]]],
+        workers: int = BROADCAST_WORKERS,
+        rate: Optional[AdaptiveRate] = None,
+    ) -> None:
+        self.send = send
+        self.workers = workers
+        self.rate = rate or AdaptiveRate()
+        self.stats = BroadcastStats()
+
+    async def run(
+        self,
+        items: AsyncIterable[T],
+    ) -> AsyncGenerator[tuple[T, Optional[Message]], None]:
+        pending: asyncio.Queue[Optional[T]] = asyncio.Queue(maxsize=self.workers * 2)
+        results: asyncio.Queue[Optional[tuple[T, Optional[Message]]]] = asyncio.Queue(
+            maxsize=self.workers * 2
+        )
+        tasks = [asyncio.create_task(self._produce(items, pending))]
+        tasks.extend(asyncio.create_task(self._work(pending, results)) for _ in range(self.workers))
+        running = self.workers
+
+        try:
+            while running:
+                result = await results.get()
+
+                if result is None:
+                    running -= 1
+                    continue
+
+                yield result
+
+            await tasks[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _produce(self, items: AsyncIterable[T], pending: asyncio.Queue[Optional[T]]) -> None:
+        try:
+            async for item in items:
+                await pending.put(item)
+        finally:
+            task = asyncio.current_task()
+
+            # On failure workers still drain what was queued; on cancellation they are gone
+            if task is None or not task.cancelling():
+                for _ in range(self.workers):
+                    await pending.put(None)
+
+    async def _work(
+        self,
+        pending: asyncio.Queue[Optional[T]],
+        results: asyncio.Queue[Optional[tuple[T, Optional[Message]]]],
+    ) -> None:
+        while (item := await pending.get()) is not None:
+            await results.put((item, await self._send(item)))
+
+        await results.put(None)
+
+    async def _send(self, item: T) -> Optional[Message]:
+        failures = 0
+        flood_waits = 0
+
+        while failures < BROADCAST_MAX_ATTEMPTS:
+            await self.rate.wait()
+
+            try:
+                message = await self.send(item)
+            except TelegramRetryAfter as exception:
+                self.stats.rate_limited += 1
+                self.rate.on_retry_after(exception.retry_after)
+                flood_waits += 1
+
+                # A chat that keeps answering with flood waits must not hold the worker
+                if flood_waits >= BROADCAST_MAX_FLOOD_WAITS:
+                    logger.warning(f"Broadcast send gave up after '{flood_waits}' flood waits")
+                    break
+
+                self.stats.retries += 1
+                continue
+            except TelegramForbiddenError:
+                self.stats.blocked += 1
+                self.stats.failed += 1
+                return None
+            except (TelegramNetworkError, TelegramServerError) as exception:
+                failures += 1
+                self.stats.retries += 1
+                logger.warning(f"Broadcast send failed, attempt '{failures}': {exception}")
+                await asyncio.sleep(NOTIFICATION_BACKOFF_BASE * 2**failures)
+                continue
+            except Exception as exception:
+                self.stats.failed += 1
+                logger.error(f"Broadcast send failed: {exception}")
+                return None
+
+            if message is None:
+                self.stats.failed += 1
+                return None
+
+            self.rate.on_success()
+            self.stats.sent += 1
+            return message
+
+        self.stats.failed += 1
+        return None
+
 
 class BroadcastService(BaseService):
     uow: UnitOfWork
@@ -52,11 +292,7 @@ class BroadcastService(BaseService):
         messages: list[BroadcastMessageDto],
     ) -> list[BroadcastMessageDto]:
         db_messages = [
-            BroadcastMessage(
-                broadcast_id=broadcast_id,
-                user_id=m.user_id,
-                status=m.status,
-            )
+            {"broadcast_id": broadcast_id, "user_id": m.user_id, "status": m.status}
             for m in messages
         ]
         db_created_messages = await self.uow.repository.broadcasts.create_messages(db_messages)
@@ -92,6 +328,27 @@ class BroadcastService(BaseService):
 
         return BroadcastDto.from_model(db_updated_broadcast)
 
+    async def finish(self, task_id: UUID, status: BroadcastStatus) -> bool:
+        """
+        Stores the final status in its own transaction, independent of the request session.
+
+        Only a broadcast that is still PROCESSING (or already has this status) is updated,
+        so a cancellation and the task finishing can not overwrite each other.
+        """
+        async with UnitOfWork(self.uow.session_pool) as uow:
+            updated = await uow.repository.broadcasts.update_status(
+                task_id,
+                status,
+                expected=(BroadcastStatus.PROCESSING, status),
+            )
+
+        if updated:
+            logger.info(f"Broadcast '{task_id}' finished with status '{status.value}'")
+        else:
+            logger.warning(f"Broadcast '{task_id}' already finished, '{status.value}' not stored")
+
+        return updated
+
     async def update_message(self, broadcast_id: int, message: BroadcastMessageDto) -> None:
         await self.uow.repository.broadcasts.update_message(
             broadcast_id=broadcast_id,
@@ -99,12 +356,78 @@ class BroadcastService(BaseService):
             **message.changed_data,
         )
 
+    async def save_results(self, broadcast_id: int, messages: list[BroadcastMessageDto]) -> None:
+        """Stores delivery outcomes and adds them to the counters in one transaction."""
+        if not messages:
+            return
+
+        success = sum(1 for m in messages if m.status == BroadcastMessageStatus.SENT)
+        await self.uow.repository.broadcasts.update_messages(
+            [{"id": m.id, "message_id": m.message_id, "status": m.status} for m in messages]
+        )
+        await self.uow.repository.broadcasts.increment_counters(
+            broadcast_id,
+            success=success,
+            failed=len(messages) - success,
+        )
+        await self.uow.commit()
+
     async def delete_broadcast(self, broadcast_id: int) -> None:
         await self.uow.repository.broadcasts._delete(Broadcast, Broadcast.id == broadcast_id)
 
-    async def get_status(self, task_id: UUID) -> Optional[BroadcastStatus]:
-        db_broadcast = await self.uow.repository.broadcasts.get(task_id)
-        return db_broadcast.status if db_broadcast else None
+    async def request_cancel(self, task_id: UUID) -> None:
+        """Tells the running task to stop right away; the status is stored by finish()."""
+        try:
+            await self.redis_client.set(
+                BroadcastCancelKey(task_id=str(task_id)).pack(),
+                1,
+                ex=TIME_1D,
+            )
+        except RedisError as exception:
+            # The task still notices the stored status, only later
+            logger.warning(f"Failed to signal cancellation of broadcast '{task_id}': {exception}")
+            return
+
+        logger.info(f"Requested cancellation of broadcast '{task_id}'")
+
+    async def wait_for_cancel(self, task_id: UUID) -> None:
+        """
+        Returns once the broadcast has been canceled.
+
+        The Redis flag is the fast path; the stored status is checked every
+        BROADCAST_CANCEL_DB_CHECK_INTERVAL in case the flag was lost.
+        """
+        key = BroadcastCancelKey(task_id=str(task_id)).pack()
+        checked_at = time.monotonic()
+
+        while True:
+            try:
+                if await self.redis_client.exists(key):
+                    await self.redis_client.delete(key)
+                    return
+            except RedisError as exception:
+                logger.warning(
+                    f"Failed to check cancellation of broadcast '{task_id}': {exception}"
+                )
+
+            if time.monotonic() - checked_at >= BROADCAST_CANCEL_DB_CHECK_INTERVAL:
+                checked_at = time.monotonic()
+
+                if await self._is_canceled(task_id):
+                    return
+
+            await asyncio.sleep(BROADCAST_CANCEL_CHECK_INTERVAL)
+
+    async def _is_canceled(self, task_id: UUID) -> bool:
+        # Own session: the task's session is busy with the audience and the results
+        try:
+            async with UnitOfWork(self.uow.session_pool) as uow:
+                status = await uow.repository.broadcasts.get_status(task_id)
+        except SQLAlchemyError as exception:
+            logger.warning(f"Failed to read status of broadcast '{task_id}': {exception}")
+            return False
+
+        return status == BroadcastStatus.CANCELED
 
     #
 
@@ -115,23 +438,7 @@ class BroadcastService(BaseService):
     ) -> int:
         logger.debug(f"Counting audience '{audience}' for plan '{plan_id}'")
 
-        is_not_block = and_(
-            User.is_blocked.is_(False),
-            User.is_bot_blocked.is_(False),
-        )
-
-        if audience == BroadcastAudience.PLAN:
-            if plan_id:
-                db_subs = await self.uow.repository.subscriptions.filter_by_plan_id(plan_id)
-                active_subs = [
-                    s
-                    for s in db_subs
-                    if s.status == SubscriptionStatus.ACTIVE
-                    and not s.user.is_blocked
-                    and not s.user.is_bot_blocked
-                ]
-                return len(active_subs)
-
+        if audience == BroadcastAudience.PLAN and not plan_id:
             count = await self.uow.repository.plans._count(
                 Plan,
                 Plan.availability != PlanAvailability.TRIAL,
@@ -139,98 +446,74 @@ class BroadcastService(BaseService):
             logger.debug(f"Audience count for '{audience}' (plan={plan_id}) is '{count}'")
             return count
 
-        if audience == BroadcastAudience.ALL:
-            return await self.uow.repository.users._count(User, is_not_block)
-
-        if audience == BroadcastAudience.SUBSCRIBED:
-            conditions = and_(
-                is_not_block,
-                User.current_subscription.has(Subscription.status == SubscriptionStatus.ACTIVE),
-            )
-            return await self.uow.repository.users._count(User, conditions)
+        conditions = self._get_audience_conditions(audience, plan_id)
+        return await self.uow.repository.users._count(User, conditions)
 
-        if audience == BroadcastAudience.UNSUBSCRIBED:
-            conditions = and_(
-                is_not_block,
-                User.current_subscription_id.is_(None),
+    async def iter_audience(
+        self,
+        audience: BroadcastAudience,
+        plan_id: Optional[int] = None,
+        chunk_size: int = BROADCAST_AUDIENCE_CHUNK,
+    ) -> AsyncGenerator[list[tuple[int, Locale]], None]:
+        logger.debug(f"Streaming users for audience '{audience}', plan_id: {plan_id}")
+
+        conditions = self._get_audience_conditions(audience, plan_id)
+        last_telegram_id: Optional[int] = None
+
+        while True:
+            recipients = await self.uow.repository.users.get_recipients(
+                conditions,
+                after_telegram_id=last_telegram_id,
+                limit=chunk_size,
             )
-            return await self.uow.repository.users._count(User, conditions)
 
-        if audience == BroadcastAudience.EXPIRED:
-            conditions = and_(
-                is_not_block,
-                User.current_subscription.has(Subscription.status == SubscriptionStatus.EXPIRED),
-            )
-            return await self.uow.repository.users._count(User, conditions)
+            if recipients:
+                yield recipients
 
-        if audience == BroadcastAudience.TRIAL:
-            conditions = and_(
-                is_not_block,
-                User.current_subscription.has(Subscription.is_trial.is_(True)),
-            )
-            return await self.uow.repository.users._count(User, conditions)
+            if len(recipients) < chunk_size:
+                return
 
-        raise Exception(f"Unknown broadcast audience: {audience}")
+            last_telegram_id = recipients[-1][0]
 
-    async def get_audience_users(
+    def _get_audience_conditions(
         self,
         audience: BroadcastAudience,
         plan_id: Optional[int] = None,
-    ) -> list[UserDto]:
-        logger.debug(f"Retrieving users for audience '{audience}', plan_id: {plan_id}")
-
+    ) -> ColumnElement[bool]:
         is_not_block = and_(
             User.is_blocked.is_(False),
             User.is_bot_blocked.is_(False),
         )
 
         if audience == BroadcastAudience.PLAN and plan_id:
-            db_subscriptions = await self.uow.repository.subscriptions.filter_by_plan_id(plan_id)
-            active_subs = [
-                s
-                for s in db_subscriptions
-                if s.status == SubscriptionStatus.ACTIVE
-                and not s.user.is_blocked
-                and not s.user.is_bot_blocked
-            ]
-            user_ids = [sub.user_telegram_id for sub in active_subs]
-            db_users = await self.uow.repository.users.get_by_ids(telegram_ids=user_ids)
-            logger.debug(
-                f"Retrieved '{len(db_users)}' users for audience '{audience}' (plan={plan_id})"
+            plan_users = select(Subscription.user_telegram_id).where(
+                Subscription.plan["id"].as_integer() == plan_id,
+                Subscription.status == SubscriptionStatus.ACTIVE,
             )
-            return UserDto.from_model_list(db_users)
+            return and_(is_not_block, User.telegram_id.in_(plan_users))
 
         if audience == BroadcastAudience.ALL:
-            db_users = await self.uow.repository.users._get_many(User, is_not_block)
-            return UserDto.from_model_list(db_users)
+            return is_not_block
 
         if audience == BroadcastAudience.SUBSCRIBED:
-            conditions = and_(
+            return and_(
                 is_not_block,
                 User.current_subscription.has(Subscription.status == SubscriptionStatus.ACTIVE),
             )
-            db_users = await self.uow.repository.users._get_many(User, conditions)
-            return UserDto.from_model_list(db_users)
 
         if audience == BroadcastAudience.UNSUBSCRIBED:
-            conditions = and_(is_not_block, User.current_subscription_id.is_(None))
-            db_users = await self.uow.repository.users._get_many(User, conditions)
-            return UserDto.from_model_list(db_users)
+            return and_(is_not_block, User.current_subscription_id.is_(None))
 
         if audience == BroadcastAudience.EXPIRED:
-            conditions = and_(
+            return and_(
                 is_not_block,
                 User.current_subscription.has(Subscription.status == SubscriptionStatus.EXPIRED),
             )
-            db_users = await self.uow.repository.users._get_many(User, conditions)
-            return UserDto.from_model_list(db_users)
 
         if audience == BroadcastAudience.TRIAL:
-            conditions = and_(
+            return and_(
                 is_not_block,
                 User.current_subscription.has(Subscription.is_trial.is_(True)),
             )
-            db_users = await self.uow.repository.users._get_many(User, conditions)
-            return UserDto.from_model_list(db_users)
 
         raise Exception(f"Unknown broadcast audience: {audience}")
@@ -1,26 +1,71 @@
 import asyncio
-from typing import Any, Optional, cast
+import hashlib
+import re
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Final, Optional, Union, cast
 
 from aiogram import Bot
-from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message, ReplyKeyboardMarkup
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.types import (
+    BufferedInputFile,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    Message,
+    ReplyKeyboardMarkup,
+)
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from fluentogram import TranslatorHub
 from loguru import logger
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
 from src.__version__ import __version__
 from src.bot.keyboards import get_remnashop_keyboard
 from src.bot.states import Notification
 from src.core.config import AppConfig
+from src.core.constants import (
+    DELETE_MESSAGES_LIMIT,
+    ERROR_DIGEST_BATCH,
+    ERROR_DIGEST_WINDOW,
+    ERROR_FINGERPRINT_FRAMES,
+    MESSAGE_DELETION_BATCH,
+    MESSAGE_DELETION_INTERVAL,
+    NOTIFICATION_BACKOFF_BASE,
+    NOTIFICATION_BACKOFF_MAX,
+    NOTIFICATION_MAX_REQUEUES,
+    NOTIFICATION_NETWORK_RETRIES,
+    TIME_1M,
+    TIME_5M,
+)
 from src.core.enums import (
     Locale,
+    MediaType,
     MessageEffect,
     SystemNotificationType,
     UserNotificationType,
     UserRole,
 )
 from src.core.i18n.translator import get_translated_kwargs
+from src.core.stats import stats_reporter
+from src.core.storage.keys import (
+    DeferredNotificationsKey,
+    DeferredNotificationsLockKey,
+    ErrorDigestKey,
+    ErrorDigestQueueKey,
+    ErrorWindowKey,
+    MessageDeletionQueueKey,
+)
+from src.core.utils import json_utils
 from src.core.utils.formatters import i18n_postprocess_text
+from src.core.utils.iterables import chunked
 from src.core.utils.message_payload import MessagePayload
 from src.core.utils.types import AnyKeyboard
 from src.infrastructure.database.models.dto import UserDto
@@ -30,6 +75,171 @@ from src.services.settings import SettingsService
 from .base import BaseService
 from .user import UserService
 
+TRACEBACK_FRAME_PATTERN: Final[re.Pattern[str]] = re.compile(r'^\s*File "(.+)", line \d+, in (.+)$')
+
+# KEYS: window, digest, digest queue; ARGV: window (s), now, fingerprint, sample
+# Returns 1 for the first occurrence in the window, which is reported right away.
+# Later ones are counted and the fingerprint is queued for a digest at the window end
+REPORT_ERROR_SCRIPT: Final[str] = """
+if redis.call('SET', KEYS[1], 1, 'NX', 'EX', ARGV[1]) then
+    return 1
+end
+
+local count = redis.call('HINCRBY', KEYS[2], 'count', 1)
+
+if count == 1 then
+    local ttl = math.max(redis.call('PTTL', KEYS[1]), 0) / 1000
+    redis.call('HSET', KEYS[2], 'sample', ARGV[4])
+    redis.call('EXPIRE', KEYS[2], tonumber(ARGV[1]) * 2)
+    redis.call('ZADD', KEYS[3], tonumber(ARGV[2]) + ttl, ARGV[3])
+end
+
+return 0
+"""
+
+
+def get_error_fingerprint(traceback_str: str) -> str:
+    """Identifies an error by its exception type and the innermost frames of the traceback."""
+    lines = traceback_str.strip().splitlines()
+    frames = [
+        f"{match.group(1)}:{match.group(2)}"
+        for line in lines
+        if (match := TRACEBACK_FRAME_PATTERN.match(line))
+    ]
+    exception_type = lines[-1].split(":", 1)[0] if lines else ""
+    source = "|".join([exception_type, *frames[-ERROR_FINGERPRINT_FRAMES:]])
+    return hashlib.sha1(source.encode()).hexdigest()
+
+
+class NotificationStats:
+    sent: int
+    deferred: int
+    deferred_dropped: int
+    network_retries: int
+    network_failed: int
+    forbidden: int
+    failed: int
+    errors_reported: int
+    errors_aggregated: int
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.sent = 0
+        self.deferred = 0
+        self.deferred_dropped = 0
+        self.network_retries = 0
+        self.network_failed = 0
+        self.forbidden = 0
+        self.failed = 0
+        self.errors_reported = 0
+        self.errors_aggregated = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "sent": self.sent,
+            "deferred": self.deferred,
+            "deferred_dropped": self.deferred_dropped,
+            "network_retries": self.network_retries,
+            "network_failed": self.network_failed,
+            "forbidden": self.forbidden,
+            "failed": self.failed,
+            "errors_reported": self.errors_reported,
+            "errors_aggregated": self.errors_aggregated,
+        }
+
+
+notification_stats = NotificationStats()
+
+
+def get_notification_stats() -> dict[str, int]:
+    return notification_stats.as_dict()
+
+
+stats_reporter.register("notifications", get_notification_stats)
+
+
+class MessageDeletionSweeper:
+    """
+    Deletes auto-deleted notifications once they are due.
+
+    Messages are queued in a Redis sorted set scored by deletion time, so they survive
+    restarts. Due entries are popped atomically, grouped by chat and removed with
+    deleteMessages, up to DELETE_MESSAGES_LIMIT ids per call.
+    """
+
+    _task: Optional[asyncio.Task[None]]
+
+    def __init__(self) -> None:
+        self._task = None
+
+    def start(self, bot: Bot, redis_repository: RedisRepository) -> None:
+        if self._task is not None and not self._task.done():
+            return
+
+        self._task = asyncio.create_task(self._run(bot, redis_repository))
+        logger.debug("Message deletion sweeper started")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def sweep(self, bot: Bot, redis_repository: RedisRepository) -> int:
+        members = await redis_repository.sorted_collection_pop_by_score(
+            MessageDeletionQueueKey(),
+            max_score=time.time(),
+            count=MESSAGE_DELETION_BATCH,
+        )
+        messages: defaultdict[int, list[int]] = defaultdict(list)
+
+        for member in members:
+            raw_chat_id, raw_message_id = member.split(":")
+            messages[int(raw_chat_id)].append(int(raw_message_id))
+
+        for chat_id, message_ids in messages.items():
+            for chunk in chunked(message_ids, DELETE_MESSAGES_LIMIT):
+                try:
+                    await bot.delete_messages(chat_id=chat_id, message_ids=chunk)
+                except TelegramRetryAfter as exception:
+                    await redis_repository.sorted_collection_add(
+                        MessageDeletionQueueKey(),
+                        {
+                            f"{chat_id}:{message_id}": time.time() + exception.retry_after
+                            for message_id in chunk
+                        },
+                    )
+                except TelegramAPIError as exception:
+                    logger.debug(
+                        f"Failed to delete '{len(chunk)}' messages in chat '{chat_id}': {exception}"
+                    )
+
+        if members:
+            logger.debug(f"Deleted '{len(members)}' messages in '{len(messages)}' chats")
+
+        return len(members)
+
+    async def _run(self, bot: Bot, redis_repository: RedisRepository) -> None:
+        while True:
+            try:
+                swept = await self.sweep(bot, redis_repository)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exception:
+                logger.warning(f"Message deletion sweep failed: {exception}")
+                swept = 0
+
+            # A full batch means more messages are already due
+            if swept < MESSAGE_DELETION_BATCH:
+                await asyncio.sleep(MESSAGE_DELETION_INTERVAL)
+
+
+message_deletion_sweeper: Final[MessageDeletionSweeper] = MessageDeletionSweeper()
+
 
 class NotificationService(BaseService):
     user_service: UserService
@@ -49,6 +259,7 @@ class NotificationService(BaseService):
         super().__init__(config, bot, redis_client, redis_repository, translator_hub)
         self.user_service = user_service
         self.settings_service = settings_service
+        self._report_error = redis_client.register_script(REPORT_ERROR_SCRIPT)
 
     async def notify_user(
         self,
@@ -73,6 +284,10 @@ class NotificationService(BaseService):
 
         return await self._send_message(user, payload)
 
+    async def deliver(self, user: UserDto, payload: MessagePayload) -> Optional[Message]:
+        """Sends once, leaving flood control and API errors to the caller."""
+        return await self._deliver(user, payload)
+
     async def system_notify(
         self,
         payload: MessagePayload,
@@ -111,6 +326,85 @@ class NotificationService(BaseService):
 
         return bool(await self._send_message(user=dev, payload=payload))
 
+    async def notify_error(
+        self,
+        error_id: Union[str, int],
+        traceback_str: str,
+        payload: MessagePayload,
+    ) -> bool:
+        fingerprint = get_error_fingerprint(traceback_str)
+        sample = {
+            "error_id": str(error_id),
+            "error": payload.i18n_kwargs.get("error", ""),
+            "traceback": traceback_str,
+        }
+
+        try:
+            is_first = await self._report_error(
+                keys=[
+                    ErrorWindowKey(fingerprint=fingerprint).pack(),
+                    ErrorDigestKey(fingerprint=fingerprint).pack(),
+                    ErrorDigestQueueKey().pack(),
+                ],
+                args=[ERROR_DIGEST_WINDOW, time.time(), fingerprint, json_utils.encode(sample)],
+            )
+        except RedisError as exception:
+            logger.warning(f"Error aggregation skipped for '{fingerprint}': {exception}")
+            is_first = True
+
+        if not is_first:
+            notification_stats.errors_aggregated += 1
+            logger.debug(f"Error '{error_id}' added to digest '{fingerprint}'")
+            return False
+
+        notification_stats.errors_reported += 1
+        payload.media = BufferedInputFile(
+            file=traceback_str.encode(),
+            filename=f"error_{error_id}.txt",
+        )
+        payload.media_type = MediaType.DOCUMENT
+        return await self.notify_super_dev(payload=payload)
+
+    async def send_error_digests(self) -> int:
+        fingerprints = await self.redis_repository.sorted_collection_pop_by_score(
+            ErrorDigestQueueKey(),
+            max_score=time.time(),
+            count=ERROR_DIGEST_BATCH,
+        )
+
+        for fingerprint in fingerprints:
+            key = ErrorDigestKey(fingerprint=fingerprint).pack()
+
+            async with self.redis_client.pipeline(transaction=True) as pipeline:
+                pipeline.hgetall(key)
+                pipeline.delete(key)
+                digest, _ = await pipeline.execute()
+
+            if not digest:
+                continue
+
+            sample = json_utils.decode(digest[b"sample"])
+            await self.notify_super_dev(
+                payload=MessagePayload.not_deleted(
+                    i18n_key="ntf-event-error-digest",
+                    i18n_kwargs={
+                        "count": int(digest[b"count"]),
+                        "window": ERROR_DIGEST_WINDOW // TIME_1M,
+                        "error": sample["error"],
+                    },
+                    media=BufferedInputFile(
+                        file=sample["traceback"].encode(),
+                        filename=f"error_{sample['error_id']}.txt",
+                    ),
+                    media_type=MediaType.DOCUMENT,
+                )
+            )
+
+        if fingerprints:
+            logger.info(f"Sent '{len(fingerprints)}' error digests")
+
+        return len(fingerprints)
+
     async def remnashop_notify(self) -> bool:
         dev = await self.user_service.get(self.config.bot.dev_id) or self._get_temp_dev()
         payload = MessagePayload(
@@ -123,46 +417,173 @@ class NotificationService(BaseService):
         )
         return bool(await self._send_message(user=dev, payload=payload))
 
-    #
+    async def resend_deferred(self, limit: int = 100) -> int:
+        raw_jobs = await self.redis_repository.sorted_collection_pop_by_score(
+            DeferredNotificationsKey(),
+            max_score=time.time(),
+            count=limit,
+        )
 
-    async def _send_message(self, user: UserDto, payload: MessagePayload) -> Optional[Message]:
-        try:
-            reply_markup = self._prepare_reply_markup(
-                payload.reply_markup,
-                payload.add_close_button,
-                payload.auto_delete_after,
-                user.language,
-                user.telegram_id,
+        for raw_job in raw_jobs:
+            job = json_utils.decode(raw_job)
+            await self._send_message(
+                user=UserDto.model_validate(job["user"]),
+                payload=MessagePayload.model_validate(job["payload"]),
+                attempt=job["attempt"],
             )
 
-            if (payload.media or payload.media_id) and payload.media_type:
-                sent_message = await self._send_media_message(user, payload, reply_markup)
-            else:
-                if (payload.media or payload.media_id) and not payload.media_type:
-                    logger.warning(
-                        f"Validation warning: Media provided without media_type "
-                        f"for chat '{user.telegram_id}'. Sending as text message"
-                    )
-                sent_message = await self._send_text_message(user, payload, reply_markup)
-
-            if payload.auto_delete_after is not None and sent_message:
-                asyncio.create_task(
-                    self._schedule_message_deletion(
-                        chat_id=user.telegram_id,
-                        message_id=sent_message.message_id,
-                        delay=payload.auto_delete_after,
+        if raw_jobs:
+            logger.info(f"Resent '{len(raw_jobs)}' deferred notifications")
+
+        return len(raw_jobs)
+
+    async def get_next_deferred_at(self) -> Optional[float]:
+        return await self.redis_repository.sorted_collection_min_score(DeferredNotificationsKey())
+
+    async def acquire_deferred_lock(self) -> Optional[str]:
+        """Returns the token that releases the lock, or None if a resend run holds it."""
+        token = uuid.uuid4().hex
+        is_locked = await self.redis_client.set(
+            DeferredNotificationsLockKey().pack(),
+            token,
+            nx=True,
+            ex=TIME_5M,
+        )
+        return token if is_locked else None
+
+    async def release_deferred_lock(self, token: str) -> None:
+        if not await self.redis_repository.delete_if_equal(DeferredNotificationsLockKey(), token):
+            logger.warning("Deferred notifications lock expired before it was released")
+
+    #
+
+    async def _send_message(
+        self,
+        user: UserDto,
+        payload: MessagePayload,
+        attempt: int = 0,
+    ) -> Optional[Message]:
+        for retry in range(NOTIFICATION_NETWORK_RETRIES + 1):
+            try:
+                sent_message = await self._deliver(user, payload)
+                notification_stats.sent += 1
+                return sent_message
+
+            except TelegramRetryAfter as exception:
+                await self._defer(user, payload, exception.retry_after, attempt)
+                return None
+
+            except TelegramForbiddenError as exception:
+                notification_stats.forbidden += 1
+                logger.info(
+                    f"Notification '{payload.i18n_key}' not sent to '{user.telegram_id}': "
+                    f"{exception.message}"
+                )
+                return None
+
+            except (TelegramNetworkError, TelegramServerError) as exception:
+                if retry == NOTIFICATION_NETWORK_RETRIES:
+                    notification_stats.network_failed += 1
+                    logger.error(
+                        f"Failed to send notification '{payload.i18n_key}' "
+                        f"to '{user.telegram_id}' after '{retry}' retries: {exception}"
                     )
+                    return None
+
+                delay = min(NOTIFICATION_BACKOFF_MAX, NOTIFICATION_BACKOFF_BASE * 2**retry)
+                notification_stats.network_retries += 1
+                logger.warning(
+                    f"Network error sending notification to '{user.telegram_id}', "
+                    f"retrying in '{delay}' seconds: {exception}"
                 )
+                await asyncio.sleep(delay)
+
+            except Exception as exception:
+                notification_stats.failed += 1
+                logger.error(
+                    f"Failed to send notification '{payload.i18n_key}' "
+                    f"to '{user.telegram_id}': {exception}",
+                    exc_info=True,
+                )
+                return None
 
-            return sent_message
+        return None
 
-        except Exception as exception:
+    async def _defer(
+        self,
+        user: UserDto,
+        payload: MessagePayload,
+        retry_after: int,
+        attempt: int,
+    ) -> None:
+        # Uploaded files can not be stored, only messages referring to file ids are deferred
+        if payload.media is not None or attempt >= NOTIFICATION_MAX_REQUEUES:
+            notification_stats.deferred_dropped += 1
             logger.error(
-                f"Failed to send notification '{payload.i18n_key}' "
-                f"to '{user.telegram_id}': {exception}",
-                exc_info=True,
+                f"Dropped notification '{payload.i18n_key}' to '{user.telegram_id}' "
+                f"after flood control (retry after '{retry_after}', attempt '{attempt}')"
             )
-            return None
+            return
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "user": user.model_dump(mode="json"),
+            "payload": payload.model_dump(mode="json", exclude={"media"}),
+            "attempt": attempt + 1,
+        }
+        await self.redis_repository.sorted_collection_add(
+            DeferredNotificationsKey(),
+            {json_utils.encode(job): time.time() + retry_after},
+        )
+        notification_stats.deferred += 1
+        logger.warning(
+            f"Notification '{payload.i18n_key}' to '{user.telegram_id}' deferred "
+            f"for '{retry_after}' seconds by flood control"
+        )
+
+        lock_token = await self.acquire_deferred_lock()
+
+        if lock_token is not None:
+            from src.infrastructure.taskiq.tasks.notifications import (  # noqa: PLC0415
+                resend_deferred_notifications_task,
+            )
+
+            await resend_deferred_notifications_task.kiq(lock_token=lock_token)
+
+    async def _deliver(self, user: UserDto, payload: MessagePayload) -> Optional[Message]:
+        reply_markup = self._prepare_reply_markup(
+            payload.reply_markup,
+            payload.add_close_button,
+            payload.auto_delete_after,
+            user.language,
+            user.telegram_id,
+        )
+
+        if (payload.media or payload.media_id) and payload.media_type:
+            sent_message = await self._send_media_message(user, payload, reply_markup)
+        else:
+            if (payload.media or payload.media_id) and not payload.media_type:
+                logger.warning(
+                    f"Validation warning: Media provided without media_type "
+                    f"for chat '{user.telegram_id}'. Sending as text message"
+                )
+            sent_message = await self._send_text_message(user, payload, reply_markup)
+
+        if payload.auto_delete_after is not None and sent_message:
+            # The message is delivered at this point, failing here would make it resent
+            try:
+                await self._schedule_message_deletion(
+                    chat_id=user.telegram_id,
+                    message_id=sent_message.message_id,
+                    delay=payload.auto_delete_after,
+                )
+            except RedisError as exception:
+                logger.warning(
+                    f"Failed to schedule auto-deletion of message "
+                    f"'{sent_message.message_id}' (chat '{user.telegram_id}'): {exception}"
+                )
+
+        return sent_message
 
     async def _send_media_message(
         self,
@@ -265,16 +686,10 @@ class NotificationService(BaseService):
         logger.debug(
             f"Scheduling message '{message_id}' for auto-deletion in '{delay}' (chat '{chat_id}')"
         )
-        try:
-            await asyncio.sleep(delay)
-            await self.bot.delete_message(chat_id=chat_id, message_id=message_id)
-            logger.debug(
-                f"Message '{message_id}' in chat '{chat_id}' deleted after '{delay}' seconds"
-            )
-        except Exception as exception:
-            logger.error(
-                f"Failed to delete message '{message_id}' in chat '{chat_id}': {exception}"
-            )
+        await self.redis_repository.sorted_collection_add(
+            MessageDeletionQueueKey(),
+            {f"{chat_id}:{message_id}": time.time() + delay},
+        )
 
     def _get_translated_text(
         self,
@@ -6,14 +6,14 @@ from loguru import logger
 from redis.asyncio import Redis
 
 from src.core.config import AppConfig
-from src.core.constants import TIME_10M
+from src.core.constants import TIME_1M, TIME_5S, TIME_10M
 from src.core.enums import AccessMode, Currency, SystemNotificationType, UserNotificationType
-from src.core.storage.key_builder import build_key
+from src.core.storage.keys import ChannelMembersKey
 from src.core.utils.types import AnyNotification
 from src.infrastructure.database import UnitOfWork
 from src.infrastructure.database.models.dto import ReferralSettingsDto, SettingsDto
 from src.infrastructure.database.models.sql import Settings
-from src.infrastructure.redis import RedisRepository
+from src.infrastructure.redis import RedisRepository, build_cache_key, invalidate_cache
 from src.infrastructure.redis.cache import redis_cache
 
 from .base import BaseService
@@ -44,7 +44,14 @@ class SettingsService(BaseService):
         logger.info("Default settings created in DB")
         return SettingsDto.from_model(db_settings)  # type: ignore[return-value]
 
-    @redis_cache(prefix="get_settings", ttl=TIME_10M)
+    @redis_cache(
+        prefix="get_settings",
+        ttl=TIME_10M,
+        local_ttl=TIME_1M,
+        lock_ttl=TIME_5S,
+        stale_ttl=TIME_10M,
+        refresh_ahead=1.0,
+    )
     async def get(self) -> SettingsDto:
         db_settings = await self.uow.repository.settings.get()
         if not db_settings:
@@ -68,6 +75,10 @@ class SettingsService(BaseService):
         db_updated_settings = await self.uow.repository.settings.update(**changed_data)
         await self._clear_cache()
 
+        if "channel_id" in changed_data or "channel_link" in changed_data:
+            # Cached memberships belong to the previous channel
+            await self.redis_repository.delete(key=ChannelMembersKey())
+
         if changed_data:
             logger.info("Settings updated in DB")
         else:
@@ -178,6 +189,6 @@ class SettingsService(BaseService):
     #
 
     async def _clear_cache(self) -> None:
-        settings_cache_key: str = build_key("cache", "get_settings")
+        settings_cache_key: str = build_cache_key("get_settings")
         logger.debug(f"Cache '{settings_cache_key}' cleared")
-        await self.redis_client.delete(settings_cache_key)
+        await invalidate_cache(self.redis_client, settings_cache_key)
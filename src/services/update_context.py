@@ -0,0 +1,74 @@
+from typing import Optional
+
+from loguru import logger
+
+from src.core.config import AppConfig
+from src.core.enums import AccessMode
+from src.infrastructure.database.models.dto import SettingsDto, UserDto
+from src.services.settings import SettingsService
+from src.services.user import UserService
+
+
+class UpdateContext:
+    """
+    Resolves the user and settings once per update (request scope) and shares them
+    between middlewares, getters and handlers.
+
+    Values are read-only snapshots: code that changes settings must go through
+    SettingsService, which returns its own copy.
+    """
+
+    config: AppConfig
+    user_service: UserService
+    settings_service: SettingsService
+
+    _users: dict[int, Optional[UserDto]]
+    _settings: Optional[SettingsDto]
+
+    def __init__(
+        self,
+        config: AppConfig,
+        user_service: UserService,
+        settings_service: SettingsService,
+    ) -> None:
+        self.config = config
+        self.user_service = user_service
+        self.settings_service = settings_service
+        self._users = {}
+        self._settings = None
+
+    async def get_user(self, telegram_id: int) -> Optional[UserDto]:
+        if telegram_id not in self._users:
+            self._users[telegram_id] = await self.user_service.get(telegram_id=telegram_id)
+        else:
+            logger.debug(f"User '{telegram_id}' resolved from update context")
+
+        return self._users[telegram_id]
+
+    def set_user(self, user: UserDto) -> None:
+        self._users[user.telegram_id] = user
+
+    def is_super_dev(self, user: UserDto) -> bool:
+        return user.telegram_id == self.config.bot.dev_id
+
+    async def get_settings(self) -> SettingsDto:
+        if self._settings is None:
+            self._settings = await self.settings_service.get()
+
+        return self._settings
+
+    async def get_access_mode(self) -> AccessMode:
+        settings = await self.get_settings()
+        return settings.access_mode
+
+    async def is_rules_required(self) -> bool:
+        settings = await self.get_settings()
+        return settings.rules_required
+
+    async def is_channel_required(self) -> bool:
+        settings = await self.get_settings()
+        return settings.channel_required
+
+    async def is_referral_enable(self) -> bool:
+        settings = await self.get_settings()
+        return settings.referral.enable
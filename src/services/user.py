@@ -1,33 +1,164 @@
-from typing import Optional, Union
+import asyncio
+import hashlib
+import time
+from typing import Any, Final, Optional, Union
 
 from aiogram import Bot
 from aiogram.types import Message
 from aiogram.types import User as AiogramUser
+from cachetools import TTLCache
 from fluentogram import TranslatorHub
 from loguru import logger
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from src.core.config import AppConfig
 from src.core.constants import (
+    LOCAL_CACHE_MAXSIZE,
+    PROFILE_FINGERPRINT_TTL,
+    PROFILE_SYNC_INTERVAL,
     RECENT_ACTIVITY_MAX_COUNT,
+    RECENT_ACTIVITY_UPDATE_INTERVAL,
     RECENT_REGISTERED_MAX_COUNT,
     REMNASHOP_PREFIX,
     TIME_1M,
+    TIME_5S,
     TIME_10M,
+    TIME_10S,
+    USER_CACHE_TAG,
+    USERS_BLOCKED_CACHE_TAG,
+    USERS_LIST_CACHE_TAG,
+    USERS_ROLE_CACHE_TAG,
 )
 from src.core.enums import Locale, UserRole
-from src.core.storage.key_builder import StorageKey, build_key
-from src.core.storage.keys import RecentActivityUsersKey, RecentRegisteredUsersKey
+from src.core.storage.key_builder import StorageKey
+from src.core.storage.keys import (
+    ProfileFingerprintKey,
+    RecentActivityUsersKey,
+    RecentRegisteredUsersKey,
+)
 from src.core.utils.generators import generate_referral_code
 from src.core.utils.types import RemnaUserDto
 from src.infrastructure.database import UnitOfWork
 from src.infrastructure.database.models.dto import UserDto
 from src.infrastructure.database.models.dto.user import BaseUserDto
 from src.infrastructure.database.models.sql import User
-from src.infrastructure.redis import RedisRepository, redis_cache
+from src.infrastructure.redis import (
+    RedisRepository,
+    build_cache_key,
+    get_cached_many,
+    invalidate_tags,
+    redis_cache,
+)
 
 from .base import BaseService
 
+# Users whose activity was recorded recently, shared by all requests of this process
+_recent_activity_updates: Final[TTLCache[int, None]] = TTLCache(
+    maxsize=LOCAL_CACHE_MAXSIZE,
+    ttl=RECENT_ACTIVITY_UPDATE_INTERVAL,
+)
+
+
+def _get_profile_fingerprint(aiogram_user: AiogramUser) -> str:
+    # Stable across processes, unlike hash(), since every worker compares against Redis
+    source = f"{aiogram_user.username}\n{aiogram_user.full_name}\n{aiogram_user.language_code}"
+    return hashlib.sha1(source.encode()).hexdigest()
+
+
+class ProfileSyncBuffer:
+    """
+    Write-behind buffer for profile changes coming from Telegram updates.
+
+    Changes are coalesced per user (last write wins) and flushed periodically
+    with a single multi-row UPDATE.
+    """
+
+    _pending: dict[int, dict[str, Any]]
+    _task: Optional[asyncio.Task[None]]
+    _session_pool: Optional[async_sessionmaker[AsyncSession]]
+    _redis_client: Optional[Redis]
+
+    def __init__(self) -> None:
+        self._pending = {}
+        self._task = None
+        self._session_pool = None
+        self._redis_client = None
+
+    def add(
+        self,
+        user: UserDto,
+        session_pool: async_sessionmaker[AsyncSession],
+        redis_client: Redis,
+    ) -> None:
+        self._pending[user.telegram_id] = {
+            "telegram_id": user.telegram_id,
+            "username": user.username,
+            "name": user.name,
+            "language": user.language,
+        }
+        self._session_pool = session_pool
+        self._redis_client = redis_client
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def flush(self) -> None:
+        if not self._pending or self._session_pool is None or self._redis_client is None:
+            return
+
+        profiles = list(self._pending.values())
+        self._pending = {}
+
+        try:
+            async with UnitOfWork(self._session_pool) as uow:
+                updated = await uow.repository.users.update_profiles(profiles)
+
+            await invalidate_tags(
+                self._redis_client,
+                *(USER_CACHE_TAG.format(telegram_id=p["telegram_id"]) for p in profiles),
+            )
+        except Exception as exception:
+            logger.warning(f"Failed to sync '{len(profiles)}' user profiles: {exception}")
+
+            await self._forget_fingerprints(profiles)
+            return
+
+        logger.debug(f"Synced '{updated}' user profiles")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        await self.flush()
+
+    async def _forget_fingerprints(self, profiles: list[dict[str, Any]]) -> None:
+        if self._redis_client is None:
+            return
+
+        # The next update from these users has to retry the sync
+        keys = [ProfileFingerprintKey(telegram_id=p["telegram_id"]).pack() for p in profiles]
+
+        try:
+            await self._redis_client.delete(*keys)
+        except RedisError as exception:
+            logger.warning(f"Failed to reset '{len(keys)}' profile fingerprints: {exception}")
+
+    async def _run(self) -> None:
+        while self._pending:
+            await asyncio.sleep(PROFILE_SYNC_INTERVAL)
+            await self.flush()
+
+
+profile_sync_buffer: Final[ProfileSyncBuffer] = ProfileSyncBuffer()
+
+
+def _user_tags(users: list[UserDto]) -> list[str]:
+    # List entries are dropped whenever one of their members changes
+    return [USER_CACHE_TAG.format(telegram_id=user.telegram_id) for user in users]
+
 
 class UserService(BaseService):
     uow: UnitOfWork
@@ -66,7 +197,11 @@ class UserService(BaseService):
         await self.uow.commit()
 
         await self.add_to_recent_registered(user.telegram_id)
-        await self.clear_user_cache(user.telegram_id)
+        await self.clear_user_cache(
+            user.telegram_id,
+            USERS_LIST_CACHE_TAG,
+            USERS_ROLE_CACHE_TAG.format(role=user.role),
+        )
         logger.info(f"Created new user '{user.telegram_id}'")
         return UserDto.from_model(db_created_user)  # type: ignore[return-value]
 
@@ -86,11 +221,21 @@ class UserService(BaseService):
         await self.uow.commit()
 
         await self.add_to_recent_registered(user.telegram_id)
-        await self.clear_user_cache(user.telegram_id)
+        await self.clear_user_cache(
+            user.telegram_id,
+            USERS_LIST_CACHE_TAG,
+            USERS_ROLE_CACHE_TAG.format(role=user.role),
+        )
         logger.info(f"Created new user '{user.telegram_id}' from panel")
         return UserDto.from_model(db_created_user)  # type: ignore[return-value]
 
-    @redis_cache(prefix="get_user", ttl=TIME_1M)
+    @redis_cache(
+        prefix="get_user",
+        ttl=TIME_1M,
+        local_ttl=TIME_10S,
+        negative_ttl=TIME_10S,
+        tags=(USER_CACHE_TAG,),
+    )
     async def get(self, telegram_id: int) -> Optional[UserDto]:
         db_user = await self.uow.repository.users.get(telegram_id)
 
@@ -102,13 +247,14 @@ class UserService(BaseService):
         return UserDto.from_model(db_user)
 
     async def update(self, user: UserDto) -> Optional[UserDto]:
+        list_tags = self._get_list_tags(user)
         db_updated_user = await self.uow.repository.users.update(
             telegram_id=user.telegram_id,
             **user.prepare_changed_data(),
         )
 
         if db_updated_user:
-            await self.clear_user_cache(db_updated_user.telegram_id)
+            await self.clear_user_cache(db_updated_user.telegram_id, *list_tags)
             logger.info(f"Updated user '{user.telegram_id}' successfully")
         else:
             logger.warning(
@@ -123,6 +269,9 @@ class UserService(BaseService):
         user: UserDto,
         aiogram_user: AiogramUser,
     ) -> Optional[UserDto]:
+        if not await self._is_profile_changed(user.telegram_id, aiogram_user):
+            return None
+
         new_username = aiogram_user.username
         if user.username != new_username:
             logger.debug(
@@ -154,13 +303,32 @@ class UserService(BaseService):
         if not user.prepare_changed_data():
             return None
 
-        return await self.update(user)
+        profile_sync_buffer.add(user, self.uow.session_pool, self.redis_client)
+        logger.debug(f"User '{user.telegram_id}' profile queued for sync")
+        return user
+
+    async def _is_profile_changed(self, telegram_id: int, aiogram_user: AiogramUser) -> bool:
+        # Shared by all workers, so only the first one to see a change queues the write
+        fingerprint = _get_profile_fingerprint(aiogram_user)
+
+        try:
+            previous: Optional[bytes] = await self.redis_client.set(
+                ProfileFingerprintKey(telegram_id=telegram_id).pack(),
+                fingerprint,
+                ex=PROFILE_FINGERPRINT_TTL,
+                get=True,
+            )
+        except RedisError as exception:
+            logger.warning(f"Profile fingerprint check for '{telegram_id}' skipped: {exception}")
+            return True
+
+        return previous != fingerprint.encode()
 
     async def delete(self, user: UserDto) -> bool:
         result = await self.uow.repository.users.delete(user.telegram_id)
 
         if result:
-            await self.clear_user_cache(user.telegram_id)
+            await self.clear_user_cache(user.telegram_id, USERS_LIST_CACHE_TAG)
             await self._remove_from_recent_registered(user.telegram_id)
             await self._remove_from_recent_activity(user.telegram_id)
 
@@ -176,25 +344,50 @@ class UserService(BaseService):
         user = await self.uow.repository.users.get_by_referral_code(referral_code)
         return UserDto.from_model(user)
 
-    @redis_cache(prefix="users_count", ttl=TIME_10M)
+    @redis_cache(
+        prefix="users_count",
+        ttl=TIME_10M,
+        stale_ttl=TIME_10M,
+        tags=(USERS_LIST_CACHE_TAG,),
+    )
     async def count(self) -> int:
         count = await self.uow.repository.users.count()
         logger.debug(f"Total users count: '{count}'")
         return count
 
-    @redis_cache(prefix="get_by_role", ttl=TIME_10M)
+    @redis_cache(
+        prefix="get_by_role",
+        ttl=TIME_10M,
+        local_ttl=TIME_1M,
+        stale_ttl=TIME_10M,
+        tags=(USERS_ROLE_CACHE_TAG,),
+        result_tags=_user_tags,
+    )
     async def get_by_role(self, role: UserRole) -> list[UserDto]:
         db_users = await self.uow.repository.users.filter_by_role(role)
         logger.debug(f"Retrieved '{len(db_users)}' users with role '{role}'")
         return UserDto.from_model_list(db_users)
 
-    @redis_cache(prefix="get_blocked_users", ttl=TIME_10M)
+    @redis_cache(
+        prefix="get_blocked_users",
+        ttl=TIME_10M,
+        stale_ttl=TIME_10M,
+        tags=(USERS_BLOCKED_CACHE_TAG,),
+        result_tags=_user_tags,
+    )
     async def get_blocked_users(self) -> list[UserDto]:
         db_users = await self.uow.repository.users.filter_by_blocked(blocked=True)
         logger.debug(f"Retrieved '{len(db_users)}' blocked users")
         return UserDto.from_model_list(list(reversed(db_users)))
 
-    @redis_cache(prefix="get_all", ttl=TIME_10M)
+    @redis_cache(
+        prefix="get_all",
+        ttl=TIME_10M,
+        lock_ttl=TIME_5S,
+        stale_ttl=TIME_10M,
+        refresh_ahead=1.0,
+        tags=(USERS_LIST_CACHE_TAG,),
+    )
     async def get_all(self) -> list[UserDto]:
         db_users = await self.uow.repository.users.get_all()
         logger.debug(f"Retrieved '{len(db_users)}' users")
@@ -206,7 +399,7 @@ class UserService(BaseService):
             user.telegram_id,
             **user.prepare_changed_data(),
         )
-        await self.clear_user_cache(user.telegram_id)
+        await self.clear_user_cache(user.telegram_id, USERS_BLOCKED_CACHE_TAG)
         logger.info(f"Set block={blocked} for user '{user.telegram_id}'")
 
     async def set_bot_blocked(self, user: UserDto, blocked: bool) -> None:
@@ -224,7 +417,7 @@ class UserService(BaseService):
             user.telegram_id,
             **user.prepare_changed_data(),
         )
-        await self.clear_user_cache(user.telegram_id)
+        await self.clear_user_cache(user.telegram_id, USERS_ROLE_CACHE_TAG.format(role=role))
         logger.info(f"Set role='{role.name}' for user '{user.telegram_id}'")
 
     #
@@ -233,7 +426,16 @@ class UserService(BaseService):
         await self._add_to_recent_list(RecentRegisteredUsersKey(), telegram_id)
 
     async def update_recent_activity(self, telegram_id: int) -> None:
-        await self._add_to_recent_list(RecentActivityUsersKey(), telegram_id)
+        if telegram_id in _recent_activity_updates:
+            return
+
+        _recent_activity_updates[telegram_id] = None
+        await self.redis_repository.sorted_collection_add_capped(
+            key=RecentActivityUsersKey(),
+            mapping={telegram_id: time.time()},
+            max_count=RECENT_ACTIVITY_MAX_COUNT,
+        )
+        logger.debug(f"User '{telegram_id}' activity updated in recent cache")
 
     async def get_recent_registered_users(self) -> list[UserDto]:
         telegram_ids = await self._get_recent_registered()
@@ -252,10 +454,19 @@ class UserService(BaseService):
 
     async def get_recent_activity_users(self) -> list[UserDto]:
         telegram_ids = await self._get_recent_activity()
+        keys = {
+            telegram_id: build_cache_key("get_user", telegram_id) for telegram_id in telegram_ids
+        }
+        cached_users = await get_cached_many(self.redis_client, "get_user", list(keys.values()))
+
+        missing_ids = [telegram_id for telegram_id, key in keys.items() if key not in cached_users]
+        db_users = await self.uow.repository.users.get_by_ids(missing_ids) if missing_ids else []
+        fetched_users = {user.telegram_id: user for user in UserDto.from_model_list(db_users)}
+
         users: list[UserDto] = []
 
-        for telegram_id in telegram_ids:
-            user = await self.get(telegram_id)
+        for telegram_id, key in keys.items():
+            user = cached_users[key] if key in cached_users else fetched_users.get(telegram_id)
 
             if user:
                 users.append(user)
@@ -346,38 +557,28 @@ class UserService(BaseService):
 
     #
 
-    async def clear_user_cache(self, telegram_id: int) -> None:
-        user_cache_key: str = build_key("cache", "get_user", telegram_id)
-        await self.redis_client.delete(user_cache_key)
-        await self._clear_list_caches()
-        logger.debug(f"User cache for '{telegram_id}' invalidated")
+    async def clear_user_cache(self, telegram_id: int, *tags: str) -> None:
+        user_tag = USER_CACHE_TAG.format(telegram_id=telegram_id)
+        await invalidate_tags(self.redis_client, user_tag, *tags)
+        logger.debug(f"User cache for '{telegram_id}' invalidated (tags: {[user_tag, *tags]})")
 
-    async def _clear_list_caches(self) -> None:
-        list_cache_keys_to_invalidate = [
-            build_key("cache", "get_blocked_users"),
-            build_key("cache", "count"),
-        ]
+    def _get_list_tags(self, user: UserDto) -> list[str]:
+        # Only role and block changes move a user between cached lists
+        tags: list[str] = []
 
-        for role in UserRole:
-            key = build_key("cache", "get_by_role", role=role)
-            list_cache_keys_to_invalidate.append(key)
+        if "role" in user.changed_data:
+            tags.append(USERS_ROLE_CACHE_TAG.format(role=user.role))
 
-        await self.redis_client.delete(*list_cache_keys_to_invalidate)
-        logger.debug("List caches invalidated")
+        if "is_blocked" in user.changed_data:
+            tags.append(USERS_BLOCKED_CACHE_TAG)
+
+        return tags
 
     async def _add_to_recent_list(self, key: StorageKey, telegram_id: int) -> None:
         await self.redis_repository.list_remove(key, value=telegram_id, count=0)
         await self.redis_repository.list_push(key, telegram_id)
-
-        if key == RecentRegisteredUsersKey():
-            end = RECENT_REGISTERED_MAX_COUNT - 1
-            log_message = "registered"
-        else:
-            end = RECENT_ACTIVITY_MAX_COUNT - 1
-            log_message = "activity updated"
-
-        await self.redis_repository.list_trim(key, start=0, end=end)
-        logger.debug(f"User '{telegram_id}' {log_message} in recent cache")
+        await self.redis_repository.list_trim(key, start=0, end=RECENT_REGISTERED_MAX_COUNT - 1)
+        logger.debug(f"User '{telegram_id}' registered in recent cache")
 
     async def _remove_from_recent_registered(self, telegram_id: int) -> None:
         await self.redis_repository.list_remove(
@@ -398,15 +599,12 @@ class UserService(BaseService):
         return ids
 
     async def _remove_from_recent_activity(self, telegram_id: int) -> None:
-        await self.redis_repository.list_remove(
-            key=RecentActivityUsersKey(),
-            value=telegram_id,
-            count=0,
-        )
+        _recent_activity_updates.pop(telegram_id, None)
+        await self.redis_repository.sorted_collection_remove(RecentActivityUsersKey(), telegram_id)
         logger.debug(f"User '{telegram_id}' removed from recent activity cache")
 
     async def _get_recent_activity(self) -> list[int]:
-        telegram_ids_str = await self.redis_repository.list_range(
+        telegram_ids_str = await self.redis_repository.sorted_collection_revrange(
             key=RecentActivityUsersKey(),
             start=0,
             end=RECENT_ACTIVITY_MAX_COUNT - 1,
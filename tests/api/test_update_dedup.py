@@ -0,0 +1,70 @@
+from typing import Any, cast
+
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from src.api.endpoints.telegram import TelegramWebhookEndpoint, UpdateIdWindow
+
+
+def build_endpoint() -> TelegramWebhookEndpoint:
+    return TelegramWebhookEndpoint(
+        dispatcher=cast(Any, None),
+        secret_token="secret",
+        workers=1,
+        queue_size=1,
+    )
+
+
+def test_window_remembers_added_ids() -> None:
+    window = UpdateIdWindow(size=3)
+
+    window.add(1)
+    window.add(2)
+
+    assert 1 in window
+    assert 2 in window
+    assert 3 not in window
+
+
+def test_window_forgets_the_oldest_id_when_full() -> None:
+    window = UpdateIdWindow(size=3)
+
+    for update_id in range(1, 5):
+        window.add(update_id)
+
+    assert 1 not in window
+    assert all(update_id in window for update_id in (2, 3, 4))
+
+
+def test_window_ignores_repeated_ids() -> None:
+    window = UpdateIdWindow(size=2)
+
+    window.add(1)
+    window.add(1)
+    window.add(2)
+
+    # A repeated id must not take a second slot and push out its neighbour
+    assert 1 in window
+    assert 2 in window
+
+
+async def test_redelivered_update_is_duplicate_across_workers(redis: FakeAsyncRedis) -> None:
+    first, second = build_endpoint(), build_endpoint()
+
+    assert not await first._is_duplicate(redis, 100)
+    assert await second._is_duplicate(redis, 100)
+
+
+async def test_released_update_can_be_claimed_again(redis: FakeAsyncRedis) -> None:
+    endpoint = build_endpoint()
+
+    await endpoint._is_duplicate(redis, 100)
+    await endpoint._release(redis, 100)
+
+    assert not await endpoint._is_duplicate(redis, 100)
+
+
+async def test_redis_failure_lets_the_update_through() -> None:
+    server = FakeServer()
+    server.connected = False
+
+    assert not await build_endpoint()._is_duplicate(FakeAsyncRedis(server=server), 100)
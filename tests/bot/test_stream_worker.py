@@ -0,0 +1,93 @@
+import asyncio
+import signal
+from typing import Any, cast
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from src.bot import stream_worker
+from src.bot.stream_worker import UpdateStreamConsumer, start_worker
+from src.core.constants import UPDATE_STREAM_GROUP
+from src.core.storage.keys import UpdateStreamKey
+
+STREAM = UpdateStreamKey(shard=0).pack()
+
+
+class RecordingDispatcher:
+    def __init__(self) -> None:
+        self.handled: list[int] = []
+
+    async def feed_update(self, bot: Any, update: Any) -> None:
+        self.handled.append(update.update_id)
+
+
+class CountingRedis(FakeAsyncRedis):
+    claim_passes = 0
+
+    async def xautoclaim(self, *args: Any, **kwargs: Any) -> Any:
+        # Every pass over the pending list starts from the beginning
+        if kwargs.get("start_id") == "0-0":
+            self.claim_passes += 1
+        return await super().xautoclaim(*args, **kwargs)
+
+    async def xreadgroup(self, *args: Any, **kwargs: Any) -> Any:
+        response = await super().xreadgroup(*args, **kwargs)
+        # fakeredis answers a blocking read at once, give the test a chance to run
+        await asyncio.sleep(0)
+        return response
+
+
+async def consume_until(consumer: UpdateStreamConsumer, condition: Any) -> None:
+    task = asyncio.create_task(consumer._consume(0))
+
+    for _ in range(200):
+        if condition():
+            break
+        await asyncio.sleep(0.01)
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+async def test_pending_entries_are_claimed_once() -> None:
+    redis = CountingRedis()
+    dispatcher = RecordingDispatcher()
+    consumer = UpdateStreamConsumer(
+        dispatcher=cast(Any, dispatcher),
+        bot=cast(Any, None),
+        redis_client=redis,
+        index=0,
+        workers=1,
+        shards=1,
+    )
+
+    # A previous owner read these entries and died before acknowledging them
+    await redis.xgroup_create(STREAM, UPDATE_STREAM_GROUP, id="0", mkstream=True)
+    for update_id in range(250):
+        await redis.xadd(STREAM, {"update": f'{{"update_id": {update_id}}}'})
+    await redis.xreadgroup(UPDATE_STREAM_GROUP, "worker-old", {STREAM: ">"})
+
+    await consume_until(consumer, lambda: len(dispatcher.handled) == 250)
+
+    assert dispatcher.handled == list(range(250))
+    assert redis.claim_passes == 1
+    assert (await redis.xpending(STREAM, UPDATE_STREAM_GROUP))["pending"] == 0
+    await redis.aclose()
+
+
+def test_worker_process_leaves_sigint_to_the_supervisor(monkeypatch: pytest.MonkeyPatch) -> None:
+    handlers: list[Any] = []
+
+    def run(coroutine: Any) -> None:
+        coroutine.close()
+        handlers.append(signal.getsignal(signal.SIGINT))
+
+    monkeypatch.setattr(stream_worker.asyncio, "run", run)
+    previous = signal.getsignal(signal.SIGINT)
+
+    try:
+        start_worker(0, 1)
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+    assert handlers == [signal.SIG_IGN]
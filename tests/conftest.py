@@ -0,0 +1,26 @@
+import os
+from typing import AsyncIterator
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+# Most modules load AppConfig on import, so the required settings get placeholder values
+os.environ.setdefault("APP_DOMAIN", "example.com")
+os.environ.setdefault("APP_CRYPT_KEY", "eHh4eHh4eHh4eHh4eHh4eHh4eHh4eHh4eHh4eHh4eHg=")
+os.environ.setdefault("APP_LOCALES", "en,ru")
+os.environ.setdefault("BOT_TOKEN", "1:test")
+os.environ.setdefault("BOT_SECRET_TOKEN", "secret")
+os.environ.setdefault("BOT_DEV_ID", "1")
+os.environ.setdefault("BOT_SUPPORT_USERNAME", "support_user")
+os.environ.setdefault("REMNAWAVE_TOKEN", "token")
+os.environ.setdefault("REMNAWAVE_WEBHOOK_SECRET", "secret")
+os.environ.setdefault("DATABASE_PASSWORD", "password")
+os.environ.setdefault("REDIS_PASSWORD", "password")
+
+
+@pytest.fixture
+async def redis() -> AsyncIterator[FakeAsyncRedis]:
+    client = FakeAsyncRedis()
+    yield client
+    await client.flushall()
+    await client.aclose()
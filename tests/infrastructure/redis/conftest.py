@@ -0,0 +1,22 @@
+import asyncio
+from typing import AsyncIterator
+
+import pytest
+
+from src.infrastructure.redis import cache
+
+
+@pytest.fixture(autouse=True)
+async def reset_cache_state() -> AsyncIterator[None]:
+    yield
+
+    listener_task = cache.invalidation_listener._task
+    if listener_task is not None:
+        listener_task.cancel()
+        await asyncio.gather(listener_task, return_exceptions=True)
+        cache.invalidation_listener._task = None
+
+    await asyncio.gather(*cache._background_tasks, return_exceptions=True)
+    cache.local_cache.clear()
+    cache.cache_stats.reset()
+    cache._inflight.clear()
@@ -0,0 +1,70 @@
+import asyncio
+from typing import Optional
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from src.infrastructure.redis import redis_cache
+from src.infrastructure.redis.cache import cache_stats
+
+
+class Service:
+    def __init__(self, redis_client: FakeAsyncRedis) -> None:
+        self.redis_client = redis_client
+        self.calls = 0
+        self.fail = False
+
+    @redis_cache(prefix="test_coalescing_get", ttl=60)
+    async def get(self, item_id: int) -> Optional[dict[str, int]]:
+        self.calls += 1
+        fail = self.fail
+        await asyncio.sleep(0.05)
+
+        if fail:
+            raise RuntimeError("backend is down")
+
+        return {"id": item_id, "calls": self.calls}
+
+
+async def test_concurrent_misses_run_the_function_once(redis: FakeAsyncRedis) -> None:
+    service = Service(redis)
+
+    results = await asyncio.gather(*(service.get(1) for _ in range(10)))
+
+    assert service.calls == 1
+    assert results == [{"id": 1, "calls": 1}] * 10
+    assert cache_stats.coalesced == 9
+
+
+async def test_different_keys_are_not_coalesced(redis: FakeAsyncRedis) -> None:
+    service = Service(redis)
+
+    await asyncio.gather(service.get(1), service.get(2))
+
+    assert service.calls == 2
+
+
+async def test_waiters_compute_themselves_when_the_leader_fails(redis: FakeAsyncRedis) -> None:
+    service = Service(redis)
+    service.fail = True
+
+    leader = asyncio.create_task(service.get(1))
+    await asyncio.sleep(0.01)
+    service.fail = False
+    waiter = asyncio.create_task(service.get(1))
+
+    with pytest.raises(RuntimeError):
+        await leader
+
+    assert await waiter == {"id": 1, "calls": 2}
+    assert service.calls == 2
+
+
+async def test_result_is_served_from_redis_after_the_call(redis: FakeAsyncRedis) -> None:
+    service = Service(redis)
+
+    await service.get(1)
+    assert await service.get(1) == {"id": 1, "calls": 1}
+
+    assert service.calls == 1
+    assert cache_stats.redis_hits == 1
@@ -0,0 +1,71 @@
+import asyncio
+
+from fakeredis import FakeAsyncRedis
+
+from src.infrastructure.redis import build_cache_key, invalidate_cache, redis_cache
+from src.infrastructure.redis.cache import (
+    CACHE_INVALIDATION_CHANNEL,
+    invalidation_listener,
+    local_cache,
+)
+from src.infrastructure.redis.local_cache import MISSING
+
+
+class Service:
+    def __init__(self, redis_client: FakeAsyncRedis) -> None:
+        self.redis_client = redis_client
+        self.calls = 0
+
+    @redis_cache(prefix="test_local_get", ttl=60, local_ttl=30)
+    async def get(self, item_id: int) -> int:
+        self.calls += 1
+        return item_id * self.calls
+
+
+async def _wait_until_subscribed(redis: FakeAsyncRedis) -> None:
+    for _ in range(100):
+        if (await redis.pubsub_numsub(CACHE_INVALIDATION_CHANNEL))[0][1]:
+            return
+        await asyncio.sleep(0.01)
+
+
+async def test_local_hit_skips_redis(redis: FakeAsyncRedis) -> None:
+    service = Service(redis)
+    key = build_cache_key("test_local_get", 2)
+
+    await service.get(2)
+    await redis.delete(key)
+
+    assert await service.get(2) == 2
+    assert service.calls == 1
+
+
+async def test_invalidation_message_clears_other_processes(redis: FakeAsyncRedis) -> None:
+    service = Service(redis)
+    key = build_cache_key("test_local_get", 2)
+    invalidation_listener.start(redis)
+    await _wait_until_subscribed(redis)
+
+    await service.get(2)
+    assert local_cache.get(key) is not MISSING
+
+    # Another process drops the key: only the published message reaches this one
+    await redis.delete(key)
+    await redis.publish(CACHE_INVALIDATION_CHANNEL, key)
+
+    for _ in range(100):
+        if local_cache.get(key) is MISSING:
+            break
+        await asyncio.sleep(0.01)
+
+    assert await service.get(2) == 4
+    assert service.calls == 2
+
+
+async def test_invalidate_cache_clears_local_entry(redis: FakeAsyncRedis) -> None:
+    service = Service(redis)
+
+    await service.get(2)
+    await invalidate_cache(redis, build_cache_key("test_local_get", 2))
+
+    assert await service.get(2) == 4
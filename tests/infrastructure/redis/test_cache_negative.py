@@ -0,0 +1,68 @@
+from typing import Optional
+
+from fakeredis import FakeAsyncRedis
+
+from src.infrastructure.redis import build_cache_key, invalidate_cache, redis_cache
+from src.infrastructure.redis.cache import NEGATIVE_CACHE_VALUE, cache_stats, local_cache
+
+
+class Service:
+    def __init__(self, redis_client: FakeAsyncRedis) -> None:
+        self.redis_client = redis_client
+        self.calls = 0
+        self.items: dict[int, int] = {}
+
+    @redis_cache(prefix="test_negative_get", ttl=60, local_ttl=30, negative_ttl=5)
+    async def get(self, item_id: int) -> Optional[int]:
+        self.calls += 1
+        return self.items.get(item_id)
+
+    @redis_cache(prefix="test_negative_plain", ttl=60)
+    async def get_uncached_none(self, item_id: int) -> Optional[int]:
+        self.calls += 1
+        return self.items.get(item_id)
+
+
+async def test_missing_result_is_cached_with_the_negative_ttl(redis: FakeAsyncRedis) -> None:
+    service = Service(redis)
+    key = build_cache_key("test_negative_get", 1)
+
+    assert await service.get(1) is None
+
+    assert await redis.get(key) == NEGATIVE_CACHE_VALUE
+    assert 0 < await redis.ttl(key) <= 5
+
+
+async def test_missing_result_is_served_without_calling_the_function(
+    redis: FakeAsyncRedis,
+) -> None:
+    service = Service(redis)
+    key = build_cache_key("test_negative_get", 1)
+
+    await service.get(1)
+    local_cache.delete(key)
+
+    assert await service.get(1) is None
+    assert service.calls == 1
+    assert cache_stats.negative_hits == 1
+
+
+async def test_invalidation_drops_the_negative_entry(redis: FakeAsyncRedis) -> None:
+    service = Service(redis)
+
+    await service.get(1)
+    service.items[1] = 42
+    await invalidate_cache(redis, build_cache_key("test_negative_get", 1))
+
+    assert await service.get(1) == 42
+    assert service.calls == 2
+
+
+async def test_none_uses_the_regular_ttl_without_negative_ttl(redis: FakeAsyncRedis) -> None:
+    service = Service(redis)
+    key = build_cache_key("test_negative_plain", 1)
+
+    await service.get_uncached_none(1)
+
+    assert await redis.get(key) != NEGATIVE_CACHE_VALUE
+    assert await redis.ttl(key) > 5
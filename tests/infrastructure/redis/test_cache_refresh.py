@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from src.infrastructure.redis import cache, redis_cache
+from src.infrastructure.redis.cache import cache_stats
+
+
+class Service:
+    def __init__(self, redis_client: FakeAsyncRedis) -> None:
+        self.redis_client = redis_client
+        self.calls = 0
+
+    # A zero ttl makes every entry stale as soon as it is written
+    @redis_cache(prefix="test_refresh_stale", ttl=0, stale_ttl=60)
+    async def get_stale(self, item_id: int) -> int:
+        self.calls += 1
+        return self.calls
+
+    # With a huge beta XFetch treats every hit as close to expiry
+    @redis_cache(prefix="test_refresh_ahead", ttl=60, refresh_ahead=1e9)
+    async def get_ahead(self, item_id: int) -> int:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return self.calls
+
+
+async def wait_for_refreshes() -> None:
+    await asyncio.gather(*cache._background_tasks)
+
+
+async def test_stale_entry_is_served_while_refreshing(redis: FakeAsyncRedis) -> None:
+    service = Service(redis)
+
+    assert await service.get_stale(1) == 1
+    assert await service.get_stale(1) == 1
+    assert cache_stats.stale_served == 1
+
+    await wait_for_refreshes()
+
+    assert service.calls == 2
+    assert await service.get_stale(1) == 2
+
+
+async def test_stale_refresh_runs_once_per_key(redis: FakeAsyncRedis) -> None:
+    service = Service(redis)
+    await service.get_stale(1)
+
+    await asyncio.gather(*(service.get_stale(1) for _ in range(5)))
+    await wait_for_refreshes()
+
+    assert service.calls == 2
+
+
+async def test_stale_entry_outlives_its_ttl_in_redis(redis: FakeAsyncRedis) -> None:
+    service = Service(redis)
+    await service.get_stale(1)
+
+    key = cache.build_cache_key("test_refresh_stale", 1)
+    assert 0 < await redis.ttl(key) <= 60
+
+
+async def test_entry_close_to_expiry_is_refreshed_early(
+    redis: FakeAsyncRedis,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = Service(redis)
+    await service.get_ahead(1)
+
+    monkeypatch.setattr(cache.random, "random", lambda: 0.5)
+    assert await service.get_ahead(1) == 1
+
+    await wait_for_refreshes()
+    assert await service.get_ahead(1) == 2
+
+
+async def test_fresh_entry_is_not_refreshed_early(
+    redis: FakeAsyncRedis,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = Service(redis)
+    await service.get_ahead(1)
+
+    # random() == 0 gives log(1) == 0, so only an expired entry would be refreshed
+    monkeypatch.setattr(cache.random, "random", lambda: 0.0)
+    assert await service.get_ahead(1) == 1
+
+    assert not cache._background_tasks
+    assert service.calls == 1
@@ -0,0 +1,66 @@
+from fakeredis import FakeAsyncRedis
+
+from src.infrastructure.redis import build_cache_key, invalidate_tags, redis_cache
+from src.infrastructure.redis.cache import build_tag_key
+
+
+class Service:
+    def __init__(self, redis_client: FakeAsyncRedis) -> None:
+        self.redis_client = redis_client
+        self.calls = 0
+
+    @redis_cache(
+        prefix="test_tags_get",
+        ttl=60,
+        tags=("owner:{owner_id}",),
+        result_tags=lambda result: [f"plan:{result['plan']}"],
+    )
+    async def get(self, owner_id: int, item_id: int) -> dict[str, int]:
+        self.calls += 1
+        return {"owner": owner_id, "item": item_id, "plan": item_id % 2}
+
+
+async def test_entries_are_indexed_under_their_tags(redis: FakeAsyncRedis) -> None:
+    service = Service(redis)
+
+    await service.get(1, 10)
+    await service.get(1, 11)
+
+    assert await redis.smembers(build_tag_key("owner:1")) == {
+        build_cache_key("test_tags_get", 1, 10).encode(),
+        build_cache_key("test_tags_get", 1, 11).encode(),
+    }
+    assert await redis.smembers(build_tag_key("plan:0")) == {
+        build_cache_key("test_tags_get", 1, 10).encode(),
+    }
+    assert await redis.ttl(build_tag_key("owner:1")) > 0
+
+
+async def test_tag_invalidation_drops_only_tagged_entries(redis: FakeAsyncRedis) -> None:
+    service = Service(redis)
+
+    await service.get(1, 10)
+    await service.get(2, 20)
+    await invalidate_tags(redis, "owner:1")
+
+    assert await redis.get(build_cache_key("test_tags_get", 1, 10)) is None
+    assert await redis.get(build_cache_key("test_tags_get", 2, 20)) is not None
+    assert await redis.exists(build_tag_key("owner:1")) == 0
+
+    await service.get(1, 10)
+    await service.get(2, 20)
+
+    assert service.calls == 3
+
+
+async def test_result_tags_invalidate_across_arguments(redis: FakeAsyncRedis) -> None:
+    service = Service(redis)
+
+    await service.get(1, 11)
+    await service.get(2, 21)
+    await service.get(3, 30)
+    await invalidate_tags(redis, "plan:1")
+
+    assert await redis.get(build_cache_key("test_tags_get", 1, 11)) is None
+    assert await redis.get(build_cache_key("test_tags_get", 2, 21)) is None
+    assert await redis.get(build_cache_key("test_tags_get", 3, 30)) is not None
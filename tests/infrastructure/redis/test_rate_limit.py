@@ -0,0 +1,114 @@
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from src.infrastructure.redis import TokenBucket, TokenBucketLimit
+
+# Slow enough that no token is refilled while a test runs
+LIMIT = TokenBucketLimit(rate=0.001, capacity=5)
+
+
+async def test_bucket_denies_once_capacity_is_spent(redis: FakeAsyncRedis) -> None:
+    bucket = TokenBucket(redis, local_ttl=0)
+
+    results = [await bucket.acquire("bucket", LIMIT) for _ in range(6)]
+
+    assert [allowed for allowed, _ in results] == [True] * 5 + [False]
+
+
+async def test_denial_is_reported_once_per_notice_window(redis: FakeAsyncRedis) -> None:
+    bucket = TokenBucket(redis, local_ttl=0)
+
+    for _ in range(5):
+        await bucket.acquire("bucket", LIMIT, notice_key="notice", notice_ttl=60)
+
+    first = await bucket.acquire("bucket", LIMIT, notice_key="notice", notice_ttl=60)
+    second = await bucket.acquire("bucket", LIMIT, notice_key="notice", notice_ttl=60)
+
+    assert first == (False, True)
+    assert second == (False, False)
+    assert 0 < await redis.ttl("notice") <= 60
+
+
+async def test_processes_share_one_bucket(redis: FakeAsyncRedis) -> None:
+    buckets = [TokenBucket(redis, local_ttl=0) for _ in range(2)]
+
+    allowed = [(await buckets[i % 2].acquire("bucket", LIMIT))[0] for i in range(10)]
+
+    assert allowed.count(True) == 5
+
+
+async def test_local_admissions_are_charged_on_the_next_call(redis: FakeAsyncRedis) -> None:
+    bucket = TokenBucket(redis)
+
+    # Redis (4 left), local (3 left), then Redis again with one token of debt
+    for _ in range(3):
+        assert (await bucket.acquire("bucket", LIMIT))[0]
+
+    tokens = float(await redis.hget("bucket", "tokens"))
+
+    assert 2.0 <= tokens < 2.1
+
+
+async def test_local_admission_stops_at_the_reserve(redis: FakeAsyncRedis) -> None:
+    bucket = TokenBucket(redis)
+    other = TokenBucket(redis, local_ttl=0)
+
+    await bucket.acquire("bucket", LIMIT)
+    # Another process empties the bucket behind the local mirror
+    while (await other.acquire("bucket", LIMIT))[0]:
+        pass
+
+    allowed = [(await bucket.acquire("bucket", LIMIT))[0] for _ in range(3)]
+
+    assert allowed == [True, False, False]
+
+
+async def test_redis_failure_admits_the_event() -> None:
+    server = FakeServer()
+    server.connected = False
+    bucket = TokenBucket(FakeAsyncRedis(server=server))
+
+    assert await bucket.acquire("bucket", LIMIT) == (True, False)
+
+
+async def test_acquire_all_takes_from_every_bucket(redis: FakeAsyncRedis) -> None:
+    bucket = TokenBucket(redis)
+
+    wait = await bucket.acquire_all([("global", LIMIT, 0), ("chat", LIMIT, 0)])
+
+    assert wait == 0
+    assert float(await redis.hget("global", "tokens")) < 4.1
+    assert float(await redis.hget("chat", "tokens")) < 4.1
+
+
+async def test_acquire_all_takes_nothing_when_one_bucket_is_empty(
+    redis: FakeAsyncRedis,
+) -> None:
+    bucket = TokenBucket(redis)
+
+    for _ in range(5):
+        await bucket.acquire_all([("chat", LIMIT, 0)])
+
+    wait = await bucket.acquire_all([("global", LIMIT, 0), ("chat", LIMIT, 0)])
+
+    # The empty chat bucket needs a whole token at 0.001 tokens/s
+    assert 900 < wait <= 1000
+    assert await redis.exists("global") == 0
+
+
+async def test_acquire_all_keeps_the_reserve(redis: FakeAsyncRedis) -> None:
+    bucket = TokenBucket(redis)
+
+    waits = [await bucket.acquire_all([("global", LIMIT, 3)]) for _ in range(3)]
+
+    assert waits[:2] == [0, 0]
+    assert waits[2] > 0
+    # Callers without a reserve can still use what was kept back
+    assert await bucket.acquire_all([("global", LIMIT, 0)]) == 0
+
+
+async def test_acquire_all_fails_open_on_redis_error() -> None:
+    server = FakeServer()
+    server.connected = False
+    bucket = TokenBucket(FakeAsyncRedis(server=server))
+
+    assert await bucket.acquire_all([("global", LIMIT, 0)]) == 0
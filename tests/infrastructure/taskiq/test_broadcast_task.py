@@ -0,0 +1,233 @@
+import asyncio
+from typing import Any, AsyncGenerator, Optional, cast
+from uuid import UUID, uuid4
+
+import pytest
+from aiogram.types import Message
+
+from src.core.enums import BroadcastAudience, BroadcastMessageStatus, BroadcastStatus, Locale
+from src.core.utils.message_payload import MessagePayload
+from src.infrastructure.database.models.dto import BroadcastDto, BroadcastMessageDto, UserDto
+from src.infrastructure.taskiq.tasks import broadcast as broadcast_tasks
+from src.infrastructure.taskiq.tasks.broadcast import BroadcastResultBuffer, send_broadcast_task
+
+# The task body without the dishka wrapper, services are passed in directly
+run_broadcast = send_broadcast_task.original_func.__dishka_orig_func__
+
+
+class FakeUnitOfWork:
+    def __init__(self) -> None:
+        self.rollbacks = 0
+
+    async def rollback(self) -> None:
+        self.rollbacks += 1
+
+
+class FakeBroadcastService:
+    def __init__(
+        self,
+        recipients: int,
+        fail_on_save: bool = False,
+        read_delay: float = 0,
+    ) -> None:
+        self.recipients = recipients
+        self.fail_on_save = fail_on_save
+        self.read_delay = read_delay
+        self.interrupted_reads = 0
+        self.watcher_failures = 0
+        self.watchers_started = 0
+        self.uow = FakeUnitOfWork()
+        self.saved: list[list[BroadcastMessageDto]] = []
+        self.finished: list[BroadcastStatus] = []
+        self.cancel_requested = asyncio.Event()
+
+    async def iter_audience(
+        self,
+        audience: BroadcastAudience,
+        plan_id: Optional[int],
+    ) -> AsyncGenerator[list[tuple[int, Locale]], None]:
+        for start in range(0, self.recipients, 4):
+            # Every chunk after the first is a slow query on the shared session
+            if start and self.read_delay:
+                try:
+                    await asyncio.sleep(self.read_delay)
+                except asyncio.CancelledError:
+                    self.interrupted_reads += 1
+                    raise
+
+            end = min(start + 4, self.recipients)
+            yield [(telegram_id, Locale.EN) for telegram_id in range(start + 1, end + 1)]
+
+    async def create_messages(
+        self,
+        broadcast_id: int,
+        messages: list[BroadcastMessageDto],
+    ) -> list[BroadcastMessageDto]:
+        return [
+            BroadcastMessageDto(id=m.user_id, user_id=m.user_id, status=m.status) for m in messages
+        ]
+
+    async def save_results(self, broadcast_id: int, messages: list[BroadcastMessageDto]) -> None:
+        if self.fail_on_save:
+            raise ConnectionError("database is down")
+        if self.interrupted_reads:
+            raise ConnectionError("session is in an unknown state")
+        self.saved.append(list(messages))
+
+    async def finish(self, task_id: UUID, status: BroadcastStatus) -> bool:
+        self.finished.append(status)
+        return True
+
+    async def wait_for_cancel(self, task_id: UUID) -> None:
+        self.watchers_started += 1
+
+        if self.watcher_failures:
+            self.watcher_failures -= 1
+            raise RuntimeError("unexpected watcher error")
+
+        await self.cancel_requested.wait()
+
+
+class FakeNotificationService:
+    async def deliver(self, user: UserDto, payload: MessagePayload) -> Optional[Message]:
+        if user.telegram_id % 5 == 0:
+            return None
+        return cast(Message, type("SentMessage", (), {"message_id": user.telegram_id * 10})())
+
+
+def build_broadcast(total: int) -> BroadcastDto:
+    return BroadcastDto(
+        id=1,
+        task_id=uuid4(),
+        status=BroadcastStatus.PROCESSING,
+        audience=BroadcastAudience.ALL,
+        total_count=total,
+        payload=MessagePayload(i18n_key="ntf-broadcast"),
+    )
+
+
+async def run(service: FakeBroadcastService, total: int) -> None:
+    await run_broadcast(
+        broadcast=build_broadcast(total),
+        audience=BroadcastAudience.ALL,
+        plan_id=None,
+        payload=MessagePayload(i18n_key="ntf-broadcast"),
+        notification_service=FakeNotificationService(),
+        broadcast_service=service,
+    )
+
+
+def build_buffer(service: FakeBroadcastService) -> BroadcastResultBuffer:
+    return BroadcastResultBuffer(1, cast(Any, service), asyncio.Lock())
+
+
+async def test_buffer_records_outcomes_and_flushes_in_batches(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(broadcast_tasks, "BROADCAST_FLUSH_SIZE", 2)
+    service = FakeBroadcastService(recipients=0)
+    buffer = build_buffer(service)
+    sent = BroadcastMessageDto(id=1, user_id=1, status=BroadcastMessageStatus.PENDING)
+    failed = BroadcastMessageDto(id=2, user_id=2, status=BroadcastMessageStatus.PENDING)
+
+    assert not buffer.add(sent, cast(Message, type("SentMessage", (), {"message_id": 7})()))
+    assert buffer.add(failed, None)
+
+    await buffer.flush()
+
+    assert service.saved == [[sent, failed]]
+    assert (sent.status, sent.message_id) == (BroadcastMessageStatus.SENT, 7)
+    assert failed.status == BroadcastMessageStatus.FAILED
+    assert buffer.messages == []
+
+
+async def test_buffer_keeps_results_when_saving_fails() -> None:
+    service = FakeBroadcastService(recipients=0, fail_on_save=True)
+    buffer = build_buffer(service)
+    buffer.add(BroadcastMessageDto(id=1, user_id=1, status=BroadcastMessageStatus.PENDING), None)
+
+    with pytest.raises(ConnectionError):
+        await buffer.flush()
+
+    assert len(buffer.messages) == 1
+
+
+async def test_empty_buffer_is_not_saved() -> None:
+    service = FakeBroadcastService(recipients=0)
+
+    await build_buffer(service).flush()
+
+    assert service.saved == []
+
+
+async def test_completed_broadcast_saves_every_result() -> None:
+    service = FakeBroadcastService(recipients=10)
+
+    await run(service, total=10)
+
+    saved = [message for batch in service.saved for message in batch]
+    assert sorted(message.user_id for message in saved) == list(range(1, 11))
+    assert sum(message.status == BroadcastMessageStatus.FAILED for message in saved) == 2
+    assert service.finished == [BroadcastStatus.COMPLETED]
+
+
+async def test_canceled_broadcast_stops_and_keeps_sent_results() -> None:
+    service = FakeBroadcastService(recipients=100)
+    service.cancel_requested.set()
+
+    await run(service, total=100)
+
+    saved = [message for batch in service.saved for message in batch]
+    assert 0 < len(saved) < 100
+    assert all(message.status != BroadcastMessageStatus.PENDING for message in saved)
+    assert service.finished == [BroadcastStatus.CANCELED]
+
+
+async def test_failed_cancel_watcher_is_restarted_instead_of_canceling() -> None:
+    service = FakeBroadcastService(recipients=10)
+    service.watcher_failures = 1
+
+    await run(service, total=10)
+
+    saved = [message for batch in service.saved for message in batch]
+    assert len(saved) == 10
+    assert service.watchers_started == 2
+    assert service.finished == [BroadcastStatus.COMPLETED]
+
+
+async def test_cancel_during_chunk_read_waits_for_the_read() -> None:
+    service = FakeBroadcastService(recipients=100, read_delay=0.05)
+    service.cancel_requested.set()
+
+    await run(service, total=100)
+
+    saved = [message for batch in service.saved for message in batch]
+    assert service.interrupted_reads == 0
+    assert 0 < len(saved) < 100
+    assert service.finished == [BroadcastStatus.CANCELED]
+
+
+async def test_stopped_task_saves_results_without_interrupting_a_read() -> None:
+    service = FakeBroadcastService(recipients=100, read_delay=0.05)
+    task = asyncio.create_task(run(service, total=100))
+
+    # The first chunk is being sent, the second one is being read
+    await asyncio.sleep(0.02)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    saved = [message for batch in service.saved for message in batch]
+    assert service.interrupted_reads == 0
+    assert 0 < len(saved) <= 4
+    assert service.finished == []
+
+
+async def test_failed_save_rolls_back_and_stores_error_separately() -> None:
+    service = FakeBroadcastService(recipients=10, fail_on_save=True)
+
+    await run(service, total=10)
+
+    assert service.uow.rollbacks == 1
+    assert service.finished == [BroadcastStatus.ERROR]
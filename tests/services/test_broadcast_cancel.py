@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, cast
+from uuid import UUID, uuid4
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from src.core.config import AppConfig
+from src.core.storage.keys import BroadcastCancelKey
+from src.infrastructure.redis import RedisRepository
+from src.services import broadcast as broadcast_services
+from src.services.broadcast import BroadcastService
+
+
+def build_service(redis: FakeAsyncRedis) -> BroadcastService:
+    config = AppConfig.get()
+    return BroadcastService(
+        config=config,
+        bot=cast(Any, None),
+        redis_client=redis,
+        redis_repository=RedisRepository(config, redis),
+        translator_hub=cast(Any, None),
+        uow=cast(Any, None),
+    )
+
+
+async def test_cancel_flag_stops_the_watcher(redis: FakeAsyncRedis) -> None:
+    service = build_service(redis)
+    task_id = uuid4()
+
+    await service.request_cancel(task_id)
+    await asyncio.wait_for(service.wait_for_cancel(task_id), timeout=1)
+
+    assert not await redis.exists(BroadcastCancelKey(task_id=str(task_id)).pack())
+
+
+async def test_watcher_falls_back_to_the_stored_status(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(broadcast_services, "BROADCAST_CANCEL_CHECK_INTERVAL", 0.01)
+    monkeypatch.setattr(broadcast_services, "BROADCAST_CANCEL_DB_CHECK_INTERVAL", 0)
+    server = FakeServer()
+    server.connected = False
+    service = build_service(FakeAsyncRedis(server=server))
+    checks: list[UUID] = []
+
+    async def is_canceled(task_id: UUID) -> bool:
+        checks.append(task_id)
+        return len(checks) == 3
+
+    monkeypatch.setattr(service, "_is_canceled", is_canceled)
+    task_id = uuid4()
+
+    # The flag is lost with Redis down, the stored CANCELED status still stops the task
+    await service.request_cancel(task_id)
+    await asyncio.wait_for(service.wait_for_cancel(task_id), timeout=1)
+
+    assert checks == [task_id] * 3
@@ -0,0 +1,60 @@
+from typing import Any, AsyncIterator, Optional, cast
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+from aiogram.types import Message
+
+from src.core.constants import BROADCAST_MAX_FLOOD_WAITS
+from src.services.broadcast import BroadcastSender
+
+
+class NoPacing:
+    def __init__(self) -> None:
+        self.pauses: list[float] = []
+
+    async def wait(self) -> None:
+        return None
+
+    def on_success(self) -> None:
+        return None
+
+    def on_retry_after(self, retry_after: float) -> None:
+        self.pauses.append(retry_after)
+
+
+async def chat_ids(count: int) -> AsyncIterator[int]:
+    for chat_id in range(1, count + 1):
+        yield chat_id
+
+
+async def test_chat_in_endless_flood_wait_is_failed_after_the_cap() -> None:
+    attempts: dict[int, int] = {}
+
+    async def send(chat_id: int) -> Optional[Message]:
+        attempts[chat_id] = attempts.get(chat_id, 0) + 1
+
+        if chat_id == 1:
+            raise TelegramRetryAfter(
+                method=SendMessage(chat_id=chat_id, text="broadcast"),
+                message="Too Many Requests: retry after 0",
+                retry_after=0,
+            )
+
+        return cast(Message, type("SentMessage", (), {"message_id": chat_id})())
+
+    rate = NoPacing()
+    sender = BroadcastSender(send=send, workers=2, rate=cast(Any, rate))
+
+    results = {chat_id: message async for chat_id, message in sender.run(chat_ids(3))}
+
+    assert results[1] is None
+    assert results[2] is not None and results[3] is not None
+    assert attempts[1] == BROADCAST_MAX_FLOOD_WAITS
+    assert len(rate.pauses) == BROADCAST_MAX_FLOOD_WAITS
+    assert sender.stats.as_dict() == {
+        "sent": 2,
+        "failed": 1,
+        "blocked": 0,
+        "rate_limited": BROADCAST_MAX_FLOOD_WAITS,
+        "retries": BROADCAST_MAX_FLOOD_WAITS - 1,
+    }
@@ -0,0 +1,74 @@
+from typing import Any, Optional, cast
+
+import pytest
+from aiogram.types import Message
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from src.core.config import AppConfig
+from src.core.storage.keys import DeferredNotificationsLockKey
+from src.core.utils.message_payload import MessagePayload
+from src.infrastructure.database.models.dto import UserDto
+from src.infrastructure.redis import RedisRepository
+from src.services.notification import NotificationService, notification_stats
+
+
+def build_service(redis: FakeAsyncRedis) -> NotificationService:
+    config = AppConfig.get()
+    return NotificationService(
+        config=config,
+        bot=cast(Any, None),
+        redis_client=redis,
+        redis_repository=RedisRepository(config, redis),
+        translator_hub=cast(Any, None),
+        user_service=cast(Any, None),
+        settings_service=cast(Any, None),
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_stats() -> None:
+    notification_stats.reset()
+
+
+async def test_message_is_returned_when_deletion_cannot_be_scheduled(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    server = FakeServer()
+    server.connected = False
+    service = build_service(FakeAsyncRedis(server=server))
+    sent = cast(Message, type("SentMessage", (), {"message_id": 7})())
+
+    async def send_text_message(*args: Any) -> Optional[Message]:
+        return sent
+
+    monkeypatch.setattr(service, "_send_text_message", send_text_message)
+    user = UserDto(telegram_id=1, name="user")
+
+    result = await service._send_message(user, MessagePayload(i18n_key="ntf-test"))
+
+    assert result is sent
+    assert notification_stats.sent == 1
+    assert notification_stats.failed == 0
+
+
+async def test_deferred_lock_is_held_by_one_run(redis: FakeAsyncRedis) -> None:
+    service = build_service(redis)
+
+    token = await service.acquire_deferred_lock()
+
+    assert token is not None
+    assert await service.acquire_deferred_lock() is None
+
+    await service.release_deferred_lock(token)
+
+    assert await service.acquire_deferred_lock() is not None
+
+
+async def test_foreign_token_does_not_release_the_lock(redis: FakeAsyncRedis) -> None:
+    service = build_service(redis)
+
+    await service.acquire_deferred_lock()
+    await service.release_deferred_lock("stale-token")
+
+    assert await redis.exists(DeferredNotificationsLockKey().pack()) == 1
+    assert await service.acquire_deferred_lock() is None
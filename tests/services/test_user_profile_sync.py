@@ -0,0 +1,102 @@
+from typing import Any, cast
+
+import pytest
+from aiogram.types import User as AiogramUser
+from fakeredis import FakeAsyncRedis
+
+from src.core.config import AppConfig
+from src.core.storage.keys import ProfileFingerprintKey
+from src.infrastructure.database.models.dto import UserDto
+from src.services import user as user_module
+from src.services.user import ProfileSyncBuffer, UserService
+
+
+class RecordingBuffer:
+    def __init__(self) -> None:
+        self.queued: list[UserDto] = []
+
+    def add(self, user: UserDto, session_pool: Any, redis_client: Any) -> None:
+        self.queued.append(user)
+
+
+class FakeUnitOfWork:
+    session_pool = None
+
+
+def broken_session_pool() -> Any:
+    raise ConnectionError("database is down")
+
+
+@pytest.fixture
+def buffer(monkeypatch: pytest.MonkeyPatch) -> RecordingBuffer:
+    recording = RecordingBuffer()
+    monkeypatch.setattr(user_module, "profile_sync_buffer", recording)
+    return recording
+
+
+def build_service(redis: FakeAsyncRedis) -> UserService:
+    return UserService(
+        config=AppConfig.get(),
+        bot=cast(Any, None),
+        redis_client=redis,
+        redis_repository=cast(Any, None),
+        translator_hub=cast(Any, None),
+        uow=cast(Any, FakeUnitOfWork()),
+    )
+
+
+def build_user(telegram_id: int = 1) -> UserDto:
+    return UserDto(telegram_id=telegram_id, username="old", name="Old", language="en")
+
+
+def build_aiogram_user(telegram_id: int = 1) -> AiogramUser:
+    return AiogramUser(
+        id=telegram_id,
+        is_bot=False,
+        first_name="New",
+        username="new",
+        language_code="en",
+    )
+
+
+async def test_change_is_queued_by_one_worker_only(
+    redis: FakeAsyncRedis,
+    buffer: RecordingBuffer,
+) -> None:
+    # Two workers with their own cached copy of the stale profile
+    first, second = build_service(redis), build_service(redis)
+
+    await first.compare_and_update(build_user(), build_aiogram_user())
+    await second.compare_and_update(build_user(), build_aiogram_user())
+
+    assert len(buffer.queued) == 1
+    assert buffer.queued[0].username == "new"
+
+
+async def test_unchanged_profile_is_not_queued(
+    redis: FakeAsyncRedis,
+    buffer: RecordingBuffer,
+) -> None:
+    service = build_service(redis)
+    user = UserDto(telegram_id=1, username="new", name="New", language="en")
+
+    assert await service.compare_and_update(user, build_aiogram_user()) is None
+    assert buffer.queued == []
+
+
+async def test_failed_flush_forgets_fingerprints(
+    redis: FakeAsyncRedis,
+    buffer: RecordingBuffer,
+) -> None:
+    service = build_service(redis)
+    await service.compare_and_update(build_user(), build_aiogram_user())
+
+    sync_buffer = ProfileSyncBuffer()
+    sync_buffer.add(build_user(), cast(Any, broken_session_pool), redis)
+    await sync_buffer.close()
+
+    assert await redis.exists(ProfileFingerprintKey(telegram_id=1).pack()) == 0
+
+    await service.compare_and_update(build_user(), build_aiogram_user())
+
+    assert len(buffer.queued) == 2